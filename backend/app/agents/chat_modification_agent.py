@@ -1,10 +1,11 @@
 from crewai import Agent, Task
-from app.core.ClaudeLLM import ClaudeLLM
 from typing import Dict, Any
-from app.core.OpenaiLLM import OpenaiLLM
+from app.config.settings import LLM_ROUTER_HEDGE_CHAT
+from app.core.RouterLLM import RouterLLM
+from app.core.prompt_caching import CACHE_BREAKPOINT
 
-llm_claude = ClaudeLLM()
-#llm_gpt=OpenaiLLM()
+# Chat edits are latency critical: slow requests can be hedged on another provider
+llm_router = RouterLLM.from_providers(name="chat", hedge=LLM_ROUTER_HEDGE_CHAT)
 
 chat_modification_agent = Agent(
     role="React Native Web Project Modifier",
@@ -12,7 +13,7 @@ chat_modification_agent = Agent(
     backstory="Expert en modification de code React Native Web, spécialisé dans l'ajustement des styles, couleurs, thèmes, et fonctionnalités selon les demandes conversationnelles.",
     verbose=False,
     allow_delegation=False,
-    llm=llm_claude
+    llm=llm_router
 )
 
 def create_modification_task(user_message: str, current_project: Dict[str, str]) -> Task:
@@ -24,15 +25,9 @@ def create_modification_task(user_message: str, current_project: Dict[str, str])
         current_project: Dictionnaire contenant les fichiers du projet actuel
     """
     
-    # Convertir le projet actuel en format lisible
-    project_context = ""
-    for file_path, file_content in current_project.items():
-        project_context += f"\n--- {file_path} ---\n{file_content}\n"
-    
-    task_description = f"""Modifie le projet React Native Web existant selon cette demande utilisateur : "{user_message}"
-
-PROJET ACTUEL COMPLET :
-{project_context}
+    # Préfixe stable (consignes, puis projet de cette version) et demande à la fin,
+    # pour que les tours successifs sur un même projet partagent le cache de prompt
+    task_description = f"""Modifie le projet React Native Web existant selon la demande utilisateur donnée à la fin.
 
 RÈGLES DE MODIFICATION CRITIQUES :
 ➤ RETOURNE TOUJOURS LE PROJET COMPLET avec TOUS les fichiers
@@ -57,10 +52,121 @@ EXEMPLE de structure attendue :
   ... (tous les autres fichiers)
 }}
 
-IMPORTANT : Ne retourne PAS seulement les fichiers modifiés, mais le projet ENTIER avec les modifications appliquées."""
+IMPORTANT : Ne retourne PAS seulement les fichiers modifiés, mais le projet ENTIER avec les modifications appliquées.
+{CACHE_BREAKPOINT}
+PROJET ACTUEL COMPLET :
+{_project_context(current_project)}{CACHE_BREAKPOINT}
+DEMANDE DE L'UTILISATEUR : "{user_message}\""""
     
     return Task(
         description=task_description,
         expected_output="Un JSON contenant TOUS les fichiers React Native Web du projet complet avec les modifications demandées appliquées.",
         agent=chat_modification_agent
-    )
\ No newline at end of file
+    )
+
+def _project_context(current_project: Dict[str, str]) -> str:
+    # Trié par chemin : le même projet donne toujours le même texte (préfixe de prompt réutilisable)
+    project_context = ""
+    for file_path in sorted(current_project):
+        project_context += f"\n--- {file_path} ---\n{current_project[file_path]}\n"
+    return project_context
+
+def _manifest_context(manifest: str) -> str:
+    if not manifest:
+        return ""
+    return f"""
+AUTRES FICHIERS DU PROJET (résumé seulement) :
+{manifest}
+➤ Ces fichiers existent et restent inchangés : ne modifie que les fichiers fournis en entier ci-dessus
+"""
+
+def create_patch_task(user_message: str, current_project: Dict[str, str], manifest: str = "") -> Task:
+    """
+    Crée une tâche de modification qui ne retourne que les changements
+    (blocs SEARCH/REPLACE, fichiers complets ou suppressions)
+    
+    Args:
+        user_message: Message de l'utilisateur demandant une modification
+        current_project: Fichiers du projet actuel envoyés en entier (tous, ou ceux concernés par le message)
+        manifest: Résumé des autres fichiers du projet
+    """
+    task_description = f"""Modifie le projet React Native Web existant selon la demande utilisateur donnée à la fin.
+
+RÈGLES DE MODIFICATION CRITIQUES :
+➤ Applique UNIQUEMENT les modifications demandées par l'utilisateur
+➤ Pour les couleurs/thèmes : Modifie les StyleSheet appropriés
+➤ Pour les logos/images : Utilise des émojis ou caractères Unicode si pas d'URL fournie
+➤ Pour les fonctionnalités : Ajoute le code nécessaire sans casser l'existant
+➤ Garde la compatibilité React Native Web
+➤ Respecte les mêmes contraintes : pas de packages externes
+
+STRUCTURE DE SORTIE OBLIGATOIRE :
+➤ Format JSON contenant UNIQUEMENT les fichiers modifiés, ajoutés ou supprimés
+➤ Clé = chemin du fichier
+➤ Fichier existant modifié : la valeur est une suite de blocs de remplacement
+<<<<<<< SEARCH
+lignes exactes du fichier actuel
+=======
+nouvelles lignes
+>>>>>>> REPLACE
+➤ Le texte SEARCH est copié À L'IDENTIQUE du fichier actuel (indentation comprise) et n'y apparaît qu'une seule fois : ajoute des lignes voisines si nécessaire
+➤ Nouveau fichier, ou fichier presque entièrement réécrit : la valeur est le code complet du fichier
+➤ Fichier supprimé : la valeur est une chaîne vide ""
+➤ N'inclus PAS les fichiers inchangés
+
+EXEMPLE de structure attendue :
+{{
+  "/App.js": "<<<<<<< SEARCH\\n    backgroundColor: '#ffffff',\\n=======\\n    backgroundColor: '#1e3a8a',\\n>>>>>>> REPLACE",
+  "/components/Logo.js": "code complet du nouveau fichier Logo.js"
+}}
+{CACHE_BREAKPOINT}
+{"FICHIERS CONCERNÉS DU PROJET ACTUEL" if manifest else "PROJET ACTUEL COMPLET"} :
+{_project_context(current_project)}{_manifest_context(manifest)}{CACHE_BREAKPOINT}
+DEMANDE DE L'UTILISATEUR : "{user_message}\""""
+    
+    return Task(
+        description=task_description,
+        expected_output="Un JSON contenant uniquement les fichiers modifiés (blocs SEARCH/REPLACE), ajoutés (code complet) ou supprimés (chaîne vide).",
+        agent=chat_modification_agent
+    )
+
+def create_file_rewrite_task(user_message: str, current_project: Dict[str, str], failed_changes: Dict[str, str],
+                             manifest: str = "") -> Task:
+    """
+    Crée une tâche qui redemande le code complet des fichiers dont les blocs
+    SEARCH/REPLACE n'ont pas pu être appliqués
+    
+    Args:
+        user_message: Message de l'utilisateur demandant une modification
+        current_project: Fichiers du projet actuel envoyés en entier
+        failed_changes: Chemin -> blocs proposés qui n'ont pas pu être appliqués
+        manifest: Résumé des autres fichiers du projet
+    """
+    failed_context = ""
+    for file_path, change in failed_changes.items():
+        failed_context += f"\n--- {file_path} ---\n{change}\n"
+    
+    task_description = f"""Modifie le projet React Native Web existant selon la demande utilisateur donnée à la fin.
+Des modifications proposées n'ont pas pu être appliquées car leur texte SEARCH ne correspond pas au fichier actuel.
+
+RÈGLES :
+➤ Retourne le code COMPLET de chacun des fichiers listés à la fin, avec la modification demandée appliquée
+➤ N'inclus AUCUN autre fichier
+➤ Garde la compatibilité React Native Web, pas de packages externes
+
+STRUCTURE DE SORTIE OBLIGATOIRE :
+➤ Format JSON : Clé = chemin du fichier, Valeur = code complet du fichier
+{CACHE_BREAKPOINT}
+{"FICHIERS CONCERNÉS DU PROJET ACTUEL" if manifest else "PROJET ACTUEL COMPLET"} :
+{_project_context(current_project)}{_manifest_context(manifest)}{CACHE_BREAKPOINT}
+MODIFICATIONS NON APPLIQUÉES :
+{failed_context}
+FICHIERS À RETOURNER EN ENTIER : {", ".join(failed_changes)}
+
+DEMANDE DE L'UTILISATEUR : "{user_message}\""""
+    
+    return Task(
+        description=task_description,
+        expected_output="Un JSON contenant le code complet des fichiers demandés.",
+        agent=chat_modification_agent
+    )
@@ -1,11 +1,10 @@
+import hashlib
+from typing import Dict
 from crewai import Agent, Task
-from app.core.ClaudeLLM import ClaudeLLM
-from app.core.AzureGithubLLM import AzureGitHubLLM
-from app.core.OpenaiLLM import OpenaiLLM
+from app.core.RouterLLM import RouterLLM
 
-llm_claude = ClaudeLLM()
-#llm_gpt=OpenaiLLM()
-#llm_azure=AzureGitHubLLM()
+# Providers come from LLM_ROUTER_PROVIDERS (claude, openai, azure_github)
+llm_router = RouterLLM.from_providers(name="generation")
 
 frontend_generator_agent = Agent(
     role="React Native Web Frontend Architect",
@@ -13,11 +12,11 @@ frontend_generator_agent = Agent(
     backstory="Expert React Native Web (necolas/react-native-web), spécialisé dans la génération d'UI web utilisant l'API React Native.",
     verbose=False,
     allow_delegation=False,
-    llm=llm_claude
+    llm=llm_router
 )
 
-def create_react_native_web_task(description: str, features: str = "") -> Task:
-    task_description = f"""Génère une application React Native Web (https://necolas.github.io/react-native-web/) pour navigateur web.
+# Prompt template of the generation task, formatted with description and features
+REACT_NATIVE_WEB_TASK_TEMPLATE = """Génère une application React Native Web (https://necolas.github.io/react-native-web/) pour navigateur web.
 
 Fonctionnalité de l'application : {description}
 
@@ -55,6 +54,12 @@ CONTRAINTES PACKAGES EXTERNES :
   - Composants UI : Code tous les composants personnalisés (modals, sliders, etc.)
 ➤ CRÉATIVITÉ : Développe des solutions créatives responsives et natives pour remplacer les packages
 Format JSON uniquement : {{ "chemin/fichier.js": "code complet" }} """
+
+# Changes whenever the generation prompt changes (used to key cached generations)
+PROMPT_VERSION = hashlib.sha256(REACT_NATIVE_WEB_TASK_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+def create_react_native_web_task(description: str, features: str = "") -> Task:
+    task_description = REACT_NATIVE_WEB_TASK_TEMPLATE.format(description=description, features=features)
     
     return Task(
         description=task_description,
@@ -62,3 +67,39 @@ Format JSON uniquement : {{ "chemin/fichier.js": "code complet" }} """
         agent=frontend_generator_agent
     )
 
+def create_warm_start_task(description: str, features: str, base_description: str, base_project: Dict[str, str]) -> Task:
+    """
+    Tâche d'adaptation d'un projet existant, généré pour une demande proche
+
+    Args:
+        description: Nouvelle demande
+        features: Fonctionnalités de la nouvelle demande
+        base_description: Demande pour laquelle le projet de base a été généré
+        base_project: Fichiers du projet de base
+    """
+    project_context = ""
+    for file_path, file_content in base_project.items():
+        project_context += f"\n--- {file_path} ---\n{file_content}\n"
+
+    task_description = f"""Adapte un projet React Native Web existant à une nouvelle demande.
+
+PROJET DE BASE (généré pour : "{base_description}") :
+{project_context}
+
+NOUVELLE DEMANDE :
+Fonctionnalité de l'application : {description}
+
+{features}
+
+RÈGLES :
+➤ Pars du projet de base et modifie uniquement ce qui est nécessaire pour la nouvelle demande
+➤ Conserve les règles du projet de base : imports depuis react-native-web, StyleSheet.create(), index.js inchangé, aucun package externe
+➤ Retourne UNIQUEMENT les fichiers ajoutés ou modifiés, chacun avec son code complet
+➤ Pour supprimer un fichier du projet de base, retourne-le avec une chaîne vide
+Format JSON uniquement : {{ "chemin/fichier.js": "code complet" }} """
+
+    return Task(
+        description=task_description,
+        expected_output="Un JSON contenant uniquement les fichiers ajoutés ou modifiés (clé = chemin, valeur = code, chaîne vide pour supprimer).",
+        agent=frontend_generator_agent
+    )
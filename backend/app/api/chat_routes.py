@@ -1,19 +1,41 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import ChatRequest , ChatResponse , ProjectHistoryResponse
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from fastapi.responses import JSONResponse
+from typing import Optional
+from app.models.schemas import ChatRequest , ChatResponse , ProjectHistoryResponse, ChatMessageEntry, ChatMessagesPage
 from app.services.chat_service import project_chat_service
+from app.services.worker_pool import PoolSaturatedError
+from app.services.project_store import VersionNotFoundError
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Taille maximale d'une page de /chat/{project_id}/messages
+MAX_MESSAGES_PAGE = 200
+
+def conflict_or(response: ChatResponse):
+    """Réponse 409 (avec la version actuelle) si le projet n'était plus à la version attendue"""
+    if response.error == "VERSION_CONFLICT":
+        return JSONResponse(status_code=409, content=response.model_dump(mode="json"))
+    return response
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Vrai si l'en-tête If-None-Match désigne déjà cette version (comparaison faible)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 @router.post("/chat/{project_id}", response_model=ChatResponse)
-async def chat_with_project(project_id: str, request: ChatRequest):
+async def chat_with_project(project_id: str, request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
     """
     Interface de chat pour modifier un projet existant
     
     Args:
         project_id: ID du projet à modifier
         request: Message utilisateur
+        idempotency_key: En-tête Idempotency-Key optionnel (sinon request.idempotency_key)
         
     Returns:
         ChatResponse: Réponse avec projet modifié
@@ -21,10 +43,19 @@ async def chat_with_project(project_id: str, request: ChatRequest):
     try:
         response = await project_chat_service.process_chat_message(
             project_id=project_id,
-            user_message=request.message
+            user_message=request.message,
+            idempotency_key=idempotency_key or request.idempotency_key,
+            delta=request.delta,
+            expected_version=request.expected_version
         )
-        return response
+        return conflict_or(response)
         
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de modifications en cours, veuillez réessayer plus tard",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Erreur dans le chat pour le projet {project_id}: {str(e)}")
         raise HTTPException(
@@ -33,31 +64,44 @@ async def chat_with_project(project_id: str, request: ChatRequest):
         )
 
 @router.get("/chat/{project_id}/history", response_model=ProjectHistoryResponse)
-async def get_chat_history(project_id: str):
+async def get_chat_history(project_id: str, response: Response, since_version: Optional[int] = None,
+                           if_none_match: Optional[str] = Header(None)):
     """
     Récupère l'historique des messages d'un projet
     
     Args:
         project_id: ID du projet
+        since_version: Version déjà connue du client : seuls les fichiers changés depuis sont renvoyés
+        if_none_match: ETag d'une réponse précédente (304 si rien n'a changé)
         
     Returns:
         ProjectHistoryResponse: Historique des messages
     """
     try:
-        chat_history = project_chat_service.get_chat_history(project_id)
-        current_project = project_chat_service.get_project(project_id)
-        
-        if current_project is None:
+        state = project_chat_service.project_etag(project_id)
+        if state is None:
             raise HTTPException(
                 status_code=404,
                 detail="Projet non trouvé"
             )
+        project_etag, version = state
+        chat_history = project_chat_service.get_chat_history(project_id)
+        # L'historique change aussi sans nouvelle version (réponses d'erreur)
+        etag = f'{project_etag[:-1]}-{len(chat_history)}"'
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         
+        project_delta = None
+        if since_version is not None:
+            project_delta = project_chat_service.get_project_delta(project_id, since_version, version)
         return ProjectHistoryResponse(
             success=True,
             project_id=project_id,
             chat_history=chat_history,
-            current_project=current_project
+            current_project=project_chat_service.get_project_version(project_id, version) if project_delta is None else None,
+            project_delta=project_delta,
+            project_version=version
         )
         
     except HTTPException:
@@ -69,6 +113,37 @@ async def get_chat_history(project_id: str):
             detail=f"Erreur interne: {str(e)}"
         )
 
+@router.get("/chat/{project_id}/messages", response_model=ChatMessagesPage, response_model_exclude_none=True)
+async def get_chat_messages(project_id: str, after: int = Query(0, ge=0), limit: int = Query(50, ge=1)):
+    """
+    Page de l'historique des messages d'un projet, sans les fichiers du projet
+    (à récupérer séparément via /projects/{project_id})
+    
+    Args:
+        project_id: ID du projet
+        after: Curseur du dernier message déjà reçu (0 pour commencer au premier)
+        limit: Nombre maximum de messages (ramené à MAX_MESSAGES_PAGE)
+        
+    Returns:
+        ChatMessagesPage: Messages, curseur suivant et présence d'autres messages
+    """
+    if project_chat_service.current_version(project_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Projet non trouvé"
+        )
+    messages, has_more = project_chat_service.get_messages(project_id, after, min(limit, MAX_MESSAGES_PAGE))
+    return ChatMessagesPage(
+        success=True,
+        project_id=project_id,
+        messages=[
+            ChatMessageEntry(id=message_id, role=message.role, content=message.content, timestamp=message.timestamp)
+            for message_id, message in messages
+        ],
+        next_cursor=messages[-1][0] if messages else None,
+        has_more=has_more
+    )
+
 @router.post("/projects/{project_id}/store")
 async def store_generated_project(project_id: str, project_data: dict):
     """
@@ -97,29 +172,48 @@ async def store_generated_project(project_id: str, project_data: dict):
         )
 
 @router.get("/projects/{project_id}")
-async def get_project(project_id: str):
+async def get_project(project_id: str, response: Response, since_version: Optional[int] = None,
+                      if_none_match: Optional[str] = Header(None)):
     """
     Récupère un projet par son ID
     
     Args:
         project_id: ID du projet
+        since_version: Version déjà connue du client : seuls les fichiers ajoutés,
+            modifiés et supprimés depuis sont renvoyés (project_delta)
+        if_none_match: ETag d'une réponse précédente (304 si le projet n'a pas changé)
         
     Returns:
-        dict: Données du projet
+        dict: Données du projet (ou delta) et version
     """
     try:
-        project_data = project_chat_service.get_project(project_id)
-        
-        if project_data is None:
+        state = project_chat_service.project_etag(project_id)
+        if state is None:
             raise HTTPException(
                 status_code=404,
                 detail="Projet non trouvé"
             )
+        etag, version = state
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
+        if since_version is not None:
+            project_delta = project_chat_service.get_project_delta(project_id, since_version, version)
+            # Version inconnue (projet restocké) : le projet entier est renvoyé
+            if project_delta is not None:
+                return {
+                    "success": True,
+                    "project_id": project_id,
+                    "version": version,
+                    "project_delta": project_delta
+                }
         
         return {
             "success": True,
             "project_id": project_id,
-            "project_data": project_data
+            "version": version,
+            "project_data": project_chat_service.get_project_version(project_id, version)
         }
         
     except HTTPException:
@@ -129,4 +223,81 @@ async def get_project(project_id: str):
         raise HTTPException(
             status_code=500,
             detail=f"Erreur interne: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/projects/{project_id}/versions")
+async def list_project_versions(project_id: str):
+    """
+    Liste les versions d'un projet
+    
+    Args:
+        project_id: ID du projet
+        
+    Returns:
+        dict: Version actuelle et liste des versions (numéro, date, nombre de fichiers)
+    """
+    versions = project_chat_service.list_versions(project_id)
+    if not versions:
+        raise HTTPException(
+            status_code=404,
+            detail="Projet non trouvé"
+        )
+    return {
+        "success": True,
+        "project_id": project_id,
+        "current_version": versions[-1].version,
+        "versions": [
+            {
+                "version": info.version,
+                "created_at": datetime.fromtimestamp(info.created_at).isoformat(),
+                "files": info.files
+            }
+            for info in versions
+        ]
+    }
+
+@router.get("/projects/{project_id}/versions/{version}")
+async def get_project_version(project_id: str, version: int):
+    """
+    Récupère une version antérieure d'un projet
+    
+    Args:
+        project_id: ID du projet
+        version: Numéro de version
+        
+    Returns:
+        dict: Fichiers du projet à cette version
+    """
+    project_data = project_chat_service.get_project_version(project_id, version)
+    if project_data is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Version non trouvée"
+        )
+    return {
+        "success": True,
+        "project_id": project_id,
+        "version": version,
+        "project_data": project_data
+    }
+
+@router.post("/projects/{project_id}/versions/{version}/revert", response_model=ChatResponse)
+async def revert_project(project_id: str, version: int, expected_version: Optional[int] = None):
+    """
+    Restaure une version antérieure d'un projet, sans appel au LLM
+    
+    Args:
+        project_id: ID du projet
+        version: Numéro de la version à restaurer
+        expected_version: Version actuelle supposée par le client (409 sinon)
+        
+    Returns:
+        ChatResponse: Projet restauré et sa nouvelle version
+    """
+    try:
+        return conflict_or(project_chat_service.revert_project(project_id, version, expected_version))
+    except VersionNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Version non trouvée"
+        )
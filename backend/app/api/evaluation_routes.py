@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import EvaluationRequest, EvaluationResponse
+from app.models.schemas import EvaluationRequest, EvaluationResponse, EvaluationJobResponse
 from app.evaluation.simple_evaluator import SimpleFrontendEvaluator, SIMPLE_TEST_CASES
+from app.services.evaluation_jobs import evaluation_jobs
+from app.services.token_accounting import usage_tags
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,7 +14,7 @@ async def evaluate_frontend_generator(request: EvaluationRequest):
     Evaluate the frontend generator agent using MLflow and LLM as judge
     """
     try:
-        evaluator = SimpleFrontendEvaluator()
+        evaluator = SimpleFrontendEvaluator(use_cache=request.use_cache, use_judge_cache=request.use_judge_cache)
         
         # Use provided test cases or default ones
         test_cases = request.test_cases if request.test_cases else SIMPLE_TEST_CASES
@@ -26,7 +28,12 @@ async def evaluate_frontend_generator(request: EvaluationRequest):
             logger.info(f"Test case {i}: {tc}")
         
         # Run evaluation
-        results = evaluator.evaluate_agent(test_cases)
+        with usage_tags(endpoint="evaluate"):
+            results = evaluator.evaluate_agent(
+                test_cases,
+                concurrency=request.concurrency,
+                judge_batch_tokens=request.judge_batch_tokens
+            )
         
         return EvaluationResponse(
             success=True,
@@ -91,4 +98,15 @@ async def get_default_test_cases():
         "success": True,
         "test_cases": SIMPLE_TEST_CASES,
         "count": len(SIMPLE_TEST_CASES)
-    }
\ No newline at end of file
+    }
+
+@router.get("/jobs/{job_id}", response_model=EvaluationJobResponse)
+async def get_evaluation_job(job_id: str):
+    """
+    Get the status and, once completed, the scores of a background project evaluation
+    """
+    job = evaluation_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Evaluation job not found")
+    
+    return EvaluationJobResponse(success=job["status"] != "failed", **job)
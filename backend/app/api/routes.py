@@ -1,6 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header
+from typing import Optional
+from fastapi.responses import StreamingResponse
 from app.models.schemas import ProjectRequest, ProjectResponse
-from app.services.generator import generate_react_project
+from app.services.generator import generate_react_project, start_react_project_stream
+from app.services.metrics import metrics
+from app.services.generation_cache import generation_cache
+from app.services.judge_cache import judge_cache
+from app.services.worker_pool import llm_pool, PoolSaturatedError
+from app.core.llm_clients import providers_stats
+from app.core.RouterLLM import routers_stats
+from app.services.token_accounting import token_accounting
+from app.services.chat_service import project_chat_service
 
 router = APIRouter()
 
@@ -10,8 +20,49 @@ async def root():
 
 @router.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": "React Project Generator"}
+    return {"status": "healthy", "service": "React Project Generator", "llm_pool": llm_pool.stats(),
+            "llm_providers": providers_stats(), "llm_routers": routers_stats(),
+            "project_store": project_chat_service.store.stats()}
 
 @router.post("/generate-project", response_model=ProjectResponse)
-async def generate_project(request: ProjectRequest):
-    return await generate_react_project(request)
+async def generate_project(request: ProjectRequest, idempotency_key: Optional[str] = Header(None)):
+    try:
+        return await generate_react_project(request, idempotency_key)
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de générations en cours, veuillez réessayer plus tard",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@router.post("/generate-project/stream")
+async def generate_project_stream(request: ProjectRequest):
+    """
+    Streamed variant of /generate-project (Server-Sent Events): each file is
+    sent as soon as the LLM has finished writing it
+    """
+    try:
+        events = start_react_project_stream(request)
+    except PoolSaturatedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de générations en cours, veuillez réessayer plus tard",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    snapshot["generation_cache"] = generation_cache.stats()
+    snapshot["judge_cache"] = judge_cache.stats()
+    return snapshot
+
+@router.get("/metrics/tokens")
+async def get_token_metrics():
+    """Token usage totals, per endpoint (with rates) and per model"""
+    return token_accounting.snapshot()
@@ -1,4 +1,142 @@
+import os
 import logging
 
 def configure_logging():
     logging.basicConfig(level=logging.INFO)
+
+# Worker pool running the blocking LLM work (crew.kickoff) off the event loop
+# LLM_POOL_MAX_WORKERS - number of concurrent LLM jobs
+# LLM_POOL_MAX_QUEUE - jobs allowed to wait for a free worker before returning 429
+# LLM_POOL_RETRY_AFTER - Retry-After value (seconds) sent with the 429
+LLM_POOL_MAX_WORKERS = int(os.getenv("LLM_POOL_MAX_WORKERS", "4"))
+LLM_POOL_MAX_QUEUE = int(os.getenv("LLM_POOL_MAX_QUEUE", "16"))
+LLM_POOL_RETRY_AFTER = int(os.getenv("LLM_POOL_RETRY_AFTER", "30"))
+
+# Background evaluation of generated projects
+# EVALUATION_MAX_WORKERS - concurrent LLM-judge evaluations
+# EVALUATION_MAX_JOBS - finished jobs kept in memory for the status endpoint
+EVALUATION_MAX_WORKERS = int(os.getenv("EVALUATION_MAX_WORKERS", "2"))
+EVALUATION_MAX_JOBS = int(os.getenv("EVALUATION_MAX_JOBS", "1000"))
+
+# Evaluation suite (/evaluate): test cases run concurrently
+# EVALUATION_CONCURRENCY - test cases generated and judged at the same time
+# EVALUATION_CASE_TIMEOUT - seconds a test case may run before it is recorded as failed (0 = no limit)
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY", "4"))
+EVALUATION_CASE_TIMEOUT = float(os.getenv("EVALUATION_CASE_TIMEOUT", "600"))
+
+# Cache of generated projects keyed by the normalized request
+# GENERATION_CACHE_MAX_BYTES - memory tier budget (bytes of file contents)
+# GENERATION_CACHE_DIR - disk tier directory (empty to disable the disk tier)
+GENERATION_CACHE_MAX_BYTES = int(os.getenv("GENERATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GENERATION_CACHE_DIR = os.getenv("GENERATION_CACHE_DIR", "cache/generations")
+
+# Cache of LLM-judge evaluations keyed by test case, project files, judge model and prompt
+# JUDGE_CACHE_ENABLED - reuse cached evaluations (false to always call the judge)
+# JUDGE_CACHE_MAX_ENTRIES - evaluations kept in memory
+# JUDGE_CACHE_DIR - disk tier directory (empty to disable the disk tier)
+JUDGE_CACHE_ENABLED = os.getenv("JUDGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+JUDGE_CACHE_MAX_ENTRIES = int(os.getenv("JUDGE_CACHE_MAX_ENTRIES", "5000"))
+JUDGE_CACHE_DIR = os.getenv("JUDGE_CACHE_DIR", "cache/judgements")
+
+# Batched judging in /evaluate: several projects scored per judge call
+# JUDGE_BATCH_TOKEN_BUDGET - estimated prompt tokens per batch call (0 = one call per project)
+# JUDGE_BATCH_MAX_PROJECTS - projects per batch call
+JUDGE_BATCH_TOKEN_BUDGET = int(os.getenv("JUDGE_BATCH_TOKEN_BUDGET", "0"))
+JUDGE_BATCH_MAX_PROJECTS = int(os.getenv("JUDGE_BATCH_MAX_PROJECTS", "8"))
+
+# Project content shown to the LLM judge
+# JUDGE_CONTEXT_TOKENS - estimated tokens per project: App.js, index.js and the most imported
+# files are shown whole first, the others as skeletons (signatures, JSX structure, style keys)
+JUDGE_CONTEXT_TOKENS = int(os.getenv("JUDGE_CONTEXT_TOKENS", "4000"))
+
+# Warm-start generation from a similar, well-scored past project
+# WARM_START_THRESHOLD - minimum estimated similarity (0-1) between requests. Rewordings of the
+#   same application score 0.5 and above ("todo list app" / "todo app with delete"), different
+#   applications sharing a word stay below 0.4 ("expense tracker" / "budget tracker": 0.35);
+#   the 128-permutation estimate is within +/-0.09 of the true similarity 95% of the time
+# WARM_START_MIN_SCORE - minimum weighted evaluation score for a project to be reused
+# SIMILARITY_INDEX_MAX_ENTRIES - past projects kept in the similarity index
+WARM_START_THRESHOLD = float(os.getenv("WARM_START_THRESHOLD", "0.4"))
+WARM_START_MIN_SCORE = float(os.getenv("WARM_START_MIN_SCORE", "7"))
+SIMILARITY_INDEX_MAX_ENTRIES = int(os.getenv("SIMILARITY_INDEX_MAX_ENTRIES", "500"))
+
+# Results of requests sent with an idempotency key, replayed to retries
+# IDEMPOTENCY_TTL_SECONDS - how long a finished result is kept
+# IDEMPOTENCY_MAX_RESULTS - maximum number of kept results
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_MAX_RESULTS = int(os.getenv("IDEMPOTENCY_MAX_RESULTS", "500"))
+
+# Shared HTTP clients of the LLM providers (app/core/llm_clients.py)
+# LLM_HTTP_MAX_CONNECTIONS - connections per provider pool
+# LLM_HTTP_MAX_KEEPALIVE - idle connections kept open for reuse
+# LLM_HTTP_KEEPALIVE_EXPIRY - seconds an idle connection is kept
+# LLM_HTTP_TIMEOUT - seconds before a request to the provider is abandoned
+# LLM_MAX_CONCURRENCY - concurrent requests per provider (LLM_MAX_CONCURRENCY_<PROVIDER> overrides it)
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "32"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "16"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP_TIMEOUT = float(os.getenv("LLM_HTTP_TIMEOUT", "600"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# LLM_PROMPT_CACHE_PROVIDERS - comma-separated providers whose proxy accepts cache_control markers (Anthropic-style prompt caching)
+LLM_PROMPT_CACHE_PROVIDERS = [p.strip() for p in os.getenv("LLM_PROMPT_CACHE_PROVIDERS", "claude").split(",") if p.strip()]
+
+# Routing of agent requests across the LLM providers (app/core/RouterLLM.py)
+# LLM_ROUTER_PROVIDERS - comma-separated providers, in order of preference (claude, openai, azure_github)
+# LLM_ROUTER_WINDOW - latest requests per provider used for latency and error rate
+# LLM_ROUTER_COOLDOWN - seconds a provider is avoided after LLM_ROUTER_MAX_FAILURES consecutive failures
+# LLM_ROUTER_PROBE_AFTER - seconds after which an unused provider is tried again
+# LLM_ROUTER_HEDGE_CHAT - send a hedged duplicate of slow chat modification requests
+# LLM_ROUTER_HEDGE_PERCENTILE - latency percentile after which the duplicate is sent
+# LLM_ROUTER_HEDGE_MIN_DELAY / LLM_ROUTER_HEDGE_DEFAULT_DELAY - delay bounds (seconds), the default is used until LLM_ROUTER_MIN_SAMPLES latencies are known
+LLM_ROUTER_PROVIDERS = [p.strip() for p in os.getenv("LLM_ROUTER_PROVIDERS", "claude").split(",") if p.strip()]
+LLM_ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+LLM_ROUTER_COOLDOWN = float(os.getenv("LLM_ROUTER_COOLDOWN", "30"))
+LLM_ROUTER_MAX_FAILURES = int(os.getenv("LLM_ROUTER_MAX_FAILURES", "3"))
+LLM_ROUTER_PROBE_AFTER = float(os.getenv("LLM_ROUTER_PROBE_AFTER", "300"))
+LLM_ROUTER_HEDGE_CHAT = os.getenv("LLM_ROUTER_HEDGE_CHAT", "false").lower() in ("1", "true", "yes")
+LLM_ROUTER_HEDGE_PERCENTILE = float(os.getenv("LLM_ROUTER_HEDGE_PERCENTILE", "95"))
+LLM_ROUTER_HEDGE_MIN_DELAY = float(os.getenv("LLM_ROUTER_HEDGE_MIN_DELAY", "2"))
+LLM_ROUTER_HEDGE_DEFAULT_DELAY = float(os.getenv("LLM_ROUTER_HEDGE_DEFAULT_DELAY", "30"))
+LLM_ROUTER_MIN_SAMPLES = int(os.getenv("LLM_ROUTER_MIN_SAMPLES", "5"))
+
+# Token accounting of the LLM calls (app/services/token_accounting.py)
+# TOKEN_USAGE_SINK - jsonl, sqlite, or empty to keep the totals in memory only
+# TOKEN_USAGE_PATH - sink file (default token_usage.jsonl / token_usage.db)
+# TOKEN_USAGE_BATCH_SIZE - records buffered before an early flush
+# TOKEN_USAGE_FLUSH_INTERVAL - seconds between two flushes
+# TOKEN_USAGE_RATE_WINDOW - seconds covered by the per-endpoint rates
+TOKEN_USAGE_SINK = os.getenv("TOKEN_USAGE_SINK", "jsonl").lower()
+TOKEN_USAGE_PATH = os.getenv("TOKEN_USAGE_PATH", "")
+TOKEN_USAGE_BATCH_SIZE = int(os.getenv("TOKEN_USAGE_BATCH_SIZE", "100"))
+TOKEN_USAGE_FLUSH_INTERVAL = float(os.getenv("TOKEN_USAGE_FLUSH_INTERVAL", "5"))
+TOKEN_USAGE_RATE_WINDOW = float(os.getenv("TOKEN_USAGE_RATE_WINDOW", "300"))
+
+# Chat modifications
+# CHAT_PATCH_MODE - the agent returns only the changes (search/replace blocks) instead of the whole project
+CHAT_PATCH_MODE = os.getenv("CHAT_PATCH_MODE", "true").lower() in ("1", "true", "yes")
+# CHAT_CONTEXT_FILTER - in patch mode, send only the files relevant to the message (others as a manifest)
+# CHAT_CONTEXT_MAX_FILES - files matched by the message, before adding their importers and importees
+# CHAT_CONTEXT_MIN_FILES - smaller projects are always sent whole
+CHAT_CONTEXT_FILTER = os.getenv("CHAT_CONTEXT_FILTER", "true").lower() in ("1", "true", "yes")
+CHAT_CONTEXT_MAX_FILES = int(os.getenv("CHAT_CONTEXT_MAX_FILES", "8"))
+CHAT_CONTEXT_MIN_FILES = int(os.getenv("CHAT_CONTEXT_MIN_FILES", "5"))
+# CHAT_DEBOUNCE_SECONDS - messages sent to the same project within this window are applied in one modification (0 to disable)
+CHAT_DEBOUNCE_SECONDS = float(os.getenv("CHAT_DEBOUNCE_SECONDS", "0"))
+
+# Project and chat history store (app/services/project_store.py)
+# PROJECT_STORE - sqlite (shared by the uvicorn workers, survives restarts) or memory
+# PROJECT_STORE_PATH - SQLite database file
+# PROJECT_STORE_BATCH_SIZE - chat messages buffered before an early write
+# PROJECT_STORE_FLUSH_INTERVAL - seconds before buffered chat messages are written
+# PROJECT_STORE_TTL - seconds after which an idle project is deleted (0 to keep projects forever)
+# PROJECT_STORE_MAX_BYTES - memory budget of either store. memory: resident bytes before least recently
+#   used projects are frozen (0 for no limit). sqlite (the default): size of the hot cache of file
+#   contents read from the database, the data itself stays on disk (0 disables the cache)
+# PROJECT_STORE_SPILL_DIR - memory store: directory frozen projects are written to (empty to compress them in memory)
+PROJECT_STORE = os.getenv("PROJECT_STORE", "sqlite").lower()
+PROJECT_STORE_PATH = os.getenv("PROJECT_STORE_PATH", "data/projects.db")
+PROJECT_STORE_BATCH_SIZE = int(os.getenv("PROJECT_STORE_BATCH_SIZE", "50"))
+PROJECT_STORE_FLUSH_INTERVAL = float(os.getenv("PROJECT_STORE_FLUSH_INTERVAL", "0.5"))
+PROJECT_STORE_TTL = float(os.getenv("PROJECT_STORE_TTL", "0"))
+PROJECT_STORE_MAX_BYTES = int(os.getenv("PROJECT_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+PROJECT_STORE_SPILL_DIR = os.getenv("PROJECT_STORE_SPILL_DIR", "")
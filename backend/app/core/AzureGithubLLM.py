@@ -1,41 +1,91 @@
 import os
+import time
 from dotenv import load_dotenv
-from azure.ai.inference import ChatCompletionsClient
 from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
 from crewai.llm import LLM
-from typing import List, Dict
+from typing import List, Dict, Iterator, AsyncIterator
+from app.core.llm_clients import get_provider
+from app.core.prompt_caching import apply_cache_breakpoints
+from app.services.token_accounting import token_accounting
 
 load_dotenv()
-token = os.getenv("GITHUB_TOKEN")
-endpoint = "https://models.github.ai/inference"
 #model_name = "openai/gpt-4.1"
 model_name ="openai/gpt-4.1-nano"
 
 
 class AzureGitHubLLM(LLM):
     def __init__(self):
-        self.client = ChatCompletionsClient(
-            endpoint=endpoint,
-            credential=AzureKeyCredential(token)
-        )
+        # Shared clients and concurrency slots, see app/core/llm_clients.py
+        self.provider = get_provider("azure_github")
         self.model = model_name
         self.model_name = model_name  # Required by CrewAI
 
-    def call(self, messages: List[Dict], **kwargs) -> str:
+    @property
+    def client(self):
+        return self.provider.client
+
+    def _request(self, messages: List[Dict], **kwargs) -> Dict:
         azure_messages = [
             SystemMessage(content=msg["content"]) if msg["role"] == "system"
-            else UserMessage(content=msg["content"]) for msg in messages
+            else UserMessage(content=msg["content"]) for msg in apply_cache_breakpoints(messages, False)
         ]
-        response = self.client.complete(
-            messages=azure_messages,
-            temperature=kwargs.get("temperature", 0.7),
-            top_p=kwargs.get("top_p", 1.0),
-            max_tokens=kwargs.get("max_tokens", 30000),
-            model=self.model
-        )
+        return {
+            "messages": azure_messages,
+            "temperature": kwargs.get("temperature", 0.7),
+            "top_p": kwargs.get("top_p", 1.0),
+            "max_tokens": kwargs.get("max_tokens", 30000),
+            "model": self.model,
+        }
+
+    def call(self, messages: List[Dict], **kwargs) -> str:
+        started = time.perf_counter()
+        with self.provider.limiter:
+            response = self.client.complete(**self._request(messages, **kwargs))
+        self._record_usage(getattr(response, "usage", None), started)
         return response.choices[0].message.content
 
+    async def acall(self, messages: List[Dict], **kwargs) -> str:
+        started = time.perf_counter()
+        async with self.provider.limiter:
+            response = await self.provider.async_client.complete(**self._request(messages, **kwargs))
+        self._record_usage(getattr(response, "usage", None), started)
+        return response.choices[0].message.content
+
+    def stream(self, messages: List[Dict], **kwargs) -> Iterator[str]:
+        """Same request as call() but yields the completion text as it is produced"""
+        usage = None
+        started = time.perf_counter()
+        with self.provider.limiter:
+            response = self.client.complete(**self._request(messages, **kwargs), stream=True)
+            try:
+                for update in response:
+                    if getattr(update, "usage", None):
+                        usage = update.usage
+                    if update.choices and update.choices[0].delta.content:
+                        yield update.choices[0].delta.content
+            finally:
+                response.close()
+                self._record_usage(usage, started)
+
+    async def astream(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        """Asynchronous stream()"""
+        usage = None
+        started = time.perf_counter()
+        async with self.provider.limiter:
+            response = await self.provider.async_client.complete(**self._request(messages, **kwargs), stream=True)
+            try:
+                async for update in response:
+                    if getattr(update, "usage", None):
+                        usage = update.usage
+                    if update.choices and update.choices[0].delta.content:
+                        yield update.choices[0].delta.content
+            finally:
+                await response.close()
+                self._record_usage(usage, started)
+
+    def _record_usage(self, usage, started: float) -> None:
+        token_accounting.record(self.provider.name, self.model_name, usage, time.perf_counter() - started)
+
     @property
     def _llm_type(self) -> str:
         return "azure_github_models"
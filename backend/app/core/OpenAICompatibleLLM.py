@@ -0,0 +1,101 @@
+import time
+from crewai.llm import LLM
+from typing import List, Dict, Iterator, AsyncIterator, Optional
+from app.core.llm_clients import ProviderClients, get_provider
+from app.core.prompt_caching import apply_cache_breakpoints
+from app.config.settings import LLM_PROMPT_CACHE_PROVIDERS
+from app.services.token_accounting import token_accounting
+
+class OpenAICompatibleLLM(LLM):
+    """
+    LLM reached through an OpenAI-compatible proxy.
+
+    Clients come from the shared provider pool (app/core/llm_clients.py) and
+    every request holds one of the provider's concurrency slots. call() and
+    stream() block, acall() and astream() run on the event loop without a thread.
+    Prompt cache breakpoints become cache_control markers for the providers
+    listed in LLM_PROMPT_CACHE_PROVIDERS.
+    """
+    provider_name = "openai"
+    default_model_name = "openai/gpt-4o"
+    default_max_tokens = 16000
+
+    def __init__(self, provider: Optional[ProviderClients] = None, model_name: Optional[str] = None):
+        self.provider = provider or get_provider(self.provider_name)
+        self.model_name = model_name or self.default_model_name
+        self.model = self.model_name
+        self.prompt_caching = self.provider.name in LLM_PROMPT_CACHE_PROVIDERS
+
+    @property
+    def client(self):
+        return self.provider.client
+
+    def _request(self, messages: List[Dict], **kwargs) -> Dict:
+        return {
+            "model": self.model_name,
+            "messages": apply_cache_breakpoints(messages, self.prompt_caching),
+            "temperature": kwargs.get("temperature", 0.7),
+            "top_p": kwargs.get("top_p", 1.0),
+            "max_tokens": kwargs.get("max_tokens", self.default_max_tokens),
+        }
+
+    def call(self, messages: List[Dict], **kwargs) -> str:
+        started = time.perf_counter()
+        with self.provider.limiter:
+            response = self.client.chat.completions.create(**self._request(messages, **kwargs))
+        self._record_usage(getattr(response, "usage", None), started)
+        return response.choices[0].message.content
+
+    async def acall(self, messages: List[Dict], **kwargs) -> str:
+        started = time.perf_counter()
+        async with self.provider.limiter:
+            response = await self.provider.async_client.chat.completions.create(**self._request(messages, **kwargs))
+        self._record_usage(getattr(response, "usage", None), started)
+        return response.choices[0].message.content
+
+    def stream(self, messages: List[Dict], **kwargs) -> Iterator[str]:
+        """Same request as call() but yields the completion text as it is produced"""
+        usage = None
+        started = time.perf_counter()
+        with self.provider.limiter:
+            response = self.client.chat.completions.create(
+                **self._request(messages, **kwargs),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            try:
+                for chunk in response:
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                response.close()
+                self._record_usage(usage, started)
+
+    async def astream(self, messages: List[Dict], **kwargs) -> AsyncIterator[str]:
+        """Asynchronous stream()"""
+        usage = None
+        started = time.perf_counter()
+        async with self.provider.limiter:
+            response = await self.provider.async_client.chat.completions.create(
+                **self._request(messages, **kwargs),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            try:
+                async for chunk in response:
+                    if getattr(chunk, "usage", None):
+                        usage = chunk.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                await response.close()
+                self._record_usage(usage, started)
+
+    def _record_usage(self, usage, started: float) -> None:
+        token_accounting.record(self.provider.name, self.model_name, usage, time.perf_counter() - started)
+
+    @property
+    def _llm_type(self) -> str:
+        return "claude_openai_compatible"
@@ -0,0 +1,389 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+from crewai.llm import LLM
+from app.config.settings import (
+    LLM_POOL_MAX_WORKERS,
+    LLM_ROUTER_PROVIDERS,
+    LLM_ROUTER_WINDOW,
+    LLM_ROUTER_COOLDOWN,
+    LLM_ROUTER_MAX_FAILURES,
+    LLM_ROUTER_PROBE_AFTER,
+    LLM_ROUTER_HEDGE_PERCENTILE,
+    LLM_ROUTER_HEDGE_MIN_DELAY,
+    LLM_ROUTER_HEDGE_DEFAULT_DELAY,
+    LLM_ROUTER_MIN_SAMPLES,
+)
+from app.services.metrics import metrics, percentile
+
+logger = logging.getLogger(__name__)
+
+# Runs the attempts of hedged synchronous calls (the losing attempt cannot be
+# interrupted and finishes in the background)
+_hedge_executor = ThreadPoolExecutor(
+    max_workers=2 * LLM_POOL_MAX_WORKERS, thread_name_prefix="llm-hedge"
+)
+
+
+class ProviderHealth:
+    """
+    Rolling latency and error rate of one backend.
+
+    After max_failures consecutive failures the backend cools down and is
+    ranked last; a backend unused for probe_after seconds is probed again so
+    that a recovered provider gets a chance.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = LLM_ROUTER_WINDOW,
+        cooldown: float = LLM_ROUTER_COOLDOWN,
+        max_failures: int = LLM_ROUTER_MAX_FAILURES,
+        probe_after: float = LLM_ROUTER_PROBE_AFTER,
+    ):
+        self.name = name
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.probe_after = probe_after
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=window)
+        self._outcomes: deque = deque(maxlen=window)
+        self._consecutive_failures = 0
+        self._cooldown_until = 0.0
+        self._last_used = 0.0
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            self._last_used = time.monotonic()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            self._last_used = time.monotonic()
+            if self._consecutive_failures >= self.max_failures:
+                self._cooldown_until = self._last_used + self.cooldown
+
+    def cooling_down(self, now: float) -> bool:
+        return now < self._cooldown_until
+
+    def score(self, now: float) -> float:
+        """Expected seconds per successful request, 0 for a backend to (re)probe"""
+        with self._lock:
+            if not self._outcomes or now - self._last_used > self.probe_after:
+                return 0.0
+            if not self._latencies:
+                return float("inf")
+            return percentile(self._latencies, 0.5) / max(0.05, 1 - self._error_rate())
+
+    def latency(self, q: float) -> Optional[float]:
+        with self._lock:
+            return percentile(self._latencies, q) if self._latencies else None
+
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def _error_rate(self) -> float:
+        return (
+            self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "provider": self.name,
+                "requests": len(self._outcomes),
+                "error_rate": self._error_rate(),
+                "p50": percentile(self._latencies, 0.5) if self._latencies else None,
+                "p95": percentile(self._latencies, 0.95) if self._latencies else None,
+                "cooling_down": now < self._cooldown_until,
+            }
+
+
+class RouterLLM(LLM):
+    """
+    LLM that sends each request to the healthiest of several backends.
+
+    Backends are ranked by median latency inflated by their error rate; a
+    failing request falls over to the next backend. With hedge=True a
+    duplicate is sent to the next backend (or the same one when there is
+    only one) once the primary has been running longer than its usual
+    latency percentile, and the first success wins.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[LLM],
+        name: str = "default",
+        hedge: bool = False,
+        hedge_percentile: float = LLM_ROUTER_HEDGE_PERCENTILE,
+        hedge_min_delay: float = LLM_ROUTER_HEDGE_MIN_DELAY,
+        hedge_default_delay: float = LLM_ROUTER_HEDGE_DEFAULT_DELAY,
+        min_samples: int = LLM_ROUTER_MIN_SAMPLES,
+        **health_options: Any,
+    ):
+        if not backends:
+            raise ValueError("RouterLLM needs at least one backend")
+        self.backends = list(backends)
+        self.name = name
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+        self.health = [
+            ProviderHealth(_backend_name(backend), **health_options)
+            for backend in self.backends
+        ]
+        model_names = list(
+            dict.fromkeys(backend.model_name for backend in self.backends)
+        )
+        self.model_name = "+".join(model_names)  # Required by CrewAI
+        self.model = self.model_name
+        routers[name] = self
+
+    @classmethod
+    def from_providers(
+        cls, providers: Sequence[str] = LLM_ROUTER_PROVIDERS, **options: Any
+    ) -> "RouterLLM":
+        from app.core.ClaudeLLM import ClaudeLLM
+        from app.core.OpenaiLLM import OpenaiLLM
+        from app.core.AzureGithubLLM import AzureGitHubLLM
+
+        classes = {
+            "claude": ClaudeLLM,
+            "openai": OpenaiLLM,
+            "azure_github": AzureGitHubLLM,
+        }
+        unknown = [p for p in providers if p not in classes]
+        if unknown:
+            raise ValueError(f"Unknown LLM providers: {unknown}")
+        return cls([classes[p]() for p in providers], **options)
+
+    def ranked(self) -> List[int]:
+        """Backend indexes, healthiest first"""
+        now = time.monotonic()
+        scores = [
+            (health.cooling_down(now), health.score(now)) for health in self.health
+        ]
+        return sorted(range(len(self.backends)), key=lambda i: scores[i])
+
+    def hedge_delay(self, index: int) -> float:
+        health = self.health[index]
+        latency = health.latency(self.hedge_percentile / 100)
+        if health.samples() < self.min_samples or latency is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, latency)
+
+    def call(self, messages: List[Dict], **kwargs: Any) -> str:
+        order = self.ranked()
+        if self.hedge:
+            return self._hedged_call(order, messages, kwargs)
+        last_error: Optional[BaseException] = None
+        for index in order:
+            try:
+                return self._attempt(index, messages, kwargs)
+            except Exception as e:
+                last_error = e
+        assert last_error is not None  # At least one backend was tried
+        raise last_error
+
+    async def acall(self, messages: List[Dict], **kwargs: Any) -> str:
+        order = self.ranked()
+        if self.hedge:
+            return await self._hedged_acall(order, messages, kwargs)
+        last_error: Optional[BaseException] = None
+        for index in order:
+            try:
+                return await self._aattempt(index, messages, kwargs)
+            except Exception as e:
+                last_error = e
+        assert last_error is not None  # At least one backend was tried
+        raise last_error
+
+    def stream(self, messages: List[Dict], **kwargs: Any) -> Iterator[str]:
+        """Streams from the healthiest backend, falling over only before the first chunk"""
+        last_error: Optional[BaseException] = None
+        for index in self.ranked():
+            started = time.perf_counter()
+            produced = False
+            try:
+                for chunk in self.backends[index].stream(messages, **kwargs):
+                    produced = True
+                    yield chunk
+            except Exception as e:
+                self._record_failure(index, e)
+                if produced:
+                    raise
+                last_error = e
+                continue
+            self._record_success(index, time.perf_counter() - started)
+            return
+        assert last_error is not None  # At least one backend was tried
+        raise last_error
+
+    async def astream(self, messages: List[Dict], **kwargs: Any) -> AsyncIterator[str]:
+        """Asynchronous stream()"""
+        last_error: Optional[BaseException] = None
+        for index in self.ranked():
+            started = time.perf_counter()
+            produced = False
+            try:
+                async for chunk in self.backends[index].astream(messages, **kwargs):
+                    produced = True
+                    yield chunk
+            except Exception as e:
+                self._record_failure(index, e)
+                if produced:
+                    raise
+                last_error = e
+                continue
+            self._record_success(index, time.perf_counter() - started)
+            return
+        assert last_error is not None  # At least one backend was tried
+        raise last_error
+
+    def _attempt(self, index: int, messages: List[Dict], kwargs: Dict) -> str:
+        started = time.perf_counter()
+        try:
+            result: str = self.backends[index].call(messages, **kwargs)
+        except Exception as e:
+            self._record_failure(index, e)
+            raise
+        self._record_success(index, time.perf_counter() - started)
+        return result
+
+    async def _aattempt(self, index: int, messages: List[Dict], kwargs: Dict) -> str:
+        started = time.perf_counter()
+        try:
+            result: str = await self.backends[index].acall(messages, **kwargs)
+        except Exception as e:
+            self._record_failure(index, e)
+            raise
+        self._record_success(index, time.perf_counter() - started)
+        return result
+
+    def _hedged_call(self, order: List[int], messages: List[Dict], kwargs: Dict) -> str:
+        candidates = deque(order)
+        attempts: Dict[Any, int] = {}
+
+        def launch(index: int) -> "Future[str]":
+            # Keep the caller's token accounting tags
+            future = _hedge_executor.submit(
+                contextvars.copy_context().run, self._attempt, index, messages, kwargs
+            )
+            attempts[future] = index
+            return future
+
+        primary = launch(candidates.popleft())
+        deadline = time.monotonic() + self.hedge_delay(order[0])
+        hedged = False
+        pending = {primary}
+        last_error: Optional[BaseException] = None
+        while pending:
+            timeout = None if hedged else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if future is not primary:
+                    metrics.inc(f"llm_router_{self.name}_hedge_wins")
+                return result
+            if not done and not hedged:
+                hedged = True
+                pending.add(launch(self._hedge_target(order, candidates)))
+            elif not pending and candidates:
+                # Every attempt failed: fall over to the next backend
+                pending.add(launch(candidates.popleft()))
+        assert last_error is not None  # At least one backend was tried
+        raise last_error
+
+    async def _hedged_acall(
+        self, order: List[int], messages: List[Dict], kwargs: Dict
+    ) -> str:
+        candidates = deque(order)
+
+        def launch(index: int) -> "asyncio.Task[str]":
+            return asyncio.ensure_future(self._aattempt(index, messages, kwargs))
+
+        primary = launch(candidates.popleft())
+        deadline = time.monotonic() + self.hedge_delay(order[0])
+        hedged = False
+        pending = {primary}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                timeout = None if hedged else max(0.0, deadline - time.monotonic())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    if task is not primary:
+                        metrics.inc(f"llm_router_{self.name}_hedge_wins")
+                    return task.result()
+                if not done and not hedged:
+                    hedged = True
+                    pending.add(launch(self._hedge_target(order, candidates)))
+                elif not pending and candidates:
+                    pending.add(launch(candidates.popleft()))
+            assert last_error is not None  # At least one backend was tried
+            raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_target(self, order: List[int], candidates: deque) -> int:
+        metrics.inc(f"llm_router_{self.name}_hedges")
+        index = candidates.popleft() if candidates else order[0]
+        logger.info(
+            f"Slow {self.health[order[0]].name} request, hedging on {self.health[index].name}"
+        )
+        return index
+
+    def _record_success(self, index: int, latency: float) -> None:
+        self.health[index].record_success(latency)
+        metrics.observe(
+            f"llm_router_{self.name}_{self.health[index].name}_seconds", latency
+        )
+
+    def _record_failure(self, index: int, error: Exception) -> None:
+        self.health[index].record_failure()
+        metrics.inc(f"llm_router_{self.name}_{self.health[index].name}_errors")
+        logger.warning(f"LLM request to {self.health[index].name} failed: {error}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [health.stats() for health in self.health]
+
+    @property
+    def _llm_type(self) -> str:
+        return "latency_router"
+
+
+def _backend_name(backend: LLM) -> str:
+    provider = getattr(backend, "provider", None)
+    return getattr(provider, "name", None) or type(backend).__name__
+
+
+# Routers created by the agents, reported by /health
+routers: Dict[str, RouterLLM] = {}
+
+
+def routers_stats() -> Dict[str, List[Dict[str, Any]]]:
+    return {name: router.stats() for name, router in routers.items()}
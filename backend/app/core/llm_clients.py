@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+import httpx
+import openai
+from dotenv import load_dotenv
+from app.config.settings import (
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE,
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_HTTP_TIMEOUT,
+    LLM_MAX_CONCURRENCY,
+)
+from app.services.metrics import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """
+    Counting semaphore usable from threads (acquire) and coroutines (aacquire).
+
+    Both paths share the same slots, so a provider limit holds whether the
+    request comes from a CrewAI worker thread or from the event loop. Waiters
+    are served in arrival order; a released slot is handed over directly.
+    """
+
+    def __init__(self, limit: int, name: str = "llm"):
+        self.limit = max(1, limit)
+        self.name = name
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: Deque[Tuple[Optional[asyncio.AbstractEventLoop], Any]] = deque()
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._take()
+                return
+            event = threading.Event()
+            self._waiters.append((None, event))
+        event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._take()
+                return
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed over: give it back (or let _wake do it)
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                metrics.set_gauge(f"llm_{self.name}_active_requests", self._active)
+                return
+            loop, waiter = self._waiters.popleft()
+        # Hand the slot over: _active is unchanged
+        if loop is None:
+            waiter.set()
+            return
+        try:
+            loop.call_soon_threadsafe(self._wake, waiter)
+        except RuntimeError:
+            # Waiter's event loop is closed
+            self.release()
+
+    def _wake(self, future: "asyncio.Future[None]") -> None:
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def _take(self) -> None:
+        self._active += 1
+        metrics.set_gauge(f"llm_{self.name}_active_requests", self._active)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "active": self._active,
+                "waiting": len(self._waiters),
+            }
+
+    def __enter__(self) -> "ConcurrencyLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "ConcurrencyLimiter":
+        await self.aacquire()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        self.release()
+
+
+class ProviderClients:
+    """
+    Clients of one LLM provider, built on first use and then shared.
+
+    The synchronous client is shared by all threads; asynchronous clients are
+    bound to an event loop, so one is kept per loop. Every client owns a
+    keep-alive connection pool, and all requests go through the provider's
+    ConcurrencyLimiter.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        sync_factory: Callable[[], Any],
+        async_factory: Callable[[], Any],
+        max_concurrency: int,
+    ):
+        self.name = name
+        self.limiter = ConcurrencyLimiter(max_concurrency, name)
+        self._sync_factory = sync_factory
+        self._async_factory = async_factory
+        self._lock = threading.Lock()
+        self._sync_client = None
+        self._async_clients: (
+            "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]"
+        ) = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._sync_client is None:
+                logger.info(f"Creating shared {self.name} LLM client")
+                self._sync_client = self._sync_factory()
+            return self._sync_client
+
+    @property
+    def async_client(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                logger.info(f"Creating shared async {self.name} LLM client")
+                client = self._async_clients[loop] = self._async_factory()
+            return client
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def openai_compatible_provider(
+    name: str, api_key: Optional[str], base_url: Optional[str]
+) -> ProviderClients:
+    """Provider reached through an OpenAI-compatible endpoint (httpx pools)"""
+
+    def sync_factory() -> openai.OpenAI:
+        return openai.OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=LLM_HTTP_TIMEOUT,
+            http_client=openai.DefaultHttpxClient(
+                limits=_limits(), timeout=LLM_HTTP_TIMEOUT
+            ),
+        )
+
+    def async_factory() -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=LLM_HTTP_TIMEOUT,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=_limits(), timeout=LLM_HTTP_TIMEOUT
+            ),
+        )
+
+    return ProviderClients(name, sync_factory, async_factory, _max_concurrency(name))
+
+
+def azure_inference_provider(
+    name: str, endpoint: str, token: Optional[str]
+) -> ProviderClients:
+    """Provider reached through azure.ai.inference (azure-core keeps the session alive)"""
+
+    def credential() -> Any:
+        from azure.core.credentials import AzureKeyCredential
+
+        if token is None:
+            raise ValueError(f"No token configured for the {name} provider")
+        return AzureKeyCredential(token)
+
+    def sync_factory() -> Any:
+        from azure.ai.inference import ChatCompletionsClient
+
+        return ChatCompletionsClient(
+            endpoint=endpoint,
+            credential=credential(),
+            connection_timeout=LLM_HTTP_TIMEOUT,
+            read_timeout=LLM_HTTP_TIMEOUT,
+        )
+
+    def async_factory() -> Any:
+        from azure.ai.inference.aio import ChatCompletionsClient
+
+        return ChatCompletionsClient(
+            endpoint=endpoint,
+            credential=credential(),
+            connection_timeout=LLM_HTTP_TIMEOUT,
+            read_timeout=LLM_HTTP_TIMEOUT,
+        )
+
+    return ProviderClients(name, sync_factory, async_factory, _max_concurrency(name))
+
+
+def _max_concurrency(name: str) -> int:
+    return int(
+        os.getenv(f"LLM_MAX_CONCURRENCY_{name.upper()}", str(LLM_MAX_CONCURRENCY))
+    )
+
+
+# Providers used by the LLM wrappers, clients are only built when first used
+PROVIDERS: Dict[str, ProviderClients] = {
+    "claude": openai_compatible_provider(
+        "claude", os.getenv("API_KEY"), os.getenv("BASE_URL")
+    ),
+    "openai": openai_compatible_provider(
+        "openai", os.getenv("API_KEY"), os.getenv("BASE_URL")
+    ),
+    "azure_github": azure_inference_provider(
+        "azure_github", "https://models.github.ai/inference", os.getenv("GITHUB_TOKEN")
+    ),
+}
+
+
+def get_provider(name: str) -> ProviderClients:
+    return PROVIDERS[name]
+
+
+def providers_stats() -> Dict[str, Dict[str, int]]:
+    return {name: provider.limiter.stats() for name, provider in PROVIDERS.items()}
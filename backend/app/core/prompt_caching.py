@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+# Marks the end of a stable prompt prefix (instructions, project snapshot).
+# Providers with explicit prompt caching get a cache_control block boundary
+# there; for the others the marker is removed.
+CACHE_BREAKPOINT = "\n[[cache-breakpoint]]\n"
+
+# Explicit cache breakpoints accepted per request by Anthropic models
+MAX_BREAKPOINTS = 4
+
+def apply_cache_breakpoints(messages: List[Dict], enabled: bool) -> List[Dict]:
+    """
+    Messages with their CACHE_BREAKPOINT markers turned into text blocks
+    ending with a cache_control marker (enabled), or simply removed
+    """
+    result = []
+    remaining = MAX_BREAKPOINTS
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, str) or CACHE_BREAKPOINT not in content:
+            result.append(message)
+            continue
+        parts = content.split(CACHE_BREAKPOINT)
+        if not enabled:
+            result.append({**message, "content": "\n".join(parts)})
+            continue
+        blocks = []
+        for i, part in enumerate(parts):
+            block = {"type": "text", "text": part}
+            if i < len(parts) - 1 and remaining > 0:
+                block["cache_control"] = {"type": "ephemeral"}
+                remaining -= 1
+            blocks.append(block)
+        result.append({**message, "content": [block for block in blocks if block["text"]]})
+    return result
@@ -0,0 +1,140 @@
+import json
+import logging
+from typing import Any, Dict, List, Sequence
+from pydantic import BaseModel, Field, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Criteria shared by the single-project and batch judge prompts
+JUDGE_CRITERIA = """EVALUATION CRITERIA (Score 1-10 each):
+
+    1. CODE QUALITY: Clean code, proper structure, correct syntax
+    2. REQUIREMENTS FULFILLMENT: Matches user description and features (MOST IMPORTANT)
+    3. REACT NATIVE WEB COMPLIANCE: Proper react-native-web usage"""
+
+# Criteria sent once per batch call; each project then only adds its own section
+BATCH_JUDGE_PREAMBLE = (
+    """
+    Evaluate each of the following React Native Web project generations independently.
+
+    """
+    + JUDGE_CRITERIA
+    + """
+
+    RESPOND ONLY WITH THIS JSON, with one entry per project ID:
+    {{
+        "evaluations": [
+            {{
+                "id": "<project ID>",
+                "code_quality": <score 1-10>,
+                "requirements_fulfillment": <score 1-10>,
+                "compliance": <score 1-10>,
+                "feedback": "<brief explanation>"
+            }}
+        ]
+    }}
+
+    PROJECTS ({count}):
+    """
+)
+
+BATCH_JUDGE_SECTION = """
+    === PROJECT {project_id} ===
+    USER REQUEST:
+    Description: {description}
+    Features: {features}
+
+    GENERATED PROJECT ({files_count} files):
+    {project_content}
+    """
+
+
+class JudgeScores(BaseModel):
+    """One project's scores in a batch judge response"""
+
+    id: str
+    code_quality: float = Field(ge=1, le=10)
+    requirements_fulfillment: float = Field(ge=1, le=10)
+    compliance: float = Field(ge=1, le=10)
+    feedback: str = "No feedback provided"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a prompt (about 4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def batch_section(
+    project_id: str, test_case: Dict[str, Any], files_count: int, project_content: str
+) -> str:
+    return BATCH_JUDGE_SECTION.format(
+        project_id=project_id,
+        description=test_case["description"],
+        features=test_case.get("features", "None specified"),
+        files_count=files_count,
+        project_content=project_content,
+    )
+
+
+def batch_prompt(sections: Sequence[str]) -> str:
+    return BATCH_JUDGE_PREAMBLE.format(count=len(sections)) + "".join(sections)
+
+
+def plan_batches(
+    section_tokens: Sequence[int], token_budget: int, max_projects: int
+) -> List[List[int]]:
+    """
+    Indexes of the sections grouped in order into batches whose prompt (preamble
+    included) fits token_budget, with at most max_projects each. A section too
+    large for the budget gets a batch of its own.
+    """
+    overhead = estimate_tokens(batch_prompt([]))
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = overhead
+    for i, tokens in enumerate(section_tokens):
+        if current and (used + tokens > token_budget or len(current) >= max_projects):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(i)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_response(
+    response: str, project_ids: Sequence[str]
+) -> Dict[str, JudgeScores]:
+    """
+    Valid scores of the response by project ID. Projects missing from the
+    response, or whose entry does not match JudgeScores, are left out.
+    """
+    first_brace = response.find("{")
+    last_brace = response.rfind("}")
+    if first_brace == -1 or last_brace == -1:
+        logger.warning("No JSON found in batch judge response")
+        return {}
+    try:
+        payload = json.loads(response[first_brace : last_brace + 1])
+    except ValueError as e:
+        logger.warning(f"Unparseable batch judge response: {e}")
+        return {}
+    entries = payload.get("evaluations") if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        logger.warning("Batch judge response has no evaluations list")
+        return {}
+
+    wanted = set(project_ids)
+    scores: Dict[str, JudgeScores] = {}
+    for entry in entries:
+        try:
+            parsed = JudgeScores.model_validate(entry)
+        except ValidationError as e:
+            logger.warning(
+                f"Invalid batch judge entry {entry!r:.200}: {e.error_count()} errors"
+            )
+            continue
+        if parsed.id in wanted and parsed.id not in scores:
+            scores[parsed.id] = parsed
+    return scores
@@ -0,0 +1,151 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+from app.services.project_index import ProjectIndex
+from app.evaluation.batch_judge import estimate_tokens
+
+# Bump whenever the packing or skeleton format changes (part of the judge cache key)
+PACKER_VERSION = 1
+
+# Shown whole when possible, in this order, before the other files
+PRIORITY_FILES = ("App.js", "index.js")
+
+_SIGNATURE_RES = (
+    re.compile(
+        r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*\w*\s*\([^)]*\)"
+    ),
+    re.compile(
+        r"^\s*(?:export\s+)?(?:const|let)\s+\w+\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*=>"
+    ),
+    re.compile(r"^\s*(?:export\s+)?class\s+\w+"),
+    re.compile(r"^\s*(?:const|let)\s+\[[^\]]*\]\s*=\s*use\w+\("),
+)
+_TAG_START_RE = re.compile(r"<([A-Za-z][\w.]*)")
+_TEXT_RE = re.compile(r"[^<{}]*")
+
+
+@dataclass
+class PackedProject:
+    content: str
+    tokens: int
+    full_files: List[str] = field(default_factory=list)
+    skeleton_files: List[str] = field(default_factory=list)
+    omitted_files: List[str] = field(default_factory=list)
+
+    def report(self) -> Dict[str, int]:
+        return {
+            "tokens": self.tokens,
+            "full_files": len(self.full_files),
+            "skeleton_files": len(self.skeleton_files),
+            "omitted_files": len(self.omitted_files),
+        }
+
+
+def _outline_tags(line: str) -> str:
+    """Opening JSX tags of a line without their attributes, each with the text following it"""
+    tags = []
+    tag = _TAG_START_RE.search(line)
+    while tag:
+        # Attributes end at the first ">" outside of {...} expressions
+        end, depth = tag.end(), 0
+        while end < len(line) and not (line[end] == ">" and depth == 0):
+            depth += {"{": 1, "}": -1}.get(line[end], 0)
+            end += 1
+        self_closing = line[end - 1] == "/"
+        text = _TEXT_RE.match(line, min(end + 1, len(line)))
+        assert text is not None  # Also matches the empty string
+        tags.append(
+            f"<{tag.group(1)}{' /' if self_closing else ''}>{text.group(0).strip()}"
+        )
+        tag = _TAG_START_RE.search(line, end)
+    return "".join(tags)
+
+
+def skeleton(code: str, style_keys: List[str]) -> str:
+    """
+    Outline of a file: imports, function and component signatures, state hooks,
+    JSX structure (tags and their text) and StyleSheet keys
+    """
+    lines = []
+    for line in code.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith(("//", "/*", "*")):
+            continue
+        if stripped.startswith("import ") or any(
+            pattern.match(line) for pattern in _SIGNATURE_RES
+        ):
+            lines.append(line.rstrip())
+            continue
+        tags = _outline_tags(line)
+        if tags:
+            lines.append(line[: len(line) - len(line.lstrip())] + tags)
+    if style_keys:
+        lines.append(f"styles: {', '.join(style_keys)}")
+    return "\n".join(lines)
+
+
+def priority_order(project: Dict[str, str], index: ProjectIndex) -> List[str]:
+    """App.js and the entry point, then files by number of importers (most imported first)"""
+
+    def rank(path: str) -> Tuple[int, int]:
+        name = path.lstrip("/")
+        if name in PRIORITY_FILES:
+            return (0, PRIORITY_FILES.index(name))
+        return (1, -len(index.importers[path]))
+
+    return sorted(project, key=rank)
+
+
+def _full_section(path: str, code: str) -> str:
+    return f"\n--- {path} ---\n{code}\n"
+
+
+def _skeleton_section(path: str, outline: str) -> str:
+    return f"\n--- {path} --- (skeleton)\n{outline}\n"
+
+
+def _omitted_section(path: str) -> str:
+    return f"\n--- {path} --- (omitted)\n"
+
+
+def pack_project(project: Dict[str, str], token_budget: int) -> PackedProject:
+    """
+    Project content for the judge within about token_budget tokens.
+
+    Every file is listed; skeletons are added in priority order while they fit,
+    then files are shown whole, in the same order, while the budget allows.
+    """
+    index = ProjectIndex(project)
+    order = priority_order(project, index)
+    sections = {path: _omitted_section(path) for path in order}
+    tokens = {path: estimate_tokens(section) for path, section in sections.items()}
+    used = sum(tokens.values())
+
+    levels = {path: "omitted" for path in order}
+    for level, render in (
+        (
+            "skeleton",
+            lambda path: _skeleton_section(
+                path, skeleton(project[path], index.files[path].style_keys)
+            ),
+        ),
+        ("full", lambda path: _full_section(path, project[path])),
+    ):
+        for path in order:
+            section = render(path)
+            section_tokens = estimate_tokens(section)
+            if used - tokens[path] + section_tokens <= token_budget:
+                used += section_tokens - tokens[path]
+                sections[path], tokens[path], levels[path] = (
+                    section,
+                    section_tokens,
+                    level,
+                )
+
+    return PackedProject(
+        content="".join(sections[path] for path in order),
+        tokens=used,
+        full_files=[path for path in order if levels[path] == "full"],
+        skeleton_files=[path for path in order if levels[path] == "skeleton"],
+        omitted_files=[path for path in order if levels[path] == "omitted"],
+    )
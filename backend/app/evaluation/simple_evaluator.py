@@ -1,19 +1,87 @@
 import mlflow
+import hashlib
 import json
 import logging
 import os
 import tempfile
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
+from app.config.settings import (
+    EVALUATION_CONCURRENCY, EVALUATION_CASE_TIMEOUT, JUDGE_CACHE_ENABLED,
+    JUDGE_BATCH_TOKEN_BUDGET, JUDGE_BATCH_MAX_PROJECTS, JUDGE_CONTEXT_TOKENS
+)
 from app.core.ClaudeLLM import ClaudeLLM
 from app.agents.frontend_generator_agent import frontend_generator_agent, create_react_native_web_task
+from app.services.project_parser import parse_project_output
+from app.services.generation_cache import generation_cache, generation_cache_key
+from app.services.token_accounting import usage_tags
+from app.evaluation.static_analyzer import analyze_project, analyze_projects, StaticReport, ANALYZER_VERSION
+from app.services.judge_cache import JudgeCache, judge_cache
+from app.services.metrics import metrics
+from app.evaluation.judge_packer import PackedProject, pack_project, PACKER_VERSION
+from app.evaluation.batch_judge import (
+    BATCH_JUDGE_PREAMBLE, BATCH_JUDGE_SECTION, JUDGE_CRITERIA, JudgeScores,
+    batch_prompt, batch_section, estimate_tokens, parse_batch_response, plan_batches
+)
 from crewai import Crew
 
 logger = logging.getLogger(__name__)
 
+# Define weights (must sum to 1.0)
+JUDGE_WEIGHTS = {
+    "requirements_fulfillment": 0.5,  # 50% weight - most important
+    "code_quality": 0.25,             # 25% weight
+    "compliance": 0.25                # 25% weight
+}
+
+JUDGE_PROMPT_TEMPLATE = """
+    Evaluate this React Native Web project generation:
+
+    USER REQUEST:
+    Description: {description}
+    Features: {features}
+
+    GENERATED PROJECT ({files_count} files):
+    {project_content}
+
+    """ + JUDGE_CRITERIA + """
+
+    RESPOND ONLY WITH THIS JSON:
+    {{
+        "code_quality": <score 1-10>,
+        "requirements_fulfillment": <score 1-10>, 
+        "compliance": <score 1-10>,
+        "overall_score": <simple average of above>,
+        "feedback": "<brief explanation>"
+    }}
+    """
+
+def judge_prompt_version() -> str:
+    """
+    Changes whenever the judge prompts (single and batch), the weights, the static
+    rules or the packing change; keys cached evaluations, batched verdicts included
+    """
+    return hashlib.sha256(
+        json.dumps([
+            JUDGE_PROMPT_TEMPLATE, BATCH_JUDGE_PREAMBLE, BATCH_JUDGE_SECTION,
+            JUDGE_WEIGHTS, ANALYZER_VERSION, PACKER_VERSION
+        ]).encode("utf-8")
+    ).hexdigest()[:16]
+
+JUDGE_PROMPT_VERSION = judge_prompt_version()
+
 class SimpleFrontendEvaluator:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True, use_judge_cache: Optional[bool] = None):
         self.llm_judge = ClaudeLLM()
+        # Reuse cached generations for test cases already generated with the same prompt/model
+        self.use_cache = use_cache
+        # Reuse judge evaluations of identical projects (bypassed: the judge is always called, results still stored)
+        self.use_judge_cache = JUDGE_CACHE_ENABLED if use_judge_cache is None else use_judge_cache
+        # Estimated tokens of project content per judged project
+        self.judge_context_tokens = JUDGE_CONTEXT_TOKENS
         # Set or create experiment
         try:
             experiment = mlflow.get_experiment_by_name("Frontend_Generator_Evaluation")
@@ -25,90 +93,56 @@ class SimpleFrontendEvaluator:
         except Exception as e:
             logger.warning(f"Could not set MLflow experiment: {e}")
     
-    def evaluate_agent(self, test_cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def evaluate_agent(self, test_cases: List[Dict[str, Any]], concurrency: Optional[int] = None,
+                       case_timeout: Optional[float] = None, judge_batch_tokens: Optional[int] = None) -> Dict[str, Any]:
         """
         Evaluate the frontend generator agent using basic MLflow logging
+
+        Test cases are generated and judged concurrently (at most `concurrency`
+        at a time); a case running longer than `case_timeout` seconds is recorded
+        as failed. Results keep the order of the test cases and all MLflow calls
+        are made from this thread once the cases are done.
+
+        With a `judge_batch_tokens` budget, all projects are generated first and
+        then judged several per call (the timeout then covers generation only).
         """
         # Validate test cases first
         validated_test_cases = self._validate_test_cases(test_cases)
+        concurrency = max(1, concurrency or EVALUATION_CONCURRENCY)
+        case_timeout = EVALUATION_CASE_TIMEOUT if case_timeout is None else case_timeout
+        judge_batch_tokens = JUDGE_BATCH_TOKEN_BUDGET if judge_batch_tokens is None else judge_batch_tokens
         
-        with mlflow.start_run():
+        with mlflow.start_run() as run, usage_tags(evaluation_run=run.info.run_id):
             # Log basic info
             mlflow.log_param("test_cases_count", len(validated_test_cases))
             mlflow.log_param("evaluation_date", datetime.now().isoformat())
+            mlflow.log_param("concurrency", concurrency)
+            mlflow.log_param("judge_batch_tokens", judge_batch_tokens)
             
-            results = []
+            started = time.monotonic()
+            if judge_batch_tokens > 0:
+                results = self._run_test_cases(validated_test_cases, concurrency, case_timeout, judge=False)
+                generated = [r for r in results if 'generated_project' in r]
+                evaluations = self._llm_judge_batch(
+                    [(validated_test_cases[r['test_case_id']], r['generated_project']) for r in generated],
+                    judge_batch_tokens, concurrency
+                )
+                for r, evaluation_score in zip(generated, evaluations):
+                    i = r['test_case_id']
+                    results[i] = self._test_case_result(i, validated_test_cases[i], r['generated_project'], evaluation_score)
+            else:
+                results = self._run_test_cases(validated_test_cases, concurrency, case_timeout)
             
-            for i, test_case in enumerate(validated_test_cases):
-                logger.info(f"Evaluating test case {i+1}/{len(test_cases)}")
-                
-                try:
-                    # Validate test case structure
-                    if not isinstance(test_case, dict):
-                        raise ValueError(f"Test case {i} is not a dictionary: {type(test_case)}")
-                    
-                    if 'description' not in test_case:
-                        raise ValueError(f"Test case {i} missing 'description' field. Available keys: {list(test_case.keys())}")
-                    
-                    description = test_case['description']
-                    features = test_case.get('features', '')
-                    
-                    logger.info(f"Test case {i}: {description}")
-                    
-                    # Generate project
-                    generated_project = self._generate_project(description, features)
-                    
-                    # Evaluate with LLM judge
-                    evaluation_score = self._llm_judge_evaluation(test_case, generated_project)
-                    
-                    # Store results
-                    result = {
-                        'test_case_id': i,
-                        'description': description,
-                        'features': features,
-                        'generated_files_count': len(generated_project),
-                        'evaluation_score': evaluation_score['overall_score'],
-                        'weighted_evaluation_score': evaluation_score.get('weighted_score', evaluation_score['overall_score']),  # New field
-                        'code_quality_score': evaluation_score['code_quality'],
-                        'requirements_fulfillment': evaluation_score['requirements_fulfillment'],
-                        'react_native_web_compliance': evaluation_score['compliance'],
-                        'feedback': evaluation_score['feedback']
-                    }
-                    results.append(result)
-                    
-                    # Log individual test case metrics (including weighted score)
-                    mlflow.log_metric(f"test_{i}_overall_score", evaluation_score['overall_score'])
-                    mlflow.log_metric(f"test_{i}_weighted_score", evaluation_score.get('weighted_score', evaluation_score['overall_score']))  # New metric
-                    mlflow.log_metric(f"test_{i}_code_quality", evaluation_score['code_quality'])
-                    mlflow.log_metric(f"test_{i}_requirements", evaluation_score['requirements_fulfillment'])
-                    mlflow.log_metric(f"test_{i}_compliance", evaluation_score['compliance'])
-                    mlflow.log_metric(f"test_{i}_files_count", len(generated_project))
-                    
-                except Exception as e:
-                    logger.error(f"Error evaluating test case {i}: {e}")
-                    logger.error(f"Test case content: {test_case}")
-                    
-                    # Try to get description safely
-                    description = test_case.get('description', f'Test case {i}') if isinstance(test_case, dict) else f'Invalid test case {i}'
-                    features = test_case.get('features', '') if isinstance(test_case, dict) else ''
-                    
-                    # Log failed test case
-                    results.append({
-                        'test_case_id': i,
-                        'description': description,
-                        'features': features,
-                        'generated_files_count': 0,
-                        'evaluation_score': 0,
-                        'code_quality_score': 0,
-                        'requirements_fulfillment': 0,
-                        'react_native_web_compliance': 0,
-                        'feedback': f"Evaluation failed: {str(e)}"
-                    })
+            # Log individual test case metrics (including weighted score)
+            for result in results:
+                self._log_test_case_metrics(result)
             
             # Calculate and log overall metrics
             overall_metrics = self._calculate_overall_metrics(results)
             for metric_name, metric_value in overall_metrics.items():
                 mlflow.log_metric(metric_name, metric_value)
+            mlflow.log_metric("evaluation_duration_seconds", time.monotonic() - started)
+            mlflow.log_metric("judge_cache_hits", sum(1 for r in results if r.get('judge_cached')))
             
             # Save results as artifact
             self._save_results_as_artifact(results)
@@ -118,6 +152,142 @@ class SimpleFrontendEvaluator:
                 'overall_metrics': overall_metrics
             }
     
+    def _run_test_cases(self, test_cases: List[Dict[str, Any]], concurrency: int, case_timeout: float,
+                        judge: bool = True) -> List[Dict[str, Any]]:
+        """
+        Run the test cases on a thread pool and return their results in test case order
+        (without judge, successful cases only carry their generated_project)
+
+        A worker cannot be interrupted: a timed out case is recorded as failed and
+        no longer waited for, but its thread only frees its slot once it returns.
+        """
+        if not test_cases:
+            return []
+        
+        results: Dict[int, Dict[str, Any]] = {}
+        started: Dict[int, float] = {}
+        
+        def run_case(i: int, test_case: Dict[str, Any]) -> Dict[str, Any]:
+            started[i] = time.monotonic()
+            return self._evaluate_test_case(i, test_case, len(test_cases), judge)
+        
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, len(test_cases)), thread_name_prefix="evaluation-case")
+        try:
+            # Each case runs in a copy of this context so usage_tags apply to its LLM calls
+            pending = {
+                executor.submit(contextvars.copy_context().run, run_case, i, test_case): i
+                for i, test_case in enumerate(test_cases)
+            }
+            while pending:
+                done, _ = wait(pending, timeout=min(1.0, case_timeout) if case_timeout > 0 else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = pending.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = self._failed_test_case_result(i, test_cases[i], e)
+                
+                if case_timeout > 0:
+                    now = time.monotonic()
+                    for future, i in list(pending.items()):
+                        if i in started and now - started[i] > case_timeout:
+                            del pending[future]
+                            logger.error(f"Test case {i} timed out after {case_timeout:g}s")
+                            results[i] = self._failed_test_case_result(
+                                i, test_cases[i], TimeoutError(f"timed out after {case_timeout:g}s")
+                            )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return [results[i] for i in range(len(test_cases))]
+    
+    def _evaluate_test_case(self, i: int, test_case: Dict[str, Any], total: int, judge: bool = True) -> Dict[str, Any]:
+        """Generate and judge one test case; failures are returned as a zero-score result"""
+        logger.info(f"Evaluating test case {i+1}/{total}")
+        
+        try:
+            # Validate test case structure
+            if not isinstance(test_case, dict):
+                raise ValueError(f"Test case {i} is not a dictionary: {type(test_case)}")
+            
+            if 'description' not in test_case:
+                raise ValueError(f"Test case {i} missing 'description' field. Available keys: {list(test_case.keys())}")
+            
+            description = test_case['description']
+            features = test_case.get('features', '')
+            
+            logger.info(f"Test case {i}: {description}")
+            
+            # Generate project
+            generated_project = self._generate_project(description, features)
+            if not judge:
+                return {'test_case_id': i, 'generated_project': generated_project}
+            
+            # Evaluate with LLM judge
+            evaluation_score = self._llm_judge_evaluation(test_case, generated_project)
+            return self._test_case_result(i, test_case, generated_project, evaluation_score)
+            
+        except Exception as e:
+            return self._failed_test_case_result(i, test_case, e)
+    
+    def _test_case_result(self, i: int, test_case: Dict[str, Any], generated_project: Dict[str, str],
+                          evaluation_score: Dict[str, Any]) -> Dict[str, Any]:
+        """Result of a generated and judged test case"""
+        return {
+            'test_case_id': i,
+            'description': test_case['description'],
+            'features': test_case.get('features', ''),
+            'generated_files_count': len(generated_project),
+            'evaluation_score': evaluation_score['overall_score'],
+            'weighted_evaluation_score': evaluation_score.get('weighted_score', evaluation_score['overall_score']),  # New field
+            'code_quality_score': evaluation_score['code_quality'],
+            'requirements_fulfillment': evaluation_score['requirements_fulfillment'],
+            'react_native_web_compliance': evaluation_score['compliance'],
+            'static_compliance': evaluation_score.get('static_analysis', {}).get('compliance_score', 0),
+            'judge_skipped': evaluation_score.get('judge_skipped', False),
+            'judge_cached': evaluation_score.get('judge_cached', False),
+            'judge_context_tokens': evaluation_score.get('judge_context', {}).get('tokens', 0),
+            'feedback': evaluation_score['feedback']
+        }
+    
+    def _failed_test_case_result(self, i: int, test_case: Any, error: Exception) -> Dict[str, Any]:
+        """Zero-score result recorded for a test case that could not be evaluated"""
+        logger.error(f"Error evaluating test case {i}: {error}")
+        logger.error(f"Test case content: {test_case}")
+        
+        # Try to get description safely
+        description = test_case.get('description', f'Test case {i}') if isinstance(test_case, dict) else f'Invalid test case {i}'
+        features = test_case.get('features', '') if isinstance(test_case, dict) else ''
+        
+        return {
+            'test_case_id': i,
+            'description': description,
+            'features': features,
+            'generated_files_count': 0,
+            'evaluation_score': 0,
+            'code_quality_score': 0,
+            'requirements_fulfillment': 0,
+            'react_native_web_compliance': 0,
+            'feedback': f"Evaluation failed: {str(error)}"
+        }
+    
+    def _log_test_case_metrics(self, result: Dict[str, Any]):
+        """Log the metrics of one successfully evaluated test case"""
+        if 'weighted_evaluation_score' not in result:
+            return
+        i = result['test_case_id']
+        mlflow.log_metrics({
+            f"test_{i}_overall_score": result['evaluation_score'],
+            f"test_{i}_weighted_score": result['weighted_evaluation_score'],
+            f"test_{i}_code_quality": result['code_quality_score'],
+            f"test_{i}_requirements": result['requirements_fulfillment'],
+            f"test_{i}_compliance": result['react_native_web_compliance'],
+            f"test_{i}_files_count": result['generated_files_count'],
+            f"test_{i}_static_compliance": result['static_compliance'],
+            f"test_{i}_judge_context_tokens": result['judge_context_tokens'],
+        })
+    
     def _validate_test_cases(self, test_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Validate and fix test cases structure"""
         validated = []
@@ -159,32 +329,133 @@ class SimpleFrontendEvaluator:
     def _generate_project(self, description: str, features: str = "") -> Dict[str, str]:
         """Generate project using the frontend generator agent"""
         try:
+            cache_key = generation_cache_key(description, features)
+            if self.use_cache:
+                cached = generation_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Using cached generation for: {description}")
+                    return cached
+            
             task = create_react_native_web_task(description, features)
             crew = Crew(agents=[frontend_generator_agent], tasks=[task], verbose=False)
             result = crew.kickoff()
             result_str = str(result.output).strip() if hasattr(result, "output") else str(result).strip()
             
-            # Extract JSON
-            first_brace = result_str.find("{")
-            last_brace = result_str.rfind("}")
-            if first_brace == -1 or last_brace == -1:
-                return {}
-            json_str = result_str[first_brace:last_brace+1]
-            return json.loads(json_str)
+            project, incomplete = parse_project_output(result_str)
+            if not incomplete:
+                generation_cache.put(cache_key, project)
+            return project
         except Exception as e:
             logger.error(f"Error generating project: {e}")
             return {}
     
     def _llm_judge_evaluation(self, test_case: Dict[str, Any], generated_project: Dict[str, str]) -> Dict[str, Any]:
+        """Evaluation of the generated project, from the judge cache when this exact project was already judged"""
+        if not generated_project:
+            return self._judge_project(test_case, generated_project)
+        
+        cache_key = self._judge_cache_key(test_case, generated_project)
+        if self.use_judge_cache:
+            cached = judge_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached judge evaluation for: {test_case.get('description', '')}")
+                cached["judge_cached"] = True
+                return cached
+        
+        return self._cache_evaluation(cache_key, self._judge_project(test_case, generated_project))
+    
+    def _judge_cache_key(self, test_case: Dict[str, Any], generated_project: Dict[str, str]) -> str:
+        prompt_version = f"{JUDGE_PROMPT_VERSION}-{self.judge_context_tokens}"
+        return JudgeCache.make_key(test_case, generated_project, self.llm_judge.model_name, prompt_version)
+    
+    def _cache_evaluation(self, cache_key: str, evaluation: Dict[str, Any]) -> Dict[str, Any]:
+        # Fallback scores (judge call or parsing failed) are not kept
+        if not evaluation.pop("judge_failed", False):
+            judge_cache.put(cache_key, evaluation)
+        evaluation["judge_cached"] = False
+        return evaluation
+    
+    def _llm_judge_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, str]]], token_budget: Optional[int] = None,
+                         concurrency: int = 1) -> List[Dict[str, Any]]:
+        """
+        Evaluations of several (test case, project) pairs, in order.
+
+        Projects neither cached nor stopped by the static analysis are judged
+        several per call, in batches fitting token_budget (up to `concurrency`
+        calls at a time). Projects without valid scores in a batch response are
+        judged one by one.
+        """
+        token_budget = token_budget or JUDGE_BATCH_TOKEN_BUDGET
+        evaluations: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        misses = []
+        for i, (test_case, generated_project) in enumerate(items):
+            if not generated_project:
+                evaluations[i] = self._judge_project(test_case, generated_project)
+                continue
+            cache_key = self._judge_cache_key(test_case, generated_project)
+            cached = judge_cache.get(cache_key) if self.use_judge_cache else None
+            if cached is not None:
+                cached["judge_cached"] = True
+                evaluations[i] = cached
+                continue
+            misses.append((i, cache_key))
+        
+        # Static checks of the whole batch at once (spread over processes for large batches)
+        static_reports = analyze_projects([items[i][1] for i, _ in misses])
+        pending = []
+        for (i, cache_key), static_report in zip(misses, static_reports):
+            test_case, generated_project = items[i]
+            if not static_report.passed:
+                evaluations[i] = self._cache_evaluation(cache_key, self._static_failure_evaluation(static_report))
+                continue
+            packed = self._pack_project(generated_project)
+            section = batch_section(f"p{i + 1}", test_case, len(generated_project), packed.content)
+            pending.append((i, cache_key, static_report, packed, section))
+        
+        batches = [
+            [pending[j] for j in batch]
+            for batch in plan_batches([estimate_tokens(entry[-1]) for entry in pending], token_budget, JUDGE_BATCH_MAX_PROJECTS)
+        ]
+        logger.info(f"Judging {len(pending)} projects in {len(batches)} calls ({len(items) - len(pending)} without judge call)")
+        
+        def judge_batch(batch) -> None:
+            scores = self._call_batch_judge(batch) if len(batch) > 1 else {}
+            for i, cache_key, static_report, packed, _ in batch:
+                project_scores = scores.get(f"p{i + 1}")
+                if project_scores is None:
+                    evaluation = self._judge_project(*items[i])
+                else:
+                    evaluation = self._score_evaluation(project_scores.model_dump(exclude={"id"}), static_report)
+                    evaluation["judge_context"] = packed.report()
+                evaluations[i] = self._cache_evaluation(cache_key, evaluation)
+        
+        if batches:
+            # Each batch runs in a copy of this context so usage_tags apply to its LLM calls
+            with ThreadPoolExecutor(max_workers=min(max(1, concurrency), len(batches)), thread_name_prefix="evaluation-judge") as executor:
+                for future in [executor.submit(contextvars.copy_context().run, judge_batch, batch) for batch in batches]:
+                    future.result()
+        return evaluations
+    
+    def _call_batch_judge(self, batch) -> Dict[str, JudgeScores]:
+        """Validated scores of one batch judge call by project ID (empty if the call failed)"""
+        project_ids = [f"p{i + 1}" for i, *_ in batch]
+        prompt = batch_prompt([section for *_, section in batch])
+        try:
+            response = self.llm_judge.call([{"role": "user", "content": prompt}])
+        except Exception as e:
+            logger.error(f"Batch judge call failed for {len(batch)} projects: {e}")
+            response = None
+        scores = parse_batch_response(str(response or ""), project_ids)
+        metrics.inc("judge_batch_calls")
+        metrics.inc("judge_batch_projects", len(batch))
+        if len(scores) < len(batch):
+            logger.warning(f"Batch judge scored {len(scores)}/{len(batch)} projects, judging the others one by one")
+            metrics.inc("judge_batch_fallbacks", len(batch) - len(scores))
+        return scores
+    
+    def _judge_project(self, test_case: Dict[str, Any], generated_project: Dict[str, str]) -> Dict[str, Any]:
             """Use LLM as judge to evaluate the generated project with weighted scoring"""
             
-            # Define weights (must sum to 1.0)
-            WEIGHTS = {
-                "requirements_fulfillment": 0.5,  # 50% weight - most important
-                "code_quality": 0.25,             # 25% weight
-                "compliance": 0.25                # 25% weight
-            }
-            
             if not generated_project:
                 return {
                     "code_quality": 0,
@@ -195,47 +466,20 @@ class SimpleFrontendEvaluator:
                     "feedback": "No project generated"
                 }
             
-            # Prepare project content for evaluation (limit size for LLM)
-            project_content = ""
-            file_count = 0
-            for file_path, file_content in generated_project.items():
-                if file_count < 5:  # Limit to first 5 files to avoid token limits
-                    project_content += f"\n--- {file_path} ---\n{file_content[:1000]}...\n"
-                    file_count += 1
-                else:
-                    project_content += f"\n--- {file_path} --- (truncated)\n"
+            # Deterministic checks first: a project failing hard checks is not sent to the judge
+            static_report = analyze_project(generated_project)
+            if not static_report.passed:
+                return self._static_failure_evaluation(static_report)
             
-            evaluation_prompt = f"""
-    Evaluate this React Native Web project generation:
-
-    USER REQUEST:
-    Description: {test_case['description']}
-    Features: {test_case.get('features', 'None specified')}
-
-    GENERATED PROJECT ({len(generated_project)} files):
-    {project_content}
-
-    EVALUATION CRITERIA (Score 1-10 each):
-
-    1. CODE QUALITY: Clean code, proper structure, correct syntax
-    2. REQUIREMENTS FULFILLMENT: Matches user description and features (MOST IMPORTANT)
-    3. REACT NATIVE WEB COMPLIANCE: Proper react-native-web usage
-
-    RESPOND ONLY WITH THIS JSON:
-    {{
-        "code_quality": <score 1-10>,
-        "requirements_fulfillment": <score 1-10>, 
-        "compliance": <score 1-10>,
-        "overall_score": <simple average of above>,
-        "feedback": "<brief explanation>"
-    }}
-    """
+            packed = self._pack_project(generated_project)
+            evaluation_prompt = JUDGE_PROMPT_TEMPLATE.format(
+                description=test_case['description'],
+                features=test_case.get('features', 'None specified'),
+                files_count=len(generated_project),
+                project_content=packed.content
+            )
             
             try:
-                # Debug: Check available methods
-                available_methods = [method for method in dir(self.llm_judge) if not method.startswith('_')]
-                logger.info(f"Available LLM methods: {available_methods}")
-                
                 # Your ClaudeLLM uses call() method with OpenAI chat format
                 logger.info("Attempting to call LLM with messages format...")
                 messages = [{"role": "user", "content": evaluation_prompt}]
@@ -253,38 +497,8 @@ class SimpleFrontendEvaluator:
                 last_brace = response_str.rfind("}")
                 if first_brace != -1 and last_brace != -1:
                     json_str = response_str[first_brace:last_brace+1]
-                    evaluation = json.loads(json_str)
-                    
-                    # Ensure all required fields exist and are valid
-                    required_fields = ["code_quality", "requirements_fulfillment", "compliance", "overall_score", "feedback"]
-                    for field in required_fields:
-                        if field not in evaluation:
-                            if field == "feedback":
-                                evaluation[field] = "No feedback provided"
-                            else:
-                                evaluation[field] = 5  # Default score
-                    
-                    # Validate numeric scores
-                    for field in ["code_quality", "requirements_fulfillment", "compliance", "overall_score"]:
-                        if field in evaluation:
-                            try:
-                                evaluation[field] = float(evaluation[field])
-                                # Ensure score is within valid range
-                                evaluation[field] = max(1, min(10, evaluation[field]))
-                            except (ValueError, TypeError):
-                                evaluation[field] = 5  # Default score
-                    
-                    # Calculate simple average for overall_score (backward compatibility)
-                    scores = [evaluation["code_quality"], evaluation["requirements_fulfillment"], evaluation["compliance"]]
-                    evaluation["overall_score"] = sum(scores) / len(scores)
-                    
-                    # Calculate NEW weighted score
-                    weighted_score = (
-                        evaluation["requirements_fulfillment"] * WEIGHTS["requirements_fulfillment"] +
-                        evaluation["code_quality"] * WEIGHTS["code_quality"] +
-                        evaluation["compliance"] * WEIGHTS["compliance"]
-                    )
-                    evaluation["weighted_score"] = round(weighted_score, 2)
+                    evaluation = self._score_evaluation(json.loads(json_str), static_report)
+                    evaluation["judge_context"] = packed.report()
                     
                     logger.info(f"Parsed evaluation - Overall: {evaluation['overall_score']:.2f}, Weighted: {evaluation['weighted_score']:.2f}")
                     return evaluation
@@ -293,7 +507,6 @@ class SimpleFrontendEvaluator:
                     
             except Exception as e:
                 logger.error(f"Error in LLM evaluation: {e}")
-                logger.error(f"Available methods on LLM: {[method for method in dir(self.llm_judge) if not method.startswith('_')]}")
                 import traceback
                 logger.error(f"Full traceback: {traceback.format_exc()}")
             
@@ -304,8 +517,70 @@ class SimpleFrontendEvaluator:
                 "compliance": 3,
                 "overall_score": 3,
                 "weighted_score": 3,
-                "feedback": f"Evaluation failed, but project generated with {len(generated_project)} files"
+                "feedback": f"Evaluation failed, but project generated with {len(generated_project)} files",
+                "judge_skipped": False,
+                "judge_failed": True,
+                "static_analysis": static_report.to_dict()
             }
+    
+    def _pack_project(self, generated_project: Dict[str, str]) -> PackedProject:
+        """Project files shown to the judge, packed by priority into judge_context_tokens"""
+        return pack_project(generated_project, self.judge_context_tokens)
+    
+    def _score_evaluation(self, evaluation: Dict[str, Any], static_report: StaticReport) -> Dict[str, Any]:
+        """Judge scores completed, clamped to 1-10, capped by the static analysis and weighted"""
+        # Ensure all required fields exist and are valid
+        required_fields = ["code_quality", "requirements_fulfillment", "compliance", "overall_score", "feedback"]
+        for field in required_fields:
+            if field not in evaluation:
+                if field == "feedback":
+                    evaluation[field] = "No feedback provided"
+                else:
+                    evaluation[field] = 5  # Default score
+        
+        # Validate numeric scores
+        for field in ["code_quality", "requirements_fulfillment", "compliance", "overall_score"]:
+            if field in evaluation:
+                try:
+                    evaluation[field] = float(evaluation[field])
+                    # Ensure score is within valid range
+                    evaluation[field] = max(1, min(10, evaluation[field]))
+                except (ValueError, TypeError):
+                    evaluation[field] = 5  # Default score
+        
+        # Static violations cap the judge's compliance score
+        evaluation["compliance"] = min(evaluation["compliance"], static_report.compliance_score)
+        evaluation["judge_skipped"] = False
+        evaluation["static_analysis"] = static_report.to_dict()
+        
+        # Calculate simple average for overall_score (backward compatibility)
+        scores = [evaluation["code_quality"], evaluation["requirements_fulfillment"], evaluation["compliance"]]
+        evaluation["overall_score"] = sum(scores) / len(scores)
+        
+        # Calculate NEW weighted score
+        weighted_score = (
+            evaluation["requirements_fulfillment"] * JUDGE_WEIGHTS["requirements_fulfillment"] +
+            evaluation["code_quality"] * JUDGE_WEIGHTS["code_quality"] +
+            evaluation["compliance"] * JUDGE_WEIGHTS["compliance"]
+        )
+        evaluation["weighted_score"] = round(weighted_score, 2)
+        return evaluation
+    
+    def _static_failure_evaluation(self, static_report: StaticReport) -> Dict[str, Any]:
+        """Scores of a project failing hard static checks (the judge is not called)"""
+        logger.info(f"Static analysis failed ({len(static_report.hard_failures)} hard failures), skipping LLM judge")
+        evaluation = {
+            "code_quality": 1,
+            "requirements_fulfillment": 1,
+            "compliance": static_report.compliance_score,
+            "feedback": f"Static analysis failed, LLM judge skipped:\n{static_report.summary()}",
+            "judge_skipped": True,
+            "static_analysis": static_report.to_dict()
+        }
+        scores = [evaluation["code_quality"], evaluation["requirements_fulfillment"], evaluation["compliance"]]
+        evaluation["overall_score"] = sum(scores) / len(scores)
+        evaluation["weighted_score"] = round(sum(evaluation[name] * weight for name, weight in JUDGE_WEIGHTS.items()), 2)
+        return evaluation
         
     def _calculate_overall_metrics(self, results: List[Dict[str, Any]]) -> Dict[str, float]:
             """Calculate overall performance metrics with weighted scoring"""
@@ -330,11 +605,11 @@ class SimpleFrontendEvaluator:
                     'generated_files_avg': 0
                 }
             
-            # Calculate weighted scores (use weighted_score if available, fall back to overall_score)
+            # Calculate weighted scores (use weighted_evaluation_score if available, fall back to overall_score)
             weighted_scores = []
             for r in successful_cases:
-                if 'weighted_score' in r and r['weighted_score'] > 0:
-                    weighted_scores.append(r['weighted_score'])
+                if r.get('weighted_evaluation_score', 0) > 0:
+                    weighted_scores.append(r['weighted_evaluation_score'])
                 else:
                     weighted_scores.append(r['evaluation_score'])
             
@@ -0,0 +1,504 @@
+import bisect
+import posixpath
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.services.project_index import resolve_import
+
+# Bump whenever a rule or penalty changes (part of the judge cache key)
+ANALYZER_VERSION = 1
+
+# Packages the generation prompt forbids (name or name/ prefix)
+FORBIDDEN_PACKAGES = (
+    "react-navigation",
+    "@react-navigation",
+    "@react-native-community",
+    "react-native-vector-icons",
+    "expo",
+    "@expo",
+)
+# Packages available to a generated project
+ALLOWED_PACKAGES = ("react", "react-dom", "react-dom/client", "react-native-web")
+
+# HTML elements the prompt maps to react-native-web components
+HTML_COMPONENTS = {
+    "div": "View",
+    "span": "Text",
+    "p": "Text",
+    "button": "TouchableOpacity",
+    "img": "Image",
+    "h1": "Text",
+    "h2": "Text",
+    "h3": "Text",
+    "h4": "Text",
+    "h5": "Text",
+    "h6": "Text",
+}
+
+# Compliance points lost per distinct (rule, file)
+PENALTIES = {"error": 3.0, "warning": 1.0}
+
+# Below this many projects, a batch is analyzed in-process (a process pool costs more)
+MIN_PARALLEL_BATCH = 32
+
+_IMPORT_RE = re.compile(
+    r"""(?:\bimport\s[^'";]*?\bfrom\s*|\bimport\s*|\brequire\(\s*)['"]([^'"]+)['"]"""
+)
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_$][\w$]*")
+_NUMBER_RE = re.compile(r"\d[\w.]*")
+_TAG_NAME_RE = re.compile(r"[A-Za-z_$][\w$.:-]*")
+_ATTRIBUTE_RE = re.compile(r"[\w$:-]+")
+_JSX_TEXT_RE = re.compile(r"[^<{]+")
+_SPACE_RE = re.compile(r"\s+")
+
+_CLOSERS = {"(": ")", "[": "]", "{": "}"}
+# Last tokens after which "/" starts a regex and "<" a JSX element
+_EXPRESSION_KEYWORDS = {
+    "return",
+    "case",
+    "typeof",
+    "instanceof",
+    "in",
+    "of",
+    "new",
+    "delete",
+    "void",
+    "throw",
+    "else",
+    "do",
+    "yield",
+    "await",
+    "default",
+}
+_EXPRESSION_PUNCTUATION = set("(,=:[!&|?{};+-*%<>~^")
+
+
+@dataclass
+class Violation:
+    rule: str
+    path: str
+    line: int
+    message: str
+    severity: str  # "error" (hard failure, the judge is skipped) or "warning"
+
+
+@dataclass
+class StaticReport:
+    violations: List[Violation] = field(default_factory=list)
+    files: int = 0
+    duration_ms: float = 0.0
+
+    @property
+    def hard_failures(self) -> List[Violation]:
+        return [v for v in self.violations if v.severity == "error"]
+
+    @property
+    def passed(self) -> bool:
+        return not self.hard_failures
+
+    @property
+    def compliance_score(self) -> float:
+        """React Native Web compliance (1-10) from the distinct violations"""
+        penalty = sum(
+            PENALTIES[severity]
+            for _, _, severity in {
+                (v.rule, v.path, v.severity) for v in self.violations
+            }
+        )
+        return round(max(1.0, 10.0 - penalty), 1)
+
+    def summary(self, limit: int = 10) -> str:
+        lines = [
+            f"{v.path}:{v.line} [{v.rule}] {v.message}" for v in self.violations[:limit]
+        ]
+        if len(self.violations) > limit:
+            lines.append(f"... {len(self.violations) - limit} more")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "passed": self.passed,
+            "compliance_score": self.compliance_score,
+            "files": self.files,
+            "duration_ms": round(self.duration_ms, 2),
+            "violations": [asdict(v) for v in self.violations],
+        }
+
+
+class _ScanError(Exception):
+    def __init__(self, position: int, message: str):
+        super().__init__(message)
+        self.position = position
+
+
+class _Scanner:
+    """
+    Single pass over JS/JSX source: checks that brackets, strings, template
+    literals, comments, regex literals and JSX elements are well formed, and
+    collects the JSX tag names. Stops at the first problem (_ScanError).
+    """
+
+    def __init__(self, code: str, line_of: Callable[[int], int]):
+        self.code = code
+        self.line_of = line_of
+        self.length = len(code)
+        self.i = 0
+        self.previous: Optional[str] = (
+            None  # last significant token ("value" for names, literals, closers)
+        )
+        self.tags: List[Tuple[int, str]] = []
+
+    def scan(self) -> None:
+        self._code(None, 0)
+
+    def _skip(self, pattern: "re.Pattern[str]") -> str:
+        """Consumes pattern at the current position, which the caller knows it matches"""
+        match = pattern.match(self.code, self.i)
+        assert match is not None
+        self.i = match.end()
+        return match.group(0)
+
+    def _expression_position(self) -> bool:
+        return (
+            self.previous is None
+            or self.previous in _EXPRESSION_PUNCTUATION
+            or self.previous in _EXPRESSION_KEYWORDS
+        )
+
+    def _code(self, close: Optional[str], opened_at: int) -> None:
+        code = self.code
+        while self.i < self.length:
+            c = code[self.i]
+            if c.isspace():
+                self._skip(_SPACE_RE)
+            elif c == "/" and code.startswith("//", self.i):
+                end = code.find("\n", self.i)
+                self.i = self.length if end == -1 else end
+            elif c == "/" and code.startswith("/*", self.i):
+                end = code.find("*/", self.i + 2)
+                if end == -1:
+                    raise _ScanError(self.i, "unterminated comment")
+                self.i = end + 2
+            elif c in "'\"":
+                self._string(c)
+                self.previous = "value"
+            elif c == "`":
+                self._template()
+                self.previous = "value"
+            elif c in _CLOSERS:
+                start = self.i
+                self.i += 1
+                self.previous = c
+                self._code(_CLOSERS[c], start)
+                self.previous = "value"
+            elif c in ")]}":
+                if c != close:
+                    if close is None:
+                        raise _ScanError(self.i, f"unexpected '{c}'")
+                    raise _ScanError(
+                        self.i,
+                        f"'{c}' does not close the bracket opened at line {self.line_of(opened_at)}",
+                    )
+                self.i += 1
+                return
+            elif c == "/" and self._expression_position():
+                self._regex()
+                self.previous = "value"
+            elif c == "<" and self._expression_position() and self._starts_element():
+                self._element()
+                self.previous = "value"
+            elif c.isalpha() or c in "_$":
+                word = self._skip(_IDENTIFIER_RE)
+                # After "." a keyword is a property name (config.default, promise.catch)
+                keyword = word in _EXPRESSION_KEYWORDS and self.previous != "."
+                self.previous = word if keyword else "value"
+            elif c.isdigit():
+                self._skip(_NUMBER_RE)
+                self.previous = "value"
+            elif c in "+-" and code.startswith(c * 2, self.i):
+                # Postfix after a value (i++ / 2), prefix otherwise (++i)
+                self.i += 2
+                if self.previous != "value":
+                    self.previous = c
+            else:
+                self.i += 1
+                self.previous = c
+        if close is not None:
+            raise _ScanError(opened_at, f"'{code[opened_at]}' is never closed")
+
+    def _string(self, quote: str) -> None:
+        start = self.i
+        self.i += 1
+        while self.i < self.length:
+            c = self.code[self.i]
+            if c == "\\":
+                self.i += 2
+            elif c == quote:
+                self.i += 1
+                return
+            elif c == "\n":
+                break
+            else:
+                self.i += 1
+        raise _ScanError(start, "unterminated string")
+
+    def _template(self) -> None:
+        start = self.i
+        self.i += 1
+        while self.i < self.length:
+            c = self.code[self.i]
+            if c == "\\":
+                self.i += 2
+            elif c == "`":
+                self.i += 1
+                return
+            elif c == "$" and self.code.startswith("${", self.i):
+                opened = self.i + 1
+                self.i += 2
+                self.previous = "{"
+                self._code("}", opened)
+            else:
+                self.i += 1
+        raise _ScanError(start, "unterminated template literal")
+
+    def _regex(self) -> None:
+        start = self.i
+        self.i += 1
+        in_class = False
+        while self.i < self.length:
+            c = self.code[self.i]
+            if c == "\\":
+                self.i += 2
+                continue
+            if c == "\n":
+                break
+            self.i += 1
+            if c == "[":
+                in_class = True
+            elif c == "]":
+                in_class = False
+            elif c == "/" and not in_class:
+                flags = _IDENTIFIER_RE.match(self.code, self.i)
+                if flags:
+                    self.i = flags.end()
+                return
+        raise _ScanError(start, "unterminated regular expression")
+
+    def _starts_element(self) -> bool:
+        following = self.code[self.i + 1 : self.i + 2]
+        return following == ">" or following.isalpha() or following in ("_", "$")
+
+    def _element(self) -> None:
+        """JSX element starting at "<" (fragments included), up to its closing tag"""
+        start = self.i
+        self.i += 1
+        name_match = _TAG_NAME_RE.match(self.code, self.i)
+        name = name_match.group(0) if name_match else ""
+        if name_match:
+            self.i = name_match.end()
+            self.tags.append((start, name))
+        while self.i < self.length:
+            c = self.code[self.i]
+            if c.isspace():
+                self._skip(_SPACE_RE)
+            elif self.code.startswith("/>", self.i):
+                self.i += 2
+                return
+            elif c == ">":
+                self.i += 1
+                self._children(name, start)
+                return
+            elif c == "{":
+                opened = self.i
+                self.i += 1
+                self.previous = "{"
+                self._code("}", opened)
+            elif c in "'\"":
+                end = self.code.find(c, self.i + 1)
+                if end == -1:
+                    raise _ScanError(self.i, "unterminated attribute string")
+                self.i = end + 1
+            elif c == "=":
+                self.i += 1
+            else:
+                attribute = _ATTRIBUTE_RE.match(self.code, self.i)
+                if not attribute:
+                    raise _ScanError(self.i, f"unexpected '{c}' in <{name}>")
+                self.i = attribute.end()
+        raise _ScanError(start, f"<{name}> is never closed")
+
+    def _children(self, name: str, start: int) -> None:
+        while self.i < self.length:
+            c = self.code[self.i]
+            if c == "<" and self.code.startswith("</", self.i):
+                end = self.code.find(">", self.i)
+                if end == -1:
+                    raise _ScanError(self.i, f"unterminated closing tag of <{name}>")
+                closing = self.code[self.i + 2 : end].strip()
+                if closing != name:
+                    raise _ScanError(
+                        self.i,
+                        f"</{closing}> closes <{name}> opened at line {self.line_of(start)}",
+                    )
+                self.i = end + 1
+                return
+            elif c == "<":
+                self._element()
+            elif c == "{":
+                opened = self.i
+                self.i += 1
+                self.previous = "{"
+                self._code("}", opened)
+            else:
+                self._skip(_JSX_TEXT_RE)
+        raise _ScanError(start, f"<{name}> is never closed")
+
+
+def _line_finder(code: str) -> Callable[[int], int]:
+    newlines = [i for i, c in enumerate(code) if c == "\n"]
+    return lambda position: bisect.bisect_right(newlines, position - 1) + 1
+
+
+def _package_name(source: str) -> str:
+    parts = source.split("/")
+    return "/".join(parts[:2]) if source.startswith("@") else parts[0]
+
+
+def _is_forbidden(package: str) -> bool:
+    return any(
+        package == name or package.startswith(name + "/") for name in FORBIDDEN_PACKAGES
+    )
+
+
+def _analyze_file(
+    path: str, code: str, project: Dict[str, str], report: StaticReport
+) -> None:
+    line_of = _line_finder(code)
+
+    def add(rule: str, position: int, message: str, severity: str) -> None:
+        report.violations.append(
+            Violation(rule, path, line_of(position), message, severity)
+        )
+
+    for match in _IMPORT_RE.finditer(code):
+        source = match.group(1)
+        if source.startswith("."):
+            if not resolve_import(path, source, project):
+                add(
+                    "unresolved_import",
+                    match.start(),
+                    f"'{source}' is not a file of the project",
+                    "error",
+                )
+            continue
+        package = _package_name(source)
+        if _is_forbidden(package):
+            add(
+                "forbidden_import",
+                match.start(),
+                f"external package '{source}' is forbidden",
+                "error",
+            )
+        elif source == "react-native" or source.startswith("react-native/"):
+            add(
+                "react_native_import",
+                match.start(),
+                f"'{source}' must be imported from react-native-web",
+                "warning",
+            )
+        elif source not in ALLOWED_PACKAGES and package not in ALLOWED_PACKAGES:
+            add(
+                "external_import",
+                match.start(),
+                f"external package '{source}'",
+                "warning",
+            )
+
+    scanner = _Scanner(code, line_of)
+    try:
+        scanner.scan()
+    except _ScanError as e:
+        add("syntax", e.position, str(e), "error")
+    except RecursionError:
+        add("syntax", 0, "nesting too deep to analyze", "error")
+    for position, tag in scanner.tags:
+        if tag in HTML_COMPONENTS:
+            add(
+                "html_element",
+                position,
+                f"<{tag}> should be <{HTML_COMPONENTS[tag]}>",
+                "warning",
+            )
+
+
+def _root_file(project: Dict[str, str], name: str) -> Optional[str]:
+    for path in project:
+        if path.lstrip("/") == name:
+            return path
+    return None
+
+
+def analyze_project(project: Dict[str, str]) -> StaticReport:
+    """Static checks of a generated project (imports, index.js, HTML elements, syntax)"""
+    started = time.perf_counter()
+    report = StaticReport(files=len(project))
+    if not project:
+        report.violations.append(
+            Violation("empty_project", "", 0, "no file generated", "error")
+        )
+    else:
+        index = _root_file(project, "index.js")
+        if index is None:
+            report.violations.append(
+                Violation(
+                    "missing_index", "/index.js", 0, "index.js is missing", "error"
+                )
+            )
+        elif "createRoot" not in project[index] or not re.search(
+            r"import\s+App\s+from\s+['\"]\./App", project[index]
+        ):
+            report.violations.append(
+                Violation(
+                    "index_mismatch",
+                    index,
+                    1,
+                    "index.js does not render App with createRoot",
+                    "warning",
+                )
+            )
+        if _root_file(project, "App.js") is None:
+            report.violations.append(
+                Violation("missing_app", "/App.js", 0, "App.js is missing", "error")
+            )
+        if _root_file(project, "index.html") is not None:
+            report.violations.append(
+                Violation(
+                    "index_html",
+                    "/index.html",
+                    0,
+                    "index.html must not be generated",
+                    "warning",
+                )
+            )
+        for path, code in project.items():
+            if posixpath.splitext(path)[1] in (".js", ".jsx"):
+                _analyze_file(path, code, project, report)
+    report.duration_ms = (time.perf_counter() - started) * 1000
+    return report
+
+
+def analyze_projects(
+    projects: Sequence[Dict[str, str]], max_workers: Optional[int] = None
+) -> List[StaticReport]:
+    """
+    Reports of a batch of projects, in order. Large batches are spread over a
+    process pool (the analysis is CPU bound).
+    """
+    if max_workers == 1 or len(projects) < MIN_PARALLEL_BATCH:
+        return [analyze_project(project) for project in projects]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(
+            pool.map(analyze_project, projects, chunksize=max(1, len(projects) // 32))
+        )
@@ -5,6 +5,9 @@ from datetime import datetime
 class ProjectRequest(BaseModel):
     description: str
     features: Optional[str] = ""
+    use_cache: bool = True  # False to force a fresh generation
+    warm_start: bool = True  # Start from a similar, well-scored past project when one exists
+    idempotency_key: Optional[str] = None  # Retries with the same key get the same result
 
 class ProjectResponse(BaseModel):
     success: bool
@@ -24,11 +27,22 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    idempotency_key: Optional[str] = None  # Retries with the same key get the same result
+    delta: bool = False  # Return only the files changed by this message (project_delta) instead of updated_project
+    expected_version: Optional[int] = None  # Rejected with 409 when the project is no longer at this version
+
+class ProjectDelta(BaseModel):
+    base_version: int
+    version: int
+    added: Dict[str, str] = {}
+    changed: Dict[str, str] = {}
+    removed: List[str] = []
 
 class ChatResponse(BaseModel):
     success: bool
     message: str
     updated_project: Optional[Dict[str, str]] = None
+    project_delta: Optional[ProjectDelta] = None
     project_version: Optional[int] = None
     error: Optional[str] = None
 
@@ -36,13 +50,42 @@ class ProjectHistoryResponse(BaseModel):
     success: bool
     project_id: str
     chat_history: List[ChatMessage]
-    current_project: Dict[str, str]
+    current_project: Optional[Dict[str, str]] = None  # None when project_delta is sent instead
+    project_delta: Optional[ProjectDelta] = None
+    project_version: Optional[int] = None
+
+class ChatMessageEntry(BaseModel):
+    id: int  # Cursor of the message: pass the last one as `after` to read the next page
+    role: str
+    content: str
+    timestamp: Optional[datetime] = None
+
+class ChatMessagesPage(BaseModel):
+    success: bool
+    project_id: str
+    messages: List[ChatMessageEntry]
+    next_cursor: Optional[int] = None  # Cursor of the last message returned, None when the page is empty
+    has_more: bool = False
 
 class EvaluationRequest(BaseModel):
     test_cases: Optional[List[Dict[str, Any]]] = None
     use_default_cases: bool = True
+    use_cache: bool = True  # Reuse cached generations for unchanged test cases
+    concurrency: Optional[int] = None  # Test cases run at the same time (EVALUATION_CONCURRENCY by default)
+    use_judge_cache: Optional[bool] = None  # False to re-judge unchanged projects (JUDGE_CACHE_ENABLED by default)
+    judge_batch_tokens: Optional[int] = None  # Token budget of batched judge calls (JUDGE_BATCH_TOKEN_BUDGET by default, 0 = off)
 
 class EvaluationResponse(BaseModel):
     success: bool
     results: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+
+class EvaluationJobResponse(BaseModel):
+    success: bool
+    job_id: str
+    project_id: Optional[str] = None
+    status: str  # "pending", "running", "completed" or "failed"
+    evaluation: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    completed_at: Optional[str] = None
@@ -1,87 +1,287 @@
-import json
+import asyncio
+import atexit
 import logging
-from typing import Dict, Any, List, Optional
-from app.models.schemas import ChatMessage, ChatResponse
-from app.agents.chat_modification_agent import chat_modification_agent, create_modification_task
-from crewai import Crew
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+from app.models.schemas import ChatMessage, ChatResponse, ProjectDelta
+from app.agents.chat_modification_agent import (
+    chat_modification_agent,
+    create_modification_task,
+    create_patch_task,
+    create_file_rewrite_task,
+)
+from app.services.worker_pool import llm_pool, PoolSaturatedError
+from app.services.project_parser import parse_project_output
+from app.services.single_flight import single_flight, payload_key
+from app.services.token_accounting import usage_tags
+from app.services.project_patch import apply_project_patch
+from app.services.metrics import metrics
+from app.services.project_index import ProjectIndex
+from app.services.project_store import ProjectStore, VersionConflictError, VersionInfo, create_project_store, manifest_etag
+from app.config.settings import (
+    CHAT_PATCH_MODE,
+    CHAT_CONTEXT_FILTER,
+    CHAT_CONTEXT_MAX_FILES,
+    CHAT_CONTEXT_MIN_FILES,
+    CHAT_DEBOUNCE_SECONDS,
+)
+from crewai import Crew, Task
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class _ChatBatch:
+    """Messages d'un projet en attente d'être appliqués ensemble"""
+    expected_version: Optional[int]
+    messages: List[str]
+    future: "asyncio.Future[ChatResponse]"
+
 class ProjectChatService:
-    def __init__(self):
-        # En mémoire pour cette implémentation - en production, utiliser une base de données
-        self.projects_store: Dict[str, Dict[str, Any]] = {}
-        self.chat_history: Dict[str, List[ChatMessage]] = {}
+    # Index de projet gardés en mémoire (les moins récemment utilisés sont libérés)
+    MAX_INDEXES = 64
+    
+    def __init__(self, store: Optional[ProjectStore] = None):
+        # Projets et historiques dans le store configuré (SQLite partagé entre workers par défaut)
+        self.store = store if store is not None else create_project_store()
+        # Index de la dernière version des projets récemment modifiés : (version, index)
+        self.project_indexes: "OrderedDict[str, Tuple[int, ProjectIndex]]" = OrderedDict()
+        # Verrou par projet et nombre de messages qui l'utilisent ou l'attendent
+        self._project_locks: Dict[str, List[Any]] = {}
+        # Fenêtre de regroupement des messages rapprochés (0 : chaque message est traité seul)
+        self.debounce_seconds = CHAT_DEBOUNCE_SECONDS
+        self._chat_batches: Dict[str, _ChatBatch] = {}
     
     def store_project(self, project_id: str, project_data: Dict[str, str]) -> None:
         """Stocke un projet généré"""
-        self.projects_store[project_id] = {
-            "current_project": project_data,
-            "version": 1
-        }
-        # Initialiser l'historique de chat
-        if project_id not in self.chat_history:
-            self.chat_history[project_id] = []
-        
+        self.store.save_project(project_id, project_data)
+        self.project_indexes.pop(project_id, None)
         logger.info(f"Projet {project_id} stocké avec {len(project_data)} fichiers")
     
     def get_project(self, project_id: str) -> Optional[Dict[str, str]]:
         """Récupère le projet actuel par ID"""
-        if project_id in self.projects_store:
-            return self.projects_store[project_id]["current_project"]
-        return None
+        stored = self.store.get_project(project_id)
+        return stored[0] if stored is not None else None
+    
+    def get_project_version(self, project_id: str, version: int) -> Optional[Dict[str, str]]:
+        """Récupère une version antérieure d'un projet"""
+        stored = self.store.get_project(project_id, version)
+        return stored[0] if stored is not None else None
+    
+    def current_version(self, project_id: str) -> Optional[int]:
+        """Numéro de la version actuelle d'un projet (None s'il n'existe pas)"""
+        return self.store.get_version(project_id)
+    
+    def project_etag(self, project_id: str) -> Optional[Tuple[str, int]]:
+        """ETag et numéro de la version actuelle d'un projet"""
+        stored = self.store.get_manifest(project_id)
+        return (manifest_etag(*stored), stored[1]) if stored is not None else None
+    
+    def get_project_delta(self, project_id: str, since_version: int,
+                          version: Optional[int] = None) -> Optional[ProjectDelta]:
+        """
+        Fichiers ajoutés, modifiés et supprimés depuis since_version (None si
+        l'une des versions n'existe pas : le client doit recharger le projet entier)
+        """
+        delta = self.store.get_delta(project_id, since_version, version)
+        if delta is None:
+            return None
+        return ProjectDelta(
+            base_version=delta.base_version,
+            version=delta.version,
+            added=delta.added,
+            changed=delta.changed,
+            removed=delta.removed
+        )
+    
+    def list_versions(self, project_id: str) -> List[VersionInfo]:
+        """Versions d'un projet, de la première à l'actuelle"""
+        return self.store.list_versions(project_id)
+    
+    def revert_project(self, project_id: str, version: int, expected_version: Optional[int] = None) -> ChatResponse:
+        """
+        Restaure une version antérieure sans appel au LLM : la version restaurée
+        devient une nouvelle version, l'historique reste linéaire
+        (VersionNotFoundError si le projet ou la version n'existe pas)
+        """
+        try:
+            new_version = self.store.revert_project(project_id, version, expected_version)
+        except VersionConflictError as e:
+            return self._conflict_response(e.current_version)
+        message = f"↩️ Projet restauré à la version {version}."
+        self.add_message_to_history(project_id, ChatMessage(role="assistant", content=message))
+        logger.info(f"Projet {project_id} restauré à la version {version} (nouvelle version {new_version})")
+        return ChatResponse(
+            success=True,
+            message=message,
+            updated_project=self.get_project_version(project_id, new_version),
+            project_version=new_version
+        )
     
     def get_chat_history(self, project_id: str) -> List[ChatMessage]:
         """Récupère l'historique des messages d'un projet"""
-        return self.chat_history.get(project_id, [])
+        return self.store.get_history(project_id)
+    
+    def get_messages(self, project_id: str, after: int = 0, limit: int = 50) -> Tuple[List[Tuple[int, ChatMessage]], bool]:
+        """Page de l'historique après le curseur after, et s'il reste des messages ensuite"""
+        messages = self.store.get_messages(project_id, after, limit + 1)
+        return messages[:limit], len(messages) > limit
     
     def add_message_to_history(self, project_id: str, message: ChatMessage) -> None:
         """Ajoute un message à l'historique"""
-        if project_id not in self.chat_history:
-            self.chat_history[project_id] = []
-        self.chat_history[project_id].append(message)
+        self.store.append_message(project_id, message)
+    
+    async def process_chat_message(self, project_id: str, user_message: str,
+                                   idempotency_key: Optional[str] = None, delta: bool = False,
+                                   expected_version: Optional[int] = None) -> ChatResponse:
+        """
+        Traite un message utilisateur ; un message identique déjà en cours pour
+        la même version du projet (double clic, nouvel essai du client) ou une
+        clé d'idempotence déjà vue réutilise le même résultat au lieu de relancer le LLM.
+        Avec delta, la réponse ne contient que les fichiers changés par ce message.
+        Avec expected_version, le message est refusé (VERSION_CONFLICT) si le projet
+        n'est plus à cette version, avant tout appel au LLM
+        """
+        version = self.store.get_version(project_id)
+        response = await single_flight.do(
+            [payload_key("chat", [project_id, version, expected_version, user_message])],
+            lambda: self._process_chat_message(project_id, user_message, expected_version),
+            idempotency_key,
+            is_success=lambda response: response.success,
+            scope=("chat", project_id)
+        )
+        if delta and response.success and response.project_version:
+            project_delta = self.get_project_delta(project_id, response.project_version - 1, response.project_version)
+            if project_delta is not None:
+                response = response.model_copy(update={"updated_project": None, "project_delta": project_delta})
+        return response
+    
+    async def _process_chat_message(self, project_id: str, user_message: str,
+                                    expected_version: Optional[int] = None) -> ChatResponse:
+        """
+        Les messages d'un même projet sont appliqués l'un après l'autre, chacun
+        sur la version produite par le précédent ; les projets différents restent en parallèle.
+        Avec une fenêtre de regroupement, les messages reçus pendant la fenêtre (ou
+        pendant l'attente du verrou) sont appliqués ensemble, en une seule modification
+        """
+        if self.debounce_seconds <= 0:
+            async with self._project_lock(project_id):
+                return await self._apply_chat_message(project_id, [user_message], expected_version)
+        
+        batch = self._chat_batches.get(project_id)
+        if batch is not None and batch.expected_version == expected_version:
+            batch.messages.append(user_message)
+            metrics.inc("chat_messages_coalesced")
+            return await asyncio.shield(batch.future)
+        
+        batch = _ChatBatch(expected_version, [user_message], asyncio.get_running_loop().create_future())
+        # Évite l'avertissement « exception never retrieved » quand personne n'a rejoint le lot
+        batch.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._chat_batches[project_id] = batch
+        try:
+            await asyncio.sleep(self.debounce_seconds)
+            async with self._project_lock(project_id):
+                # Les messages suivants ouvriront un nouveau lot
+                if self._chat_batches.get(project_id) is batch:
+                    del self._chat_batches[project_id]
+                response = await self._apply_chat_message(project_id, batch.messages, expected_version)
+        except asyncio.CancelledError:
+            batch.future.cancel()
+            raise
+        except BaseException as e:
+            batch.future.set_exception(e)
+            raise
+        finally:
+            if self._chat_batches.get(project_id) is batch:
+                del self._chat_batches[project_id]
+        batch.future.set_result(response)
+        return response
+    
+    @staticmethod
+    def _merge_instructions(user_messages: List[str]) -> str:
+        """Une seule demande pour l'agent à partir des messages regroupés"""
+        if len(user_messages) == 1:
+            return user_messages[0]
+        steps = "\n".join(f"{i}. {message}" for i, message in enumerate(user_messages, 1))
+        return f"Applique toutes les demandes suivantes, dans l'ordre :\n{steps}"
+    
+    @asynccontextmanager
+    async def _project_lock(self, project_id: str):
+        entry = self._project_locks.get(project_id)
+        if entry is None:
+            entry = self._project_locks[project_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        started = time.perf_counter()
+        try:
+            async with entry[0]:
+                metrics.observe("chat_project_lock_wait_seconds", time.perf_counter() - started)
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._project_locks[project_id]
+    
+    def _conflict_response(self, current_version: int) -> ChatResponse:
+        metrics.inc("chat_version_conflicts")
+        return ChatResponse(
+            success=False,
+            message=f"Le projet a été modifié entre-temps (version actuelle : {current_version}). "
+                    "Rechargez-le avant de renvoyer votre demande.",
+            project_version=current_version,
+            error="VERSION_CONFLICT"
+        )
     
-    async def process_chat_message(self, project_id: str, user_message: str) -> ChatResponse:
+    async def _apply_chat_message(self, project_id: str, user_messages: List[str],
+                                  expected_version: Optional[int] = None) -> ChatResponse:
         """
-        Traite un message utilisateur et modifie le projet si nécessaire
+        Traite les messages utilisateur (un seul, sauf regroupement) et modifie le projet si nécessaire
         
         Args:
             project_id: ID du projet à modifier
-            user_message: Message de l'utilisateur
+            user_messages: Messages de l'utilisateur, dans l'ordre de réception
+            expected_version: Version sur laquelle le client a basé sa demande
             
         Returns:
             ChatResponse: Réponse avec le projet modifié ou un message d'erreur
         """
         try:
             # Vérifier que le projet existe
-            current_project = self.get_project(project_id)
-            if not current_project:
+            stored = self.store.get_project(project_id)
+            if not stored:
                 return ChatResponse(
                     success=False,
                     message="Projet non trouvé. Veuillez d'abord générer un projet.",
                     error="PROJECT_NOT_FOUND"
                 )
             
-            # Ajouter le message utilisateur à l'historique
-            user_msg = ChatMessage(role="user", content=user_message)
-            self.add_message_to_history(project_id, user_msg)
+            current_project, version = stored
+            if expected_version is not None and expected_version != version:
+                return self._conflict_response(version)
             
-            logger.info(f"Traitement du message pour le projet {project_id}: {user_message}")
-            
-            # Créer la tâche de modification
-            modification_task = create_modification_task(user_message, current_project)
-            crew = Crew(agents=[chat_modification_agent], tasks=[modification_task], verbose=True)
+            # Ajouter chaque message utilisateur à l'historique
+            for user_message in user_messages:
+                self.add_message_to_history(project_id, ChatMessage(role="user", content=user_message))
+            user_message = self._merge_instructions(user_messages)
             
-            # Exécuter la modification
-            result = crew.kickoff()
-            result_str = str(result.output).strip() if hasattr(result, "output") else str(result).strip()
+            logger.info(f"Traitement du message pour le projet {project_id}: {user_message}")
             
-            # Extraire le JSON modifié
-            modified_project = self._extract_json_from_output(result_str)
+            # Exécuter la modification sur le pool de workers LLM
+            with usage_tags(endpoint="chat", project_id=project_id):
+                if CHAT_PATCH_MODE:
+                    modified_project = await self._modify_with_patch(project_id, version, user_message, current_project)
+                else:
+                    result_str = await llm_pool.run(self._run_modification_crew, user_message, current_project)
+                    # Extraire le JSON modifié ; une sortie tronquée perdrait les fichiers
+                    # après la coupure, elle n'est jamais enregistrée comme nouvelle version
+                    modified_project, incomplete = parse_project_output(result_str)
+                    if incomplete:
+                        raise ValueError("sortie de l'agent tronquée, projet inchangé")
             
-            # Mettre à jour le projet stocké
-            self.projects_store[project_id]["current_project"] = modified_project
-            self.projects_store[project_id]["version"] += 1
+            # Mettre à jour le projet stocké (incrément de version atomique, refusé si
+            # un autre worker a modifié le projet pendant l'appel au LLM)
+            new_version = self.store.update_project(project_id, modified_project, expected_version=version)
             
             # Générer une réponse utilisateur amicale
             bot_response = self._generate_friendly_response(user_message, modified_project)
@@ -94,9 +294,20 @@ class ProjectChatService:
                 success=True,
                 message=bot_response,
                 updated_project=modified_project,
-                project_version=self.projects_store[project_id]["version"]
+                project_version=new_version
             )
             
+        except VersionConflictError as e:
+            response = self._conflict_response(e.current_version)
+            self.add_message_to_history(project_id, ChatMessage(role="assistant", content=response.message))
+            return response
+        except PoolSaturatedError as e:
+            bot_msg = ChatMessage(
+                role="assistant",
+                content=f"Le service est saturé, veuillez réessayer dans {e.retry_after} secondes."
+            )
+            self.add_message_to_history(project_id, bot_msg)
+            raise
         except ValueError as e:
             error_msg = f"Erreur lors de la modification : {str(e)}"
             bot_msg = ChatMessage(role="assistant", content=error_msg)
@@ -120,22 +331,89 @@ class ProjectChatService:
                 error="INTERNAL_ERROR"
             )
     
-    def _extract_json_from_output(self, output_str: str) -> Dict[str, str]:
-        """Extrait le JSON de la sortie de l'agent"""
-        try:
-            output_str = output_str.strip()
-            first_brace = output_str.find("{")
-            last_brace = output_str.rfind("}")
-            if first_brace == -1 or last_brace == -1:
-                raise ValueError("Aucun JSON détecté dans la sortie de modification")
-            json_str = output_str[first_brace:last_brace+1]
-            return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur de parsing JSON : {e}")
-            raise ValueError(f"JSON invalide retourné par l'agent : {e}")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'extraction JSON : {e}")
-            raise ValueError(f"Erreur d'extraction JSON : {e}")
+    def select_context(self, project_id: str, version: int, user_message: str,
+                       current_project: Dict[str, str]) -> Tuple[Dict[str, str], str]:
+        """
+        Fichiers envoyés en entier à l'agent et résumé des autres : les fichiers
+        concernés par le message, leurs imports directs et les fichiers qui les importent
+        """
+        if not CHAT_CONTEXT_FILTER or len(current_project) < CHAT_CONTEXT_MIN_FILES:
+            return current_project, ""
+        cached = self.project_indexes.get(project_id)
+        if cached is not None and cached[0] == version:
+            index = cached[1]
+            self.project_indexes.move_to_end(project_id)
+        else:
+            index = ProjectIndex(current_project)
+            self.project_indexes[project_id] = (version, index)
+            self.project_indexes.move_to_end(project_id)
+            while len(self.project_indexes) > self.MAX_INDEXES:
+                self.project_indexes.popitem(last=False)
+        selection = index.select(user_message, max_files=CHAT_CONTEXT_MAX_FILES)
+        if not selection.filtered:
+            return current_project, ""
+        logger.info(f"Contexte filtré : {len(selection.files)}/{len(current_project)} fichiers ({', '.join(selection.matched)})")
+        metrics.inc("chat_context_files_sent", len(selection.files))
+        metrics.inc("chat_context_files_summarized", len(selection.others))
+        return {path: current_project[path] for path in selection.files}, index.manifest(selection.others)
+    
+    async def _modify_with_patch(self, project_id: str, version: int, user_message: str,
+                                 current_project: Dict[str, str]) -> Dict[str, str]:
+        """
+        Demande uniquement les changements à l'agent et les applique à la version stockée ;
+        les fichiers dont les blocs ne s'appliquent pas sont redemandés en entier
+        """
+        context, manifest = self.select_context(project_id, version, user_message, current_project)
+        result_str = await llm_pool.run(self._run_crew, create_patch_task(user_message, context, manifest))
+        changes, incomplete = parse_project_output(result_str)
+        applicable = dict(changes)
+        cut_path = None
+        if incomplete:
+            # Sortie tronquée : la dernière entrée peut être un bloc coupé, ou un ""
+            # qui supprimerait le fichier ; elle passe par la réécriture complète
+            cut_path = next(reversed(changes))
+            del applicable[cut_path]
+            logger.warning(f"Sortie de patch tronquée, {cut_path} redemandé en entier")
+        result = apply_project_patch(current_project, applicable)
+        if cut_path is not None:
+            result.failed[cut_path] = "sortie tronquée"
+        metrics.inc("chat_patch_files_patched", len(result.patched))
+        metrics.inc("chat_patch_files_replaced", len(result.replaced))
+        logger.info(
+            f"Patch appliqué : {len(result.patched)} fichiers modifiés, {len(result.replaced)} remplacés, "
+            f"{len(result.deleted)} supprimés, {len(result.failed)} en échec"
+        )
+        if not result.failed:
+            return result.project
+        
+        # Repli : code complet pour les seuls fichiers en échec
+        logger.warning(f"Blocs non applicables, fichiers redemandés en entier : {result.failed}")
+        metrics.inc("chat_patch_fallback_files", len(result.failed))
+        failed_changes = {path: changes[path] for path in result.failed}
+        rewrite_context = {**context, **{path: current_project[path] for path in result.failed if path in current_project}}
+        rewrite_str = await llm_pool.run(
+            self._run_crew, create_file_rewrite_task(user_message, rewrite_context, failed_changes, manifest)
+        )
+        rewrites, incomplete = parse_project_output(rewrite_str)
+        if incomplete:
+            # Le dernier fichier a pu être coupé : il reste inchangé
+            rewrites.pop(next(reversed(rewrites)))
+        for path in result.failed:
+            if rewrites.get(path):
+                result.project[path] = rewrites[path]
+            else:
+                logger.warning(f"Aucun code complet reçu pour {path}, fichier inchangé")
+        return result.project
+    
+    def _run_modification_crew(self, user_message: str, current_project: Dict[str, str]) -> str:
+        """Exécute le crew de modification (bloquant, lancé sur le pool de workers)"""
+        return self._run_crew(create_modification_task(user_message, current_project))
+    
+    def _run_crew(self, task: Task) -> str:
+        """Exécute une tâche de l'agent de modification (bloquant, lancé sur le pool de workers)"""
+        crew = Crew(agents=[chat_modification_agent], tasks=[task], verbose=True)
+        result = crew.kickoff()
+        return str(result.output).strip() if hasattr(result, "output") else str(result).strip()
     
     def _generate_friendly_response(self, user_message: str, modified_project: Dict[str, str]) -> str:
         """Génère une réponse amicale pour l'utilisateur"""
@@ -156,4 +434,6 @@ class ProjectChatService:
             return "✅ Modification appliquée avec succès ! Vérifiez l'aperçu pour voir les changements."
 
 # Instance globale du service
-project_chat_service = ProjectChatService()
\ No newline at end of file
+project_chat_service = ProjectChatService()
+# Écrire les messages encore en tampon à l'arrêt
+atexit.register(project_chat_service.store.close)
@@ -0,0 +1,81 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from app.config.settings import EVALUATION_MAX_WORKERS, EVALUATION_MAX_JOBS
+from app.services.token_accounting import usage_tags
+
+logger = logging.getLogger(__name__)
+
+class EvaluationJobManager:
+    """
+    Runs project evaluations in the background and keeps their status.
+
+    Jobs go through pending -> running -> completed | failed. Only the most
+    recent max_jobs jobs are kept; the oldest finished ones are dropped first.
+    """
+
+    def __init__(self, max_workers: int, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="evaluation")
+        self._lock = threading.Lock()
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def submit(self, project_id: str, evaluate: Callable[..., Dict[str, Any]], *args: Any) -> str:
+        """Queue evaluate(*args) for project_id and return the job ID"""
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "project_id": project_id,
+            "status": "pending",
+            "evaluation": None,
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "completed_at": None,
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+            self._trim()
+        self._executor.submit(self._run, job, evaluate, *args)
+        logger.info(f"Evaluation job {job_id} queued for project {project_id}")
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _run(self, job: Dict[str, Any], evaluate: Callable[..., Dict[str, Any]], *args: Any) -> None:
+        with self._lock:
+            job["status"] = "running"
+        try:
+            with usage_tags(endpoint="evaluation", project_id=job["project_id"], evaluation_run=job["job_id"]):
+                evaluation = evaluate(*args)
+        except Exception as e:
+            logger.error(f"Evaluation job {job['job_id']} failed: {e}")
+            self._finish(job, status="failed", error=str(e))
+        else:
+            self._finish(job, status="completed", evaluation=evaluation)
+
+    def _finish(self, job: Dict[str, Any], status: str, **fields: Any) -> None:
+        # The whole update is made under the lock, status last: a finished job
+        # is never seen without its result or completed_at
+        with self._lock:
+            job.update(fields)
+            job["completed_at"] = datetime.now().isoformat()
+            job["status"] = status
+
+    def _trim(self) -> None:
+        if len(self.jobs) <= self.max_jobs:
+            return
+        for job_id in list(self.jobs.keys()):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id]["status"] in ("completed", "failed"):
+                del self.jobs[job_id]
+
+# Global job manager
+evaluation_jobs = EvaluationJobManager(EVALUATION_MAX_WORKERS, EVALUATION_MAX_JOBS)
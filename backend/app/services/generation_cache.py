@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from app.config.settings import GENERATION_CACHE_MAX_BYTES, GENERATION_CACHE_DIR
+from app.agents.frontend_generator_agent import frontend_generator_agent, PROMPT_VERSION
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def normalize_request_text(text: Optional[str]) -> str:
+    """Case and whitespace insensitive form of a description or feature list"""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+def project_size(project: Dict[str, str]) -> int:
+    """Bytes taken by the paths and contents of a project"""
+    return sum(len(path.encode("utf-8")) + len(code.encode("utf-8")) for path, code in project.items())
+
+class TwoTierJsonCache:
+    """
+    Two-tier cache of JSON values, shared by the generation and judge caches.
+
+    The memory tier is an LRU bounded by the total size of its entries (as
+    given by _size(), one per entry by default); the optional disk tier keeps
+    one JSON file per key and survives restarts. Disk hits are promoted to
+    memory. Hits, misses and evictions are counted under metrics_prefix.
+    """
+
+    metrics_prefix = "cache"
+    size_gauge = "entries"
+
+    def __init__(self, max_size: int, directory: Optional[str] = None):
+        self.max_size = max_size
+        self.directory = Path(directory) if directory else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._size_total = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                metrics.inc(f"{self.metrics_prefix}_hits")
+                metrics.inc(f"{self.metrics_prefix}_memory_hits")
+                return self._copy(entry[0])
+
+        value = self._read_disk(key)
+        if value is None:
+            metrics.inc(f"{self.metrics_prefix}_misses")
+            return None
+        metrics.inc(f"{self.metrics_prefix}_hits")
+        metrics.inc(f"{self.metrics_prefix}_disk_hits")
+        self._put_memory(key, value)
+        return self._copy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        value = self._copy(value)
+        self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def _size(self, value: Any) -> int:
+        return 1
+
+    def _copy(self, value: Any) -> Any:
+        """Independent copy, so callers never share a cached value"""
+        return json.loads(json.dumps(value))
+
+    def _put_memory(self, key: str, value: Any) -> None:
+        size = self._size(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_total -= previous[1]
+            self._entries[key] = (value, size)
+            self._size_total += size
+            while self._size_total > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size_total -= evicted_size
+                metrics.inc(f"{self.metrics_prefix}_evictions")
+            metrics.set_gauge(f"{self.metrics_prefix}_{self.size_gauge}", self._size_total)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Any]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable {self.metrics_prefix} entry {path}: {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial entry
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, delete=False, suffix=".tmp") as f:
+                json.dump(value, f, ensure_ascii=False)
+                temp_path = f.name
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write {self.metrics_prefix} entry {path}: {e}")
+
+class GenerationCache(TwoTierJsonCache):
+    """Generated projects, the memory tier bounded by the size of the cached files"""
+
+    metrics_prefix = "generation_cache"
+    size_gauge = "bytes"
+
+    def __init__(self, max_bytes: int, directory: Optional[str] = None):
+        super().__init__(max_bytes, directory)
+
+    @property
+    def max_bytes(self) -> int:
+        return self.max_size
+
+    @staticmethod
+    def make_key(description: str, features: str, model_name: str, prompt_version: str) -> str:
+        payload = json.dumps([
+            normalize_request_text(description),
+            normalize_request_text(features),
+            model_name,
+            prompt_version,
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size_total,
+                "max_bytes": self.max_size,
+                "hits": metrics.counter("generation_cache_hits"),
+                "misses": metrics.counter("generation_cache_misses"),
+            }
+
+    def _size(self, project: Dict[str, str]) -> int:
+        return project_size(project)
+
+    def _copy(self, project: Dict[str, str]) -> Dict[str, str]:
+        return dict(project)
+
+def generation_cache_key(description: str, features: Optional[str]) -> str:
+    """Cache key of a generation request for the current model and prompt"""
+    return GenerationCache.make_key(
+        description,
+        features or "",
+        frontend_generator_agent.llm.model_name,
+        PROMPT_VERSION
+    )
+
+# Global cache
+generation_cache = GenerationCache(GENERATION_CACHE_MAX_BYTES, GENERATION_CACHE_DIR)
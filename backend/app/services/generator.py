@@ -1,32 +1,27 @@
 import json
 import logging
+import time
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.models.schemas import ProjectRequest, ProjectResponse
-from app.agents.frontend_generator_agent import frontend_generator_agent, create_react_native_web_task
+from app.agents.frontend_generator_agent import frontend_generator_agent, create_react_native_web_task, create_warm_start_task
 from crewai import Crew
 from app.services.chat_service import project_chat_service
 from app.evaluation.simple_evaluator import SimpleFrontendEvaluator
+from app.services.worker_pool import llm_pool, PoolSaturatedError
+from app.services.evaluation_jobs import evaluation_jobs
+from app.services.project_parser import IncrementalProjectParser, parse_project_output
+from app.services.metrics import metrics
+from app.services.generation_cache import generation_cache, generation_cache_key
+from app.services.similarity_index import similarity_index
+from app.services.single_flight import single_flight, payload_key
+from app.services.token_accounting import usage_tags
+from app.config.settings import WARM_START_THRESHOLD
 import uuid
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
-def extract_json_from_output(output_str: str):
-    try:
-        output_str = output_str.strip()
-        first_brace = output_str.find("{")
-        last_brace = output_str.rfind("}")
-        if first_brace == -1 or last_brace == -1:
-            raise ValueError("Aucun JSON détecté dans la sortie")
-        json_str = output_str[first_brace:last_brace+1]
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        logger.error(f"Erreur de parsing JSON : {e}")
-        raise ValueError(f"JSON invalide : {e}")
-    except Exception as e:
-        logger.error(f"Erreur lors de l'extraction JSON : {e}")
-        raise ValueError(f"Erreur d'extraction : {e}")
-
 def evaluate_project_sync(project_data: dict, test_case: dict) -> dict:
     """
     Synchronous evaluation function to run in thread pool
@@ -67,6 +62,9 @@ def evaluate_project_sync(project_data: dict, test_case: dict) -> dict:
                 mlflow.log_metric("code_quality", evaluation_result["code_quality"])
                 mlflow.log_metric("requirements_fulfillment", evaluation_result["requirements_fulfillment"])
                 mlflow.log_metric("compliance", evaluation_result["compliance"])
+                if "static_analysis" in evaluation_result:
+                    mlflow.log_metric("static_compliance", evaluation_result["static_analysis"]["compliance_score"])
+                    mlflow.log_metric("judge_skipped", int(evaluation_result["judge_skipped"]))
                 
                 # Log feedback as text
                 mlflow.log_text(evaluation_result["feedback"], "evaluation_feedback.txt")
@@ -89,87 +87,286 @@ def evaluate_project_sync(project_data: dict, test_case: dict) -> dict:
             "feedback": f"Evaluation failed: {str(e)}"
         }
 
-async def evaluate_project_async(project_data: dict, description: str, features: str) -> dict:
+def evaluate_generated_project(project_data: dict, description: str, features: str) -> dict:
     """
-    Asynchronous wrapper for project evaluation
+    Background evaluation job: score the project and shape the result for clients
     """
     test_case = {
         "description": description,
         "features": features
     }
+    evaluation_result = evaluate_project_sync(project_data, test_case)
+    logger.info(f"Project evaluated - Score: {evaluation_result['overall_score']:.2f}/10")
     
-    # Run evaluation in thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    with ThreadPoolExecutor(max_workers=1) as executor:
-        evaluation_result = await loop.run_in_executor(
-            executor, 
-            evaluate_project_sync, 
-            project_data, 
-            test_case
-        )
+    # Well-scored projects become warm-start bases for similar requests
+    similarity_index.add(
+        generation_cache_key(description, features),
+        description,
+        features,
+        project_data,
+        evaluation_result.get("weighted_score", evaluation_result["overall_score"])
+    )
     
-    return evaluation_result
+    return {
+        "overall_score": evaluation_result["overall_score"],
+        "weighted_score": evaluation_result.get("weighted_score", evaluation_result["overall_score"]),
+        "code_quality": evaluation_result["code_quality"],
+        "requirements_fulfillment": evaluation_result["requirements_fulfillment"],
+        "compliance": evaluation_result["compliance"],
+        "feedback": evaluation_result["feedback"],
+        "weights_info": "Requirements: 50%, Code Quality: 25%, Compliance: 25%"  # Info for users
+    }
 
-async def generate_react_project(request: ProjectRequest) -> ProjectResponse:
-    try:
-        logger.info(f"Génération d'un projet React pour : {request.description}")
-        
-        # Generate the project
-        task = create_react_native_web_task(request.description, request.features)
-        crew = Crew(agents=[frontend_generator_agent], tasks=[task], verbose=True)
-        result = crew.kickoff()
-        result_str = str(result.output).strip() if hasattr(result, "output") else str(result).strip()
-        project_data = extract_json_from_output(result_str)
-        
-        # Generate unique project ID and store the project
-        project_id = str(uuid.uuid4())
-        project_chat_service.store_project(project_id, project_data)
-        
-        # Automatically evaluate the generated project
-        logger.info("Starting automatic evaluation of generated project...")
-        
+def run_generation_crew(description: str, features: str = "") -> str:
+    """
+    Blocking crew run, executed on the LLM worker pool
+    """
+    task = create_react_native_web_task(description, features)
+    crew = Crew(agents=[frontend_generator_agent], tasks=[task], verbose=True)
+    result = crew.kickoff()
+    return str(result.output).strip() if hasattr(result, "output") else str(result).strip()
+
+def run_warm_start_crew(description: str, features: str, base: dict) -> Tuple[Dict[str, str], bool]:
+    """
+    Blocking crew run adapting a similar past project, executed on the LLM worker pool;
+    returns the project and whether the output was truncated
+    """
+    task = create_warm_start_task(description, features, base["description"], base["project"])
+    crew = Crew(agents=[frontend_generator_agent], tasks=[task], verbose=True)
+    result = crew.kickoff()
+    result_str = str(result.output).strip() if hasattr(result, "output") else str(result).strip()
+    changes, incomplete = parse_project_output(result_str)
+    
+    # Only added/modified files are returned, an empty content deletes the file
+    project_data = dict(base["project"])
+    for file_path, file_content in changes.items():
+        if file_content.strip():
+            project_data[file_path] = file_content
+        else:
+            project_data.pop(file_path, None)
+    logger.info(f"Warm start: {len(changes)} files changed out of {len(project_data)}")
+    return project_data, incomplete
+
+def _store_and_evaluate(request: ProjectRequest, project_data: Dict[str, str], project_id: str) -> dict:
+    """
+    Store a generated project for chat and queue its background evaluation
+    """
+    project_chat_service.store_project(project_id, project_data)
+    
+    # The score is available later from /api/evaluation/jobs/{job_id}
+    job_id = evaluation_jobs.submit(
+        project_id,
+        evaluate_generated_project,
+        project_data,
+        request.description,
+        request.features or ""
+    )
+    return {
+        "status": "pending",
+        "job_id": job_id,
+        "status_url": f"/api/evaluation/jobs/{job_id}"
+    }
+
+async def generate_react_project(request: ProjectRequest, idempotency_key: Optional[str] = None) -> ProjectResponse:
+    """
+    Identical concurrent requests, and retries carrying the same idempotency
+    key, share a single generation
+    """
+    payload = request.model_dump(exclude={"idempotency_key"})
+    return await single_flight.do(
+        [payload_key("generate", payload)],
+        lambda: _generate_react_project(request),
+        idempotency_key or request.idempotency_key,
+        is_success=lambda response: response.success,
+        scope=("generate",)
+    )
+
+async def _generate_react_project(request: ProjectRequest) -> ProjectResponse:
+    # The ID is known up front so that the LLM calls can be accounted to the project
+    project_id = str(uuid.uuid4())
+    with usage_tags(endpoint="generate-project", project_id=project_id):
         try:
-            evaluation_result = await evaluate_project_async(
-                project_data, 
-                request.description, 
-                request.features or ""
-            )
+            logger.info(f"Génération d'un projet React pour : {request.description}")
             
-            logger.info(f"Project evaluated - Score: {evaluation_result['overall_score']:.2f}/10")
+            cache_key = generation_cache_key(request.description, request.features)
+            project_data = generation_cache.get(cache_key) if request.use_cache else None
+            cached = project_data is not None
+            
+            warm_start = None
+            if cached:
+                logger.info("Projet servi depuis le cache de génération")
+            else:
+                # A caller bypassing the caches gets a fresh generation, not a reused project
+                base = similarity_index.query(
+                    request.description, request.features or "", WARM_START_THRESHOLD
+                ) if request.warm_start and request.use_cache else None
+                
+                # Generate the project off the event loop
+                if base is not None:
+                    logger.info(f"Warm start depuis '{base['description']}' (similarité {base['similarity']:.2f})")
+                    project_data, incomplete = await llm_pool.run(
+                        run_warm_start_crew, request.description, request.features or "", base
+                    )
+                    warm_start = {"base_description": base["description"], "similarity": base["similarity"]}
+                    metrics.inc("generation_warm_starts")
+                else:
+                    result_str = await llm_pool.run(run_generation_crew, request.description, request.features)
+                    project_data, incomplete = parse_project_output(result_str)
+                # A truncated output may lack files: it is served but not replayed
+                if not incomplete:
+                    generation_cache.put(cache_key, project_data)
+            
+            evaluation = _store_and_evaluate(request, project_data, project_id)
             
-            # Include evaluation in response (optional)
-            response_data = {
-                "project_id": project_id, 
-                "files": project_data,
-                "evaluation": {
-                    "overall_score": evaluation_result["overall_score"],
-                    "weighted_score": evaluation_result.get("weighted_score", evaluation_result["overall_score"]),  # New field
-                    "code_quality": evaluation_result["code_quality"],
-                    "requirements_fulfillment": evaluation_result["requirements_fulfillment"],
-                    "compliance": evaluation_result["compliance"],
-                    "feedback": evaluation_result["feedback"],
-                    "weights_info": "Requirements: 50%, Code Quality: 25%, Compliance: 25%"  # Info for users
-                }
-            }
-        except Exception as eval_error:
-            logger.error(f"Evaluation failed, but project generation succeeded: {eval_error}")
-            # Still return the project even if evaluation fails
             response_data = {
                 "project_id": project_id, 
                 "files": project_data,
-                "evaluation": {
-                    "overall_score": 0,
-                    "error": f"Evaluation failed: {str(eval_error)}"
-                }
+                "cached": cached,
+                "warm_start": warm_start,
+                "evaluation": evaluation
             }
+            
+            return ProjectResponse(
+                success=True, 
+                project_data=response_data
+            )
+            
+        except PoolSaturatedError:
+            raise
+        except ValueError as e:
+            return ProjectResponse(success=False, error=str(e))
+        except Exception as e:
+            logger.exception("Erreur inattendue")
+            return ProjectResponse(success=False, error=f"Erreur interne : {str(e)}")
+
+_STREAM_END = object()
+
+def build_generation_messages(description: str, features: str = "") -> List[Dict[str, str]]:
+    """
+    Chat messages equivalent to the generation crew, for direct (streamed) LLM calls
+    """
+    task = create_react_native_web_task(description, features)
+    agent = frontend_generator_agent
+    return [
+        {"role": "system", "content": f"Tu es {agent.role}. {agent.backstory}\nObjectif : {agent.goal}"},
+        {"role": "user", "content": f"{task.description}\n\nRésultat attendu : {task.expected_output}"}
+    ]
+
+def _stream_generation(messages: List[Dict[str, str]], loop: asyncio.AbstractEventLoop,
+                       queue: asyncio.Queue, cancelled: threading.Event) -> None:
+    """
+    Blocking LLM stream, executed on the LLM worker pool; chunks are handed to the event loop
+    """
+    def put(item) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop closed (shutdown)
+            cancelled.set()
+
+    try:
+        for chunk in frontend_generator_agent.llm.stream(messages):
+            if cancelled.is_set():
+                logger.info("Client disconnected, streamed generation stopped")
+                break
+            put(chunk)
+    except Exception as e:
+        put(e)
+    finally:
+        put(_STREAM_END)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def start_react_project_stream(request: ProjectRequest) -> AsyncIterator[str]:
+    """
+    Start a streamed generation and return its Server-Sent Events.
+
+    Raises PoolSaturatedError before anything is sent when the LLM pool is full.
+    """
+    cache_key = generation_cache_key(request.description, request.features)
+    cached = generation_cache.get(cache_key) if request.use_cache else None
+    project_id = str(uuid.uuid4())
+    if cached is not None:
+        return _cached_project_stream_events(request, cached, project_id)
+    
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    messages = build_generation_messages(request.description, request.features or "")
+    with usage_tags(endpoint="generate-project/stream", project_id=project_id):
+        llm_pool.submit(_stream_generation, messages, loop, queue, cancelled)
+    return _project_stream_events(request, queue, cancelled, cache_key, project_id)
+
+async def _cached_project_stream_events(request: ProjectRequest, project_data: Dict[str, str],
+                                        project_id: str) -> AsyncIterator[str]:
+    """
+    Same events as a streamed generation, replayed from the generation cache
+    """
+    yield _sse("start", {"description": request.description})
+    for path, code in project_data.items():
+        yield _sse("file", {"path": path, "code": code})
+    evaluation = _store_and_evaluate(request, project_data, project_id)
+    yield _sse("done", {
+        "project_id": project_id,
+        "files_count": len(project_data),
+        "cached": True,
+        "evaluation": evaluation
+    })
+
+async def _project_stream_events(request: ProjectRequest, queue: asyncio.Queue,
+                                 cancelled: threading.Event, cache_key: str, project_id: str) -> AsyncIterator[str]:
+    """
+    Events: "file" for each completed file, then "done" (or "error")
+    """
+    parser = IncrementalProjectParser()
+    started = time.perf_counter()
+    time_to_first_file = None
+    try:
+        logger.info(f"Génération streamée d'un projet React pour : {request.description}")
+        yield _sse("start", {"description": request.description})
+        
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            for path, code in parser.feed(item):
+                if time_to_first_file is None:
+                    time_to_first_file = time.perf_counter() - started
+                    metrics.observe("generation_stream_time_to_first_file_seconds", time_to_first_file)
+                    logger.info(f"First file streamed after {time_to_first_file:.2f}s: {path}")
+                yield _sse("file", {"path": path, "code": code})
+        
+        for path, code in parser.finish():
+            yield _sse("file", {"path": path, "code": code})
+        if not parser.files:
+            raise ValueError("Aucun fichier complet dans la sortie JSON")
+        if parser.repairs or parser.truncated:
+            logger.warning(f"Sortie streamée réparée ({', '.join(parser.repairs)}), fichiers tronqués : {parser.truncated}")
+        project_data = parser.files
+        total_time = time.perf_counter() - started
+        metrics.observe("generation_stream_total_seconds", total_time)
         
-        return ProjectResponse(
-            success=True, 
-            project_data=response_data
-        )
+        if not parser.incomplete:
+            generation_cache.put(cache_key, project_data)
+        evaluation = _store_and_evaluate(request, project_data, project_id)
         
+        yield _sse("done", {
+            "project_id": project_id,
+            "files_count": len(project_data),
+            "cached": False,
+            "time_to_first_file": time_to_first_file,
+            "total_time": total_time,
+            "evaluation": evaluation
+        })
     except ValueError as e:
-        return ProjectResponse(success=False, error=str(e))
+        metrics.inc("generation_stream_errors")
+        yield _sse("error", {"error": str(e)})
     except Exception as e:
-        logger.exception("Erreur inattendue")
-        return ProjectResponse(success=False, error=f"Erreur interne : {str(e)}")
\ No newline at end of file
+        logger.exception("Erreur inattendue pendant la génération streamée")
+        metrics.inc("generation_stream_errors")
+        yield _sse("error", {"error": f"Erreur interne : {str(e)}"})
+    finally:
+        cancelled.set()
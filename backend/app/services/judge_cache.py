@@ -0,0 +1,57 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from app.config.settings import JUDGE_CACHE_MAX_ENTRIES, JUDGE_CACHE_DIR
+from app.services.generation_cache import TwoTierJsonCache, normalize_request_text
+from app.services.metrics import metrics
+
+def canonical_project(project: Dict[str, str]) -> List[Tuple[str, str]]:
+    """
+    Files sorted by path, with a leading "/" on every path, LF line endings and
+    no trailing whitespace: formatting-only differences give the same form
+    """
+    return sorted(
+        ("/" + path.lstrip("/"), "\n".join(line.rstrip() for line in code.replace("\r\n", "\n").split("\n")).strip("\n"))
+        for path, code in project.items()
+    )
+
+class JudgeCache(TwoTierJsonCache):
+    """
+    LLM-judge evaluations keyed by what the judge saw; the memory tier keeps
+    at most max_entries evaluations.
+    """
+
+    metrics_prefix = "judge_cache"
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None):
+        super().__init__(max_entries, directory)
+
+    @property
+    def max_entries(self) -> int:
+        return self.max_size
+
+    @staticmethod
+    def make_key(test_case: Dict[str, Any], project: Dict[str, str], model_name: str, prompt_version: str) -> str:
+        payload = json.dumps([
+            normalize_request_text(test_case.get("description")),
+            normalize_request_text(test_case.get("features")),
+            canonical_project(project),
+            model_name,
+            prompt_version,
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict[str, float]:
+        hits = metrics.counter("judge_cache_hits")
+        misses = metrics.counter("judge_cache_misses")
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+
+# Global cache
+judge_cache = JudgeCache(JUDGE_CACHE_MAX_ENTRIES, JUDGE_CACHE_DIR)
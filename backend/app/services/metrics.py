@@ -0,0 +1,70 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics: counters, gauges and timing summaries.
+
+    Summaries keep count/sum/min/max over the whole process lifetime and
+    percentiles over the last `window` observations.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, Any]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = {"count": 0, "sum": 0.0, "min": value, "max": value, "recent": deque(maxlen=self.window)}
+                self._summaries[name] = summary
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["min"] = min(summary["min"], value)
+            summary["max"] = max(summary["max"], value)
+            summary["recent"].append(value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            summaries = {}
+            for name, summary in self._summaries.items():
+                summaries[name] = {
+                    "count": summary["count"],
+                    "avg": summary["sum"] / summary["count"],
+                    "min": summary["min"],
+                    "max": summary["max"],
+                    "p50": percentile(summary["recent"], 0.5),
+                    "p95": percentile(summary["recent"], 0.95),
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": summaries,
+            }
+
+def percentile(values: Deque[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+# Global registry
+metrics = MetricsRegistry()
@@ -0,0 +1,222 @@
+import math
+import posixpath
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Set
+
+_IMPORT_RE = re.compile(r"""(?:import\s[^'";]*?from\s*|import\s*|require\(\s*)['"]([^'"]+)['"]""")
+_EXPORT_RES = (
+    re.compile(r"export\s+default\s+(?:async\s+)?(?:function|class)\s+(\w+)"),
+    re.compile(r"export\s+(?:async\s+)?(?:const|let|var|function|class)\s+(\w+)"),
+    re.compile(r"export\s+default\s+(\w+)\s*;?\s*$", re.MULTILINE),
+)
+_EXPORT_LIST_RE = re.compile(r"export\s*\{([^}]*)\}")
+_STYLESHEET_RE = re.compile(r"StyleSheet\.create\(\s*\{")
+_STYLE_TOKEN_RE = re.compile(r"[{}]|(\w+)\s*:")
+_STRING_RE = re.compile(r"""'([^'\\\n]{2,80})'|"([^"\\\n]{2,80})"|>\s*([^<>{}\n]{2,80}?)\s*<""")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CAMEL_RE = re.compile(r"([a-z0-9])([A-Z])")
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+# Words of a chat message that say nothing about where the change is
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "to", "of", "in", "on", "for", "with", "make", "change", "add", "please",
+    "le", "la", "les", "un", "une", "de", "des", "du", "et", "ou", "en", "sur", "pour", "avec", "dans", "au",
+    "aux", "mon", "ma", "mes", "ce", "cet", "cette", "ces", "je", "veux", "voudrais", "peux", "tu", "plus",
+    "moins", "change", "changer", "modifie", "modifier", "ajoute", "ajouter", "mets", "mettre", "rends",
+    "rendre", "stp", "svp", "merci", "qui", "que", "est", "soit", "par", "application", "app",
+}
+_STOPWORDS = {_stem(word) for word in _STOPWORDS}
+
+# French (and a few English) words of chat messages mapped to code vocabulary
+_SYNONYMS = {
+    "couleur": ["color"], "colour": ["color"], "fond": ["background"], "arriere": ["background"],
+    "theme": ["color", "background"], "sombre": ["dark", "color", "background"], "dark": ["color", "background"],
+    "clair": ["light", "color", "background"], "bleu": ["color"], "rouge": ["color"], "vert": ["color"],
+    "jaune": ["color"], "orange": ["color"], "noir": ["color"], "blanc": ["color"], "violet": ["color"],
+    "rose": ["color"], "gris": ["color"], "bouton": ["button"], "titre": ["title"], "texte": ["text"],
+    "entete": ["header"], "tete": ["header"], "pied": ["footer"], "liste": ["list"], "carte": ["card"], "tache": ["task", "todo"],
+    "icone": ["icon"], "logo": ["logo", "icon", "image"], "image": ["image"], "barre": ["bar"],
+    "laterale": ["sidebar"], "recherche": ["search"], "formulaire": ["form"], "champ": ["input"],
+    "saisie": ["input"], "connexion": ["login"], "panier": ["cart"], "produit": ["product"], "prix": ["price"],
+    "taille": ["size", "fontsize", "width", "height"], "police": ["font"], "marge": ["margin"],
+    "espacement": ["padding", "margin"], "bordure": ["border"], "arrondi": ["radius"], "ombre": ["shadow"],
+    "accueil": ["home"], "profil": ["profile"], "parametre": ["settings"], "compteur": ["counter"],
+    "calendrier": ["calendar"], "meteo": ["weather"], "horloge": ["clock"], "minuteur": ["timer"],
+    "note": ["note"], "utilisateur": ["user"], "message": ["message"], "graphique": ["chart"],
+}
+_SYNONYMS = {_stem(word): synonyms for word, synonyms in _SYNONYMS.items()}
+
+def _strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def terms(text: str) -> Set[str]:
+    """Lowercase, accent-free words of a text; camelCase identifiers are split"""
+    text = _strip_accents(_CAMEL_RE.sub(r"\1 \2", text)).lower()
+    return {_stem(word) for word in _WORD_RE.findall(text) if len(word) > 1}
+
+def message_terms(message: str) -> Set[str]:
+    """Terms of a chat message, without stopwords, expanded with their code synonyms"""
+    words = {word for word in terms(message) if word not in _STOPWORDS}
+    expanded = set(words)
+    for word in words:
+        expanded.update(_SYNONYMS.get(word, ()))
+    return expanded
+
+@dataclass
+class FileIndex:
+    path: str
+    lines: int
+    imports: List[str] = field(default_factory=list)
+    exports: List[str] = field(default_factory=list)
+    style_keys: List[str] = field(default_factory=list)
+    style_props: Set[str] = field(default_factory=set)
+    strings: List[str] = field(default_factory=list)
+
+@dataclass
+class ContextSelection:
+    files: List[str]
+    others: List[str]
+    matched: List[str]
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.others)
+
+class ProjectIndex:
+    """
+    Index of one version of a project: import graph between files, exported
+    names, StyleSheet keys and properties, and string literals.
+
+    select() picks the files a chat message is about; the others can be
+    summarized with manifest().
+    """
+
+    # Weight of a match in the path or exported names, style names, literals
+    NAME_WEIGHT = 3
+    STYLE_WEIGHT = 2
+    STRING_WEIGHT = 1
+    # Matched files scoring less than this fraction of the best one are dropped
+    RELATIVE_THRESHOLD = 0.3
+
+    def __init__(self, project: Dict[str, str]):
+        self.paths = list(project)
+        self.files: Dict[str, FileIndex] = {path: _index_file(path, code, project) for path, code in project.items()}
+        self.importers: Dict[str, Set[str]] = {path: set() for path in project}
+        for path, file in self.files.items():
+            for imported in file.imports:
+                self.importers[imported].add(path)
+        self._terms = {path: self._file_terms(file) for path, file in self.files.items()}
+        # Terms found in every file (e.g. "color") do not tell files apart
+        document_frequency: Dict[str, int] = {}
+        for file_terms in self._terms.values():
+            for term in set().union(*file_terms):
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        self._idf = {term: math.log((1 + len(self.files)) / (1 + df)) for term, df in document_frequency.items()}
+
+    @staticmethod
+    def _file_terms(file: FileIndex):
+        names = terms(posixpath.splitext(file.path)[0]) | terms(" ".join(file.exports))
+        styles = terms(" ".join(file.style_keys)) | terms(" ".join(file.style_props))
+        strings = terms(" ".join(file.strings))
+        return names, styles, strings
+
+    def score(self, path: str, wanted: Set[str]) -> float:
+        """Matches of the wanted terms in a file, weighted by field and by term rarity"""
+        names, styles, strings = self._terms[path]
+        return sum(
+            weight * sum(self._idf[term] for term in wanted & field_terms)
+            for weight, field_terms in ((self.NAME_WEIGHT, names), (self.STYLE_WEIGHT, styles), (self.STRING_WEIGHT, strings))
+        )
+
+    def select(self, message: str, max_files: int = 8, always: Sequence[str] = ("/App.js",)) -> ContextSelection:
+        """
+        Files relevant to a message (best max_files matches), plus their direct
+        importers and importees. Without any distinctive match (e.g. a theme
+        change touching every file), every file is selected.
+        """
+        wanted = message_terms(message)
+        scores = {path: self.score(path, wanted) for path in self.paths}
+        best = max(scores.values(), default=0)
+        matched = sorted(
+            (p for p in self.paths if scores[p] > 0 and scores[p] >= self.RELATIVE_THRESHOLD * best),
+            key=lambda p: -scores[p]
+        )[:max_files]
+        if not matched:
+            return ContextSelection(files=list(self.paths), others=[], matched=[])
+        selected = set(matched)
+        for path in matched:
+            selected.update(self.files[path].imports)
+            selected.update(self.importers[path])
+        # Paths compared without their leading "/" (projects may store "App.js")
+        forced = {path.lstrip("/") for path in always}
+        selected.update(path for path in self.paths if path.lstrip("/") in forced)
+        return ContextSelection(
+            files=[p for p in self.paths if p in selected],
+            others=[p for p in self.paths if p not in selected],
+            matched=matched
+        )
+
+    def manifest(self, paths: List[str]) -> str:
+        """One summary line per file"""
+        lines = []
+        for path in paths:
+            file = self.files[path]
+            parts = [f"{file.lines} lignes"]
+            if file.exports:
+                parts.append("exporte " + ", ".join(file.exports))
+            if file.imports:
+                parts.append("importe " + ", ".join(file.imports))
+            if file.style_keys:
+                parts.append("styles " + ", ".join(file.style_keys))
+            lines.append(f"{path} : " + " ; ".join(parts))
+        return "\n".join(lines)
+
+def _index_file(path: str, code: str, project: Dict[str, str]) -> FileIndex:
+    file = FileIndex(path=path, lines=code.count("\n") + 1)
+    for source in _IMPORT_RE.findall(code):
+        resolved = resolve_import(path, source, project)
+        if resolved and resolved != path and resolved not in file.imports:
+            file.imports.append(resolved)
+    for pattern in _EXPORT_RES:
+        file.exports.extend(name for name in pattern.findall(code) if name not in file.exports)
+    for names in _EXPORT_LIST_RE.findall(code):
+        for name in names.split(","):
+            name = name.split(" as ")[-1].strip()
+            if name and name not in file.exports:
+                file.exports.append(name)
+    for match in _STYLESHEET_RE.finditer(code):
+        _index_stylesheet(code, match.end(), file)
+    for single, double, jsx in _STRING_RE.findall(code):
+        literal = (single or double or jsx).strip()
+        if literal and not literal.startswith((".", "/", "react")) and literal not in file.strings:
+            file.strings.append(literal)
+    return file
+
+def _index_stylesheet(code: str, start: int, file: FileIndex) -> None:
+    """Top-level keys (depth 1) and properties (depth 2) of a StyleSheet.create({...}) object"""
+    depth = 1
+    for token in _STYLE_TOKEN_RE.finditer(code, start):
+        if token.group(0) == "{":
+            depth += 1
+        elif token.group(0) == "}":
+            depth -= 1
+            if depth == 0:
+                return
+        elif depth == 1:
+            file.style_keys.append(token.group(1))
+        elif depth == 2:
+            file.style_props.add(token.group(1))
+
+def resolve_import(path: str, source: str, project: Dict[str, str]) -> str:
+    """Project file a relative import of path points to ("" for packages and unresolved imports)"""
+    if not source.startswith("."):
+        return ""
+    base = posixpath.normpath(posixpath.join(posixpath.dirname(path), source))
+    for candidate in (base, base + ".js", base + ".jsx", base + "/index.js"):
+        if candidate in project:
+            return candidate
+    return ""
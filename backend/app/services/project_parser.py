@@ -0,0 +1,318 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Parser states
+_SEEK_OBJECT = "seek_object"
+_EXPECT_KEY = "expect_key"
+_IN_KEY = "in_key"
+_EXPECT_COLON = "expect_colon"
+_EXPECT_VALUE = "expect_value"
+_IN_VALUE = "in_value"
+_AFTER_VALUE = "after_value"
+_DONE = "done"
+
+_WHITESPACE = " \t\r\n"
+_JSON_ESCAPES = '"\\/bfnrtu'
+_ESCAPE_RE = re.compile(r'\\(.)', re.S)
+# What may follow the closing quote of a file's content: `, "next/path":`
+_NEXT_KEY_RE = re.compile(r'\s*,\s*"[^"\n]{1,300}"\s*:')
+# ... or the end of the object: `}` then end of line, end of output or a code fence
+_OBJECT_END_RE = re.compile(r'\s*\}[ \t]*(?:[\r\n`]|$)')
+# Longest lookahead needed to tell a closing quote from a stray one
+_LOOKAHEAD = 320
+
+_decoder = json.JSONDecoder(strict=False)
+
+class IncrementalProjectParser:
+    """
+    Incremental parser for the generated project JSON ({"path": "code", ...}).
+
+    Chunks of LLM output are passed to feed() as they arrive; every file entry
+    whose value string is complete is returned immediately, so callers can
+    forward files before the whole object has been produced. finish() must be
+    called once the output is over.
+
+    With repair=True (default) the common LLM defects are fixed locally instead
+    of rejecting the whole output:
+    - text around the object (preamble, code fences, trailing comments)
+    - raw control characters and invalid escapes such as \\' in strings
+    - unescaped quotes inside file contents
+    - a truncated output: the unfinished last entry is dropped and reported
+      in `truncated`, the other files are kept
+    """
+
+    def __init__(self, repair: bool = True):
+        self.repair = repair
+        self.files: Dict[str, str] = {}
+        self.truncated: List[str] = []
+        self.repairs: List[str] = []
+        self.state = _SEEK_OBJECT
+        self._buf = ""
+        self._pos = 0
+        self._string_start = 0
+        self._scan_from = 0
+        self._bare_quotes: List[int] = []
+        self._key = ""
+        self._finished = False
+
+    @property
+    def complete(self) -> bool:
+        """True once the closing brace of the project object has been read"""
+        return self.state == _DONE
+
+    @property
+    def incomplete(self) -> bool:
+        """True when the output ended early: files may be missing from the project"""
+        return bool(self.truncated) or "missing_closing_brace" in self.repairs
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Consume a chunk and return the file entries completed by it"""
+        if self.state == _DONE or not chunk:
+            return []
+        self._buf += chunk
+        return self._parse()
+
+    def finish(self) -> List[Tuple[str, str]]:
+        """Signal the end of the output and return the last completed entries"""
+        self._finished = True
+        completed = self._parse() if self.state != _DONE else []
+        if self.state == _DONE:
+            return completed
+        if not self.repair:
+            raise ValueError("Sortie JSON incomplète : le projet n'est pas terminé")
+
+        if self.state in (_EXPECT_COLON, _EXPECT_VALUE, _IN_VALUE):
+            self.truncated.append(self._key)
+            logger.warning(f"Sortie tronquée : fichier {self._key!r} incomplet ignoré")
+        if self.state != _SEEK_OBJECT:
+            self.repairs.append("missing_closing_brace")
+            self.state = _DONE
+        return completed
+
+    def _parse(self) -> List[Tuple[str, str]]:
+        completed: List[Tuple[str, str]] = []
+
+        while self._pos < len(self._buf) and self.state != _DONE:
+            if self.state in (_IN_KEY, _IN_VALUE):
+                end = self._find_string_end()
+                if end == -1:
+                    break
+                raw = self._buf[self._string_start:end]
+                value = self._decode(raw, [q - self._string_start for q in self._bare_quotes])
+                self._pos = end + 1
+                self._bare_quotes = []
+                if self.state == _IN_KEY:
+                    self._key = value
+                    self.state = _EXPECT_COLON
+                else:
+                    self.files[self._key] = value
+                    completed.append((self._key, value))
+                    self.state = _AFTER_VALUE
+                continue
+
+            char = self._buf[self._pos]
+            if self.state == _SEEK_OBJECT:
+                start = self._buf.find("{", self._pos)
+                if start == -1:
+                    self._pos = len(self._buf)
+                    break
+                if self.repair:
+                    verdict = self._object_start_verdict(start)
+                    if verdict is None:
+                        self._pos = start
+                        break
+                    if not verdict:
+                        self._pos = start + 1
+                        continue
+                self._pos = start + 1
+                self.state = _EXPECT_KEY
+                continue
+
+            self._pos += 1
+            if char in _WHITESPACE:
+                continue
+            elif self.state == _EXPECT_KEY:
+                if char == '"':
+                    self._start_string(_IN_KEY)
+                elif char == "}" and (not self.files or self.repair):
+                    # {} or a trailing comma before the closing brace
+                    self.state = _DONE
+                else:
+                    raise ValueError(f"Clé de fichier attendue, caractère inattendu : {char!r}")
+            elif self.state == _EXPECT_COLON:
+                if char != ":":
+                    raise ValueError(f"':' attendu après la clé {self._key!r}")
+                self.state = _EXPECT_VALUE
+            elif self.state == _EXPECT_VALUE:
+                if char != '"':
+                    raise ValueError(f"Le contenu du fichier {self._key!r} doit être une chaîne")
+                self._start_string(_IN_VALUE)
+            elif self.state == _AFTER_VALUE:
+                if char == ",":
+                    self.state = _EXPECT_KEY
+                elif char == "}":
+                    self.state = _DONE
+                else:
+                    raise ValueError(f"',' ou '}}' attendu après le fichier {self._key!r}")
+
+        self._compact()
+        return completed
+
+    def _start_string(self, state: str) -> None:
+        self.state = state
+        self._string_start = self._pos
+        self._scan_from = self._pos
+        self._bare_quotes = []
+
+    def _object_start_verdict(self, brace: int) -> Optional[bool]:
+        """A project object is a `{` followed by a quoted key, None if undecided"""
+        i = brace + 1
+        while i < len(self._buf) and self._buf[i] in _WHITESPACE:
+            i += 1
+        if i >= len(self._buf):
+            return False if self._finished else None
+        return self._buf[i] == '"'
+
+    def _find_string_end(self) -> int:
+        """Index of the closing quote of the current string, -1 if not received yet"""
+        buf = self._buf
+        pos = self._scan_from
+        while True:
+            quote = buf.find('"', pos)
+            if quote == -1:
+                # Resume from the end next time, a dangling backslash is handled by the count below
+                self._scan_from = len(buf)
+                return -1
+            backslashes = 0
+            i = quote - 1
+            while i >= self._string_start and buf[i] == "\\":
+                backslashes += 1
+                i -= 1
+            if backslashes % 2 == 1:
+                pos = quote + 1
+                continue
+            if not self.repair or self.state == _IN_KEY:
+                return quote
+
+            verdict = self._closing_quote_verdict(quote)
+            if verdict is None:
+                # Not enough lookahead yet, decide when more output arrives
+                self._scan_from = quote
+                return -1
+            if verdict:
+                return quote
+            self._bare_quotes.append(quote)
+            if "unescaped_quote" not in self.repairs:
+                self.repairs.append("unescaped_quote")
+            pos = quote + 1
+
+    def _closing_quote_verdict(self, quote: int) -> Optional[bool]:
+        """True if the quote ends the file content, False if it is a stray quote, None if undecided"""
+        after = self._buf[quote + 1:quote + 1 + _LOOKAHEAD]
+        if _NEXT_KEY_RE.match(after):
+            return True
+        end = _OBJECT_END_RE.match(after)
+        if end and (end.end() < len(after) or self._finished):
+            return True
+        if self._finished:
+            # Only a fence or a cut-off `, "next/path` after the quote: it closes the file
+            return after.strip().startswith("```") or _could_still_close(after)
+        if len(after) < _LOOKAHEAD and _could_still_close(after):
+            return None
+        return False
+
+    def _decode(self, raw: str, bare_quotes: List[int]) -> str:
+        if bare_quotes:
+            parts = []
+            previous = 0
+            for index in bare_quotes:
+                parts.append(raw[previous:index])
+                parts.append('\\"')
+                previous = index + 1
+            parts.append(raw[previous:])
+            raw = "".join(parts)
+        try:
+            return _decoder.decode(f'"{raw}"') if self.repair else json.loads(f'"{raw}"')
+        except json.JSONDecodeError as e:
+            if not self.repair:
+                raise ValueError(f"Chaîne JSON invalide : {e}")
+        if "invalid_escape" not in self.repairs:
+            self.repairs.append("invalid_escape")
+        try:
+            return _decoder.decode(f'"{_ESCAPE_RE.sub(_fix_escape, raw)}"')
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Chaîne JSON invalide : {e}")
+
+    def _compact(self) -> None:
+        """Drop the consumed part of the buffer"""
+        keep_from = self._string_start if self.state in (_IN_KEY, _IN_VALUE) else self._pos
+        if keep_from > 8192:
+            self._buf = self._buf[keep_from:]
+            self._pos -= keep_from
+            self._string_start -= keep_from
+            self._scan_from -= keep_from
+            self._bare_quotes = [q - keep_from for q in self._bare_quotes]
+
+def _could_still_close(after: str) -> bool:
+    """Whether the text received after a quote is a prefix of `, "key":` or `}`"""
+    stripped = after.lstrip()
+    if not stripped:
+        return True
+    if stripped[0] == "}":
+        return stripped[1:].strip(" \t") == ""
+    if stripped[0] != ",":
+        return False
+    rest = stripped[1:].lstrip()
+    if not rest:
+        return True
+    if rest[0] != '"':
+        return False
+    return '"' not in rest[1:] or re.match(r'"[^"\n]*"\s*$', rest) is not None
+
+def _fix_escape(match: "re.Match[str]") -> str:
+    char = match.group(1)
+    if char in _JSON_ESCAPES:
+        return match.group(0)
+    if char == "'":
+        return "'"
+    return "\\\\" + char
+
+def extract_project_json(output_str: str, repair: bool = True) -> Dict[str, str]:
+    """
+    Extract the project file map from a complete LLM output.
+
+    Raises ValueError when no project can be recovered.
+    """
+    return parse_project_output(output_str, repair)[0]
+
+def parse_project_output(output_str: str, repair: bool = True) -> Tuple[Dict[str, str], bool]:
+    """
+    Like extract_project_json, but also tells whether the output was truncated
+    (an unfinished file was dropped or the object was never closed), in which
+    case the project may be missing files and must not be cached.
+    """
+    # Fast path: a well-formed object is decoded by the C json parser
+    first_brace = output_str.find("{")
+    last_brace = output_str.rfind("}")
+    if first_brace != -1 and last_brace > first_brace:
+        try:
+            project = json.loads(output_str[first_brace:last_brace + 1])
+            if isinstance(project, dict) and project and all(isinstance(v, str) for v in project.values()):
+                return project, False
+        except json.JSONDecodeError:
+            pass
+
+    parser = IncrementalProjectParser(repair=repair)
+    parser.feed(output_str)
+    parser.finish()
+    if parser.state == _SEEK_OBJECT:
+        raise ValueError("Aucun JSON détecté dans la sortie")
+    if not parser.files:
+        raise ValueError("Aucun fichier complet dans la sortie JSON")
+    if parser.repairs or parser.truncated:
+        logger.warning(f"Sortie JSON réparée ({', '.join(parser.repairs)}), fichiers tronqués : {parser.truncated}")
+    return parser.files, parser.incomplete
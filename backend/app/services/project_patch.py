@@ -0,0 +1,111 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Search/replace block, as requested from the chat agent:
+# <<<<<<< SEARCH
+# exact lines of the current file
+# =======
+# new lines
+# >>>>>>> REPLACE
+_BLOCK_RE = re.compile(
+    r"<{5,9} ?SEARCH[^\n]*\n(.*?)\n?={5,9}[ \t]*\n(.*?)\n?>{5,9} ?REPLACE[^\n]*",
+    re.DOTALL
+)
+_BLOCK_START_RE = re.compile(r"^\s*<{5,9} ?SEARCH")
+
+class PatchError(ValueError):
+    """A change that cannot be applied to the stored version of a file"""
+
+@dataclass
+class PatchResult:
+    project: Dict[str, str]
+    replaced: List[str] = field(default_factory=list)
+    patched: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+def is_search_replace(value: str) -> bool:
+    """True when a file value is a list of search/replace blocks rather than file content"""
+    return bool(_BLOCK_START_RE.match(value))
+
+def parse_search_replace(value: str) -> List[Tuple[str, str]]:
+    """(search, replace) pairs of a patch value; raises PatchError when it is malformed"""
+    hunks = [(m.group(1), m.group(2)) for m in _BLOCK_RE.finditer(value)]
+    if not hunks:
+        raise PatchError("bloc SEARCH/REPLACE mal formé")
+    leftover = _BLOCK_RE.sub("", value).strip()
+    if leftover:
+        raise PatchError(f"texte hors des blocs SEARCH/REPLACE : {leftover[:40]!r}")
+    return hunks
+
+def apply_hunks(original: str, hunks: List[Tuple[str, str]]) -> str:
+    """
+    Apply search/replace hunks in order.
+
+    Each search text must appear exactly once; when it does not appear
+    verbatim, lines are compared without their surrounding whitespace (the
+    usual indentation drift of LLM edits). An empty search text appends.
+    """
+    content = original
+    for number, (search, replace) in enumerate(hunks, 1):
+        if not search.strip():
+            content = content.rstrip("\n") + "\n" + replace + "\n"
+            continue
+        count = content.count(search)
+        if count == 1:
+            content = content.replace(search, replace, 1)
+            continue
+        if count > 1:
+            raise PatchError(f"bloc {number} ambigu ({count} occurrences)")
+        span = _find_lines_loosely(content, search)
+        if span is None:
+            raise PatchError(f"bloc {number} introuvable dans la version actuelle")
+        start, end = span
+        content = content[:start] + replace + content[end:]
+    return content
+
+def _find_lines_loosely(content: str, search: str) -> Optional[Tuple[int, int]]:
+    """Character span of the unique run of lines equal to search modulo surrounding whitespace"""
+    wanted = [line.strip() for line in search.strip("\n").split("\n")]
+    lines = content.split("\n")
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line) + 1)
+    matches = [
+        i for i in range(len(lines) - len(wanted) + 1)
+        if all(lines[i + j].strip() == wanted[j] for j in range(len(wanted)))
+    ]
+    if len(matches) != 1:
+        return None
+    start = matches[0]
+    end = start + len(wanted)
+    return offsets[start], offsets[end] - 1
+
+def apply_project_patch(project: Dict[str, str], changes: Dict[str, str]) -> PatchResult:
+    """
+    Apply the chat agent's changes to a stored project.
+
+    A value is either search/replace blocks (applied to the stored file),
+    the complete content of the file, or "" to delete it. Files whose blocks
+    cannot be applied are left untouched and reported in failed.
+    """
+    result = PatchResult(project=dict(project))
+    for path, value in changes.items():
+        if value == "":
+            if result.project.pop(path, None) is not None:
+                result.deleted.append(path)
+            continue
+        if not is_search_replace(value):
+            result.project[path] = value
+            result.replaced.append(path)
+            continue
+        if path not in project:
+            result.failed[path] = "fichier inexistant dans la version actuelle"
+            continue
+        try:
+            result.project[path] = apply_hunks(project[path], parse_search_replace(value))
+            result.patched.append(path)
+        except PatchError as e:
+            result.failed[path] = str(e)
+    return result
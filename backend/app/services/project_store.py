@@ -0,0 +1,1000 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    overload,
+)
+from app.config.settings import (
+    PROJECT_STORE,
+    PROJECT_STORE_PATH,
+    PROJECT_STORE_BATCH_SIZE,
+    PROJECT_STORE_FLUSH_INTERVAL,
+    PROJECT_STORE_MAX_BYTES,
+    PROJECT_STORE_TTL,
+    PROJECT_STORE_SPILL_DIR,
+)
+from app.models.schemas import ChatMessage
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class ProjectNotFoundError(KeyError):
+    """The project ID is not in the store"""
+
+
+class VersionNotFoundError(ProjectNotFoundError):
+    """The project has no such version"""
+
+
+class VersionConflictError(Exception):
+    """The project changed since the version the caller based its update on"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Version actuelle du projet : {current_version}")
+        self.current_version = current_version
+
+
+@dataclass
+class VersionInfo:
+    version: int
+    created_at: float
+    files: int
+
+
+@dataclass
+class VersionDelta:
+    """Files added, changed and removed between two versions of a project"""
+
+    base_version: int
+    version: int
+    added: Dict[str, str]
+    changed: Dict[str, str]
+    removed: List[str]
+
+
+def content_hash(content: str) -> str:
+    """Key of a file content in the blob store"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _split_files(files: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Manifest (path -> hash) and blobs (hash -> content) of a file map"""
+    manifest, blobs = {}, {}
+    for path, content in files.items():
+        digest = content_hash(content)
+        manifest[path] = digest
+        blobs[digest] = content
+    return manifest, blobs
+
+
+def manifest_etag(manifest: Dict[str, str], version: int) -> str:
+    """HTTP entity tag of a project version (changes with the version and with the files)"""
+    digest = hashlib.sha256(
+        json.dumps(sorted(manifest.items())).encode("utf-8")
+    ).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+class ProjectStore(ABC):
+    """
+    Storage of the projects and of their chat history.
+
+    Every version of a project is kept as a manifest (path -> content hash)
+    over a blob store shared by all projects, so a new version only adds the
+    files that changed. save_project() creates or resets a project at
+    version 1; update_project() and revert_project() add a version
+    atomically, optionally only if the current one is still expected_version.
+    Implementations guard their state with a reentrant self._lock.
+    """
+
+    _lock: "threading.RLock"
+
+    @abstractmethod
+    def save_project(self, project_id: str, files: Dict[str, str]) -> int: ...
+
+    @abstractmethod
+    def get_project(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        """(files, version) of the current or given version, or None when it does not exist"""
+
+    def get_version(self, project_id: str) -> Optional[int]:
+        stored = self.get_manifest(project_id)
+        return stored[1] if stored is not None else None
+
+    @abstractmethod
+    def get_manifest(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        """(path -> hash, version) of the current or given version, or None when it does not exist"""
+
+    @abstractmethod
+    def get_blobs(self, hashes: Iterable[str]) -> Dict[str, str]: ...
+
+    def get_delta(
+        self, project_id: str, since_version: int, version: Optional[int] = None
+    ) -> Optional[VersionDelta]:
+        """
+        Changes from since_version to the current or given version, read from
+        the manifests (only added and changed files are loaded); None when
+        either version does not exist
+        """
+        with self._lock:
+            target = self.get_manifest(project_id, version)
+            base = self.get_manifest(project_id, since_version)
+            if target is None or base is None:
+                return None
+            (manifest, version), (base_manifest, _) = target, base
+            added = [path for path in manifest if path not in base_manifest]
+            changed = [
+                path
+                for path in manifest
+                if path in base_manifest and base_manifest[path] != manifest[path]
+            ]
+            blobs = self.get_blobs(manifest[path] for path in added + changed)
+        return VersionDelta(
+            base_version=since_version,
+            version=version,
+            added={path: blobs[manifest[path]] for path in added},
+            changed={path: blobs[manifest[path]] for path in changed},
+            removed=[path for path in base_manifest if path not in manifest],
+        )
+
+    @abstractmethod
+    def update_project(
+        self,
+        project_id: str,
+        files: Dict[str, str],
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """New version; raises ProjectNotFoundError or VersionConflictError"""
+
+    @abstractmethod
+    def revert_project(
+        self, project_id: str, version: int, expected_version: Optional[int] = None
+    ) -> int:
+        """New version with the files of an earlier one; raises VersionNotFoundError or VersionConflictError"""
+
+    @abstractmethod
+    def list_versions(self, project_id: str) -> List[VersionInfo]: ...
+
+    @abstractmethod
+    def append_message(self, project_id: str, message: ChatMessage) -> None: ...
+
+    @abstractmethod
+    def get_history(self, project_id: str) -> List[ChatMessage]: ...
+
+    @abstractmethod
+    def get_messages(
+        self, project_id: str, after: int = 0, limit: int = 50
+    ) -> List[Tuple[int, ChatMessage]]:
+        """
+        Up to limit messages following the cursor after, with their cursors
+        (increasing, opaque to clients; 0 reads from the first message)
+        """
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+    def flush(self) -> None:
+        """Write buffered data now"""
+
+    def close(self) -> None:
+        self.flush()
+
+
+@dataclass
+class _MemoryProject:
+    # Manifests and creation times of the versions, version N at index N - 1
+    versions: List[Tuple[Dict[str, str], float]] = field(default_factory=list)
+    history: List[ChatMessage] = field(default_factory=list)
+    # Blobs referenced by any version
+    hashes: Set[str] = field(default_factory=set)
+    # Bytes of the manifests and messages (blobs are counted once, store-wide)
+    bytes: int = 0
+    last_access: float = 0.0
+
+
+class MemoryProjectStore(ProjectStore):
+    """
+    Process-local store, lost on restart (tests, single worker development).
+
+    Resident bytes (blobs, manifests, messages) are bounded by max_bytes:
+    least recently used projects are frozen, i.e. compressed in place, or
+    written to spill_dir when one is given, and thawed on their next access.
+    Compressed projects still count towards the budget; when that is not
+    enough the least recently used of them are dropped. Projects idle for
+    more than ttl seconds expire, frozen or not.
+    """
+
+    # Bookkeeping bytes counted for each manifest entry besides its path
+    ENTRY_OVERHEAD = 80
+    # Window of the eviction rate gauge, in seconds
+    RATE_WINDOW = 60
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        spill_dir: Optional[str] = None,
+        name: str = "project_store",
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.name = name
+        self._lock = threading.RLock()
+        self._blobs: Dict[str, str] = {}
+        self._blob_refs: Dict[str, int] = {}
+        self._projects: "OrderedDict[str, _MemoryProject]" = OrderedDict()
+        # Frozen projects: (compressed record, or None when spilled to disk, last access)
+        self._frozen: Dict[str, Tuple[Optional[bytes], float]] = {}
+        self._bytes = 0
+        self._evictions: Deque[float] = deque()
+        self._next_expiry = 0.0
+
+    def save_project(self, project_id: str, files: Dict[str, str]) -> int:
+        manifest, blobs = _split_files(files)
+        with self._lock:
+            project = self._touch(project_id, create=True)
+            history = project.history
+            self._release(project_id, project)
+            project = self._projects[project_id] = _MemoryProject(
+                history=history, last_access=time.monotonic()
+            )
+            self._account(project, history=history)
+            self._add_version(project, manifest, blobs)
+            self._enforce_budget()
+        return 1
+
+    def get_project(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None or not project.versions:
+                return None
+            version = len(project.versions) if version is None else version
+            if not 1 <= version <= len(project.versions):
+                return None
+            manifest = project.versions[version - 1][0]
+            files = {path: self._blobs[digest] for path, digest in manifest.items()}
+            self._enforce_budget()
+            return files, version
+
+    def get_manifest(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None or not project.versions:
+                return None
+            version = len(project.versions) if version is None else version
+            if not 1 <= version <= len(project.versions):
+                return None
+            manifest = dict(project.versions[version - 1][0])
+            self._enforce_budget()
+            return manifest, version
+
+    def get_blobs(self, hashes: Iterable[str]) -> Dict[str, str]:
+        with self._lock:
+            return {digest: self._blobs[digest] for digest in hashes}
+
+    def get_version(self, project_id: str) -> Optional[int]:
+        with self._lock:
+            project = self._projects.get(project_id)
+            if project is None and project_id in self._frozen:
+                # None when its spill file turned out to be unreadable
+                project = self._touch(project_id)
+                self._enforce_budget()
+            return (len(project.versions) or None) if project is not None else None
+
+    def _checked(
+        self, project_id: str, expected_version: Optional[int]
+    ) -> _MemoryProject:
+        project = self._touch(project_id)
+        if project is None or not project.versions:
+            raise ProjectNotFoundError(project_id)
+        if expected_version is not None and len(project.versions) != expected_version:
+            raise VersionConflictError(len(project.versions))
+        return project
+
+    def update_project(
+        self,
+        project_id: str,
+        files: Dict[str, str],
+        expected_version: Optional[int] = None,
+    ) -> int:
+        manifest, blobs = _split_files(files)
+        with self._lock:
+            project = self._checked(project_id, expected_version)
+            self._add_version(project, manifest, blobs)
+            self._enforce_budget()
+            return len(project.versions)
+
+    def revert_project(
+        self, project_id: str, version: int, expected_version: Optional[int] = None
+    ) -> int:
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None or not 1 <= version <= len(project.versions):
+                raise VersionNotFoundError(f"{project_id} v{version}")
+            project = self._checked(project_id, expected_version)
+            self._add_version(project, project.versions[version - 1][0], {})
+            self._enforce_budget()
+            return len(project.versions)
+
+    def list_versions(self, project_id: str) -> List[VersionInfo]:
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None:
+                return []
+            self._enforce_budget()
+            return [
+                VersionInfo(version=i, created_at=created_at, files=len(manifest))
+                for i, (manifest, created_at) in enumerate(project.versions, 1)
+            ]
+
+    def append_message(self, project_id: str, message: ChatMessage) -> None:
+        with self._lock:
+            project = self._touch(project_id, create=True)
+            project.history.append(message)
+            self._account(project, history=[message])
+            self._enforce_budget()
+
+    def get_history(self, project_id: str) -> List[ChatMessage]:
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None:
+                return []
+            self._enforce_budget()
+            return list(project.history)
+
+    def get_messages(
+        self, project_id: str, after: int = 0, limit: int = 50
+    ) -> List[Tuple[int, ChatMessage]]:
+        # The cursor of a message is its position in the history, from 1
+        with self._lock:
+            project = self._touch(project_id)
+            if project is None:
+                return []
+            after = max(0, after)
+            messages = project.history[after : after + limit]
+            self._enforce_budget()
+        return list(enumerate(messages, after + 1))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            self._trim_evictions()
+            return {
+                "resident_bytes": self._bytes,
+                "max_bytes": self.max_bytes or 0,
+                "projects": len(self._projects) + len(self._frozen),
+                "hot_projects": len(self._projects),
+                "frozen_projects": len(self._frozen),
+                "evictions_per_minute": len(self._evictions) * 60 / self.RATE_WINDOW,
+            }
+
+    @overload
+    def _touch(self, project_id: str, create: Literal[True]) -> _MemoryProject: ...
+
+    @overload
+    def _touch(
+        self, project_id: str, create: bool = False
+    ) -> Optional[_MemoryProject]: ...
+
+    def _touch(self, project_id: str, create: bool = False) -> Optional[_MemoryProject]:
+        """Project moved to the most recently used end, thawed if frozen"""
+        self._expire_idle()
+        project = self._projects.get(project_id)
+        if project is None and project_id in self._frozen:
+            project = self._thaw(project_id)
+        if project is None:
+            if not create:
+                return None
+            project = self._projects[project_id] = _MemoryProject()
+        self._projects.move_to_end(project_id)
+        project.last_access = time.monotonic()
+        return project
+
+    def _account(
+        self,
+        project: _MemoryProject,
+        manifest: Optional[Dict[str, str]] = None,
+        history: Sequence[ChatMessage] = (),
+    ) -> None:
+        size = sum(len(path) + self.ENTRY_OVERHEAD for path in manifest or ())
+        size += sum(len(message.content.encode("utf-8")) for message in history)
+        project.bytes += size
+        self._bytes += size
+
+    def _add_version(
+        self, project: _MemoryProject, manifest: Dict[str, str], blobs: Dict[str, str]
+    ) -> None:
+        for digest in set(manifest.values()) - project.hashes:
+            project.hashes.add(digest)
+            if self._blob_refs.get(digest, 0) == 0:
+                self._blobs[digest] = blobs[digest]
+                self._bytes += len(blobs[digest].encode("utf-8"))
+            self._blob_refs[digest] = self._blob_refs.get(digest, 0) + 1
+        project.versions.append((manifest, time.time()))
+        self._account(project, manifest)
+
+    def _release(self, project_id: str, project: _MemoryProject) -> None:
+        """Removes a hot project and the blobs only it referenced"""
+        del self._projects[project_id]
+        self._bytes -= project.bytes
+        for digest in project.hashes:
+            self._blob_refs[digest] -= 1
+            if self._blob_refs[digest] == 0:
+                del self._blob_refs[digest]
+                self._bytes -= len(self._blobs.pop(digest).encode("utf-8"))
+
+    def _freeze(self, project_id: str) -> None:
+        project = self._projects[project_id]
+        record = {
+            "versions": project.versions,
+            "history": [message.model_dump(mode="json") for message in project.history],
+            "blobs": {digest: self._blobs[digest] for digest in project.hashes},
+        }
+        payload = zlib.compress(json.dumps(record, ensure_ascii=False).encode("utf-8"))
+        self._release(project_id, project)
+        if self.spill_dir is not None:
+            try:
+                self._write_spill(project_id, payload)
+                self._frozen[project_id] = (None, project.last_access)
+                return
+            except OSError as e:
+                logger.warning(
+                    f"Could not spill project {project_id}, kept compressed in memory: {e}"
+                )
+        self._frozen[project_id] = (payload, project.last_access)
+        self._bytes += len(payload)
+
+    def _thaw(self, project_id: str) -> Optional[_MemoryProject]:
+        payload, last_access = self._frozen.pop(project_id)
+        if payload is not None:
+            self._bytes -= len(payload)
+        else:
+            path = self._spill_path(project_id)
+            try:
+                payload = path.read_bytes()
+                path.unlink()
+            except OSError as e:
+                logger.error(
+                    f"Spilled project {project_id} is unreadable, dropped: {e}"
+                )
+                return None
+        record = json.loads(zlib.decompress(payload))
+        history = [ChatMessage(**message) for message in record["history"]]
+        project = self._projects[project_id] = _MemoryProject(
+            history=history, last_access=last_access
+        )
+        self._account(project, history=history)
+        for manifest, created_at in record["versions"]:
+            self._add_version(project, manifest, record["blobs"])
+            project.versions[-1] = (manifest, created_at)
+        metrics.inc(f"{self.name}_thaws")
+        return project
+
+    def _drop_frozen(self, project_id: str) -> None:
+        payload, _ = self._frozen.pop(project_id)
+        if payload is not None:
+            self._bytes -= len(payload)
+        else:
+            self._spill_path(project_id).unlink(missing_ok=True)
+
+    def _enforce_budget(self) -> None:
+        """Freezes the least recently used projects, then drops frozen ones, until under max_bytes"""
+        if self.max_bytes is not None:
+            # The most recently used project stays hot
+            while self._bytes > self.max_bytes and len(self._projects) > 1:
+                self._freeze(next(iter(self._projects)))
+                self._evictions.append(time.monotonic())
+                metrics.inc(f"{self.name}_evictions")
+            if self._bytes > self.max_bytes:
+                for project_id in sorted(
+                    self._frozen, key=lambda pid: self._frozen[pid][1]
+                ):
+                    if self._bytes <= self.max_bytes:
+                        break
+                    if self._frozen[project_id][0] is not None:
+                        logger.warning(
+                            f"Memory budget exceeded, project {project_id} dropped"
+                        )
+                        self._drop_frozen(project_id)
+                        metrics.inc(f"{self.name}_drops")
+        self._trim_evictions()
+        metrics.set_gauge(f"{self.name}_resident_bytes", self._bytes)
+        metrics.set_gauge(
+            f"{self.name}_projects", len(self._projects) + len(self._frozen)
+        )
+        metrics.set_gauge(
+            f"{self.name}_evictions_per_minute",
+            len(self._evictions) * 60 / self.RATE_WINDOW,
+        )
+
+    def _trim_evictions(self) -> None:
+        cutoff = time.monotonic() - self.RATE_WINDOW
+        while self._evictions and self._evictions[0] < cutoff:
+            self._evictions.popleft()
+
+    def _expire_idle(self) -> None:
+        """Drops projects idle for more than ttl (scans at most every ttl / 10 seconds)"""
+        now = time.monotonic()
+        if not self.ttl or now < self._next_expiry:
+            return
+        self._next_expiry = now + self.ttl / 10
+        cutoff = now - self.ttl
+        while self._projects:
+            project_id, project = next(iter(self._projects.items()))
+            if project.last_access >= cutoff:
+                break
+            self._release(project_id, project)
+            metrics.inc(f"{self.name}_expirations")
+        for project_id in [
+            pid
+            for pid, (_, last_access) in self._frozen.items()
+            if last_access < cutoff
+        ]:
+            self._drop_frozen(project_id)
+            metrics.inc(f"{self.name}_expirations")
+
+    def _spill_path(self, project_id: str) -> Path:
+        assert self.spill_dir is not None
+        return (
+            self.spill_dir
+            / f"{hashlib.sha256(project_id.encode('utf-8')).hexdigest()}.json.z"
+        )
+
+    def _write_spill(self, project_id: str, payload: bytes) -> None:
+        path = self._spill_path(project_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a thaw never reads a partial record
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=path.parent, delete=False, suffix=".tmp"
+        ) as f:
+            f.write(payload)
+            temp_path = f.name
+        os.replace(temp_path, path)
+
+
+class SqliteProjectStore(ProjectStore):
+    """
+    SQLite store in WAL mode, shared by every worker process using the same file.
+
+    Project writes are immediate: a version is one transaction that bumps
+    the version counter, inserts the blobs not stored yet and the manifest.
+    Chat messages are buffered and inserted in one transaction every
+    flush_interval seconds or batch_size messages; reads of this process
+    flush first, other workers see them after the next flush. Projects not
+    updated for more than ttl seconds are deleted, with the blobs no other
+    version references.
+
+    File contents read from the database are kept in a hot cache bounded by
+    max_bytes, least recently used first out. Blobs are immutable (keyed by
+    their content hash), so the cache never serves stale files, even when
+    other workers write to the same database.
+    """
+
+    # Window of the eviction rate gauge, in seconds
+    RATE_WINDOW = 60
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        name: str = "project_store",
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.name = name
+        self._blob_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self._evictions: Deque[float] = deque()
+        self._next_expiry = 0.0
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, str, str, Optional[str]]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                content TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS project_versions (
+                project_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                manifest TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (project_id, version)
+            );
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                project_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                timestamp TEXT
+            );
+            CREATE INDEX IF NOT EXISTS chat_messages_project ON chat_messages (project_id, id);
+        """)
+
+    def _write(self, write: Callable[[sqlite3.Connection], _T]) -> _T:
+        """Runs write(connection) in one IMMEDIATE transaction (takes the database write lock up front)"""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = write(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+    @staticmethod
+    def _insert_version(
+        connection: sqlite3.Connection,
+        project_id: str,
+        version: int,
+        manifest: Dict[str, str],
+        blobs: Dict[str, str],
+    ) -> None:
+        connection.executemany(
+            "INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)", blobs.items()
+        )
+        connection.execute(
+            "INSERT INTO project_versions (project_id, version, manifest, created_at) VALUES (?, ?, ?, ?)",
+            (project_id, version, json.dumps(manifest), time.time()),
+        )
+
+    def save_project(self, project_id: str, files: Dict[str, str]) -> int:
+        manifest, blobs = _split_files(files)
+
+        def write(connection: sqlite3.Connection) -> int:
+            connection.execute(
+                "DELETE FROM project_versions WHERE project_id = ?", (project_id,)
+            )
+            connection.execute(
+                "INSERT INTO projects (project_id, version, updated_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(project_id) DO UPDATE SET version = 1, updated_at = excluded.updated_at",
+                (project_id, time.time()),
+            )
+            self._insert_version(connection, project_id, 1, manifest, blobs)
+            return 1
+
+        version = self._write(write)
+        self._expire_idle()
+        return version
+
+    def get_project(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        with self._lock:
+            stored = self.get_manifest(project_id, version)
+            if stored is None:
+                return None
+            manifest, version = stored
+            blobs = self.get_blobs(manifest.values())
+        return {path: blobs[digest] for path, digest in manifest.items()}, version
+
+    def get_manifest(
+        self, project_id: str, version: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, str], int]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT v.manifest, v.version FROM projects p JOIN project_versions v "
+                "ON v.project_id = p.project_id AND v.version = COALESCE(?, p.version) WHERE p.project_id = ?",
+                (version, project_id),
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def get_blobs(self, hashes: Iterable[str]) -> Dict[str, str]:
+        hashes = list(set(hashes))
+        if not hashes:
+            return {}
+        with self._lock:
+            blobs = {}
+            for digest in hashes:
+                content = self._blob_cache.get(digest)
+                if content is not None:
+                    self._blob_cache.move_to_end(digest)
+                    blobs[digest] = content
+            missing = [digest for digest in hashes if digest not in blobs]
+            if missing:
+                fetched = dict(
+                    self._connection.execute(
+                        f"SELECT hash, content FROM blobs WHERE hash IN ({', '.join('?' * len(missing))})",
+                        missing,
+                    ).fetchall()
+                )
+                blobs.update(fetched)
+                self._cache_blobs(fetched)
+            return blobs
+
+    def _cache_blobs(self, blobs: Dict[str, str]) -> None:
+        """Adds blobs to the hot cache and evicts the least recently used ones beyond max_bytes"""
+        if not self.max_bytes:
+            return
+        for digest, content in blobs.items():
+            size = len(content.encode("utf-8"))
+            if size > self.max_bytes or digest in self._blob_cache:
+                continue
+            self._blob_cache[digest] = content
+            self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, content = self._blob_cache.popitem(last=False)
+            self._bytes -= len(content.encode("utf-8"))
+            self._evictions.append(time.monotonic())
+            metrics.inc(f"{self.name}_evictions")
+        cutoff = time.monotonic() - self.RATE_WINDOW
+        while self._evictions and self._evictions[0] < cutoff:
+            self._evictions.popleft()
+        metrics.set_gauge(f"{self.name}_resident_bytes", self._bytes)
+        metrics.set_gauge(
+            f"{self.name}_evictions_per_minute",
+            len(self._evictions) * 60 / self.RATE_WINDOW,
+        )
+
+    def get_version(self, project_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM projects WHERE project_id = ?", (project_id,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def _add_version(
+        self,
+        connection: sqlite3.Connection,
+        project_id: str,
+        manifest: Dict[str, str],
+        blobs: Dict[str, str],
+        expected_version: Optional[int],
+    ) -> int:
+        query = "UPDATE projects SET version = version + 1, updated_at = ? WHERE project_id = ?"
+        params = [time.time(), project_id]
+        if expected_version is not None:
+            query += " AND version = ?"
+            params.append(expected_version)
+        row = connection.execute(query + " RETURNING version", params).fetchone()
+        if row is None:
+            current = connection.execute(
+                "SELECT version FROM projects WHERE project_id = ?", (project_id,)
+            ).fetchone()
+            if current is None:
+                raise ProjectNotFoundError(project_id)
+            raise VersionConflictError(current[0])
+        version: int = row[0]
+        self._insert_version(connection, project_id, version, manifest, blobs)
+        return version
+
+    def update_project(
+        self,
+        project_id: str,
+        files: Dict[str, str],
+        expected_version: Optional[int] = None,
+    ) -> int:
+        manifest, blobs = _split_files(files)
+        return self._write(
+            lambda connection: self._add_version(
+                connection, project_id, manifest, blobs, expected_version
+            )
+        )
+
+    def revert_project(
+        self, project_id: str, version: int, expected_version: Optional[int] = None
+    ) -> int:
+        def write(connection: sqlite3.Connection) -> int:
+            row = connection.execute(
+                "SELECT manifest FROM project_versions WHERE project_id = ? AND version = ?",
+                (project_id, version),
+            ).fetchone()
+            if row is None:
+                raise VersionNotFoundError(f"{project_id} v{version}")
+            # The blobs of that version are already stored
+            return self._add_version(
+                connection, project_id, json.loads(row[0]), {}, expected_version
+            )
+
+        return self._write(write)
+
+    def list_versions(self, project_id: str) -> List[VersionInfo]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT version, created_at, manifest FROM project_versions WHERE project_id = ? ORDER BY version",
+                (project_id,),
+            ).fetchall()
+        return [
+            VersionInfo(
+                version=version, created_at=created_at, files=len(json.loads(manifest))
+            )
+            for version, created_at, manifest in rows
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            projects = self._connection.execute(
+                "SELECT COUNT(*) FROM projects"
+            ).fetchone()[0]
+            cutoff = time.monotonic() - self.RATE_WINDOW
+            while self._evictions and self._evictions[0] < cutoff:
+                self._evictions.popleft()
+            stats = {
+                "projects": projects,
+                "database_bytes": self.path.stat().st_size,
+                "resident_bytes": self._bytes,
+                "max_bytes": self.max_bytes or 0,
+                "cached_blobs": len(self._blob_cache),
+                "evictions_per_minute": len(self._evictions) * 60 / self.RATE_WINDOW,
+            }
+        metrics.set_gauge(f"{self.name}_projects", projects)
+        return stats
+
+    def _expire_idle(self) -> None:
+        """Deletes projects idle for more than ttl (at most every ttl / 10 seconds)"""
+        now = time.monotonic()
+        if not self.ttl or now < self._next_expiry:
+            return
+        self._next_expiry = now + self.ttl / 10
+        self.flush()
+        cutoff = time.time() - self.ttl
+
+        def write(connection: sqlite3.Connection) -> List[str]:
+            expired = [
+                row[0]
+                for row in connection.execute(
+                    "DELETE FROM projects WHERE updated_at < ? RETURNING project_id",
+                    (cutoff,),
+                ).fetchall()
+            ]
+            if not expired:
+                return expired
+            for table in ("project_versions", "chat_messages"):
+                connection.executemany(
+                    f"DELETE FROM {table} WHERE project_id = ?",
+                    [(pid,) for pid in expired],
+                )
+            connection.execute(
+                "DELETE FROM blobs WHERE hash NOT IN "
+                "(SELECT j.value FROM project_versions v, json_each(v.manifest) j)"
+            )
+            return expired
+
+        expired = self._write(write)
+        if expired:
+            metrics.inc("project_store_expirations", len(expired))
+            logger.info(f"{len(expired)} idle projects expired from the store")
+
+    def append_message(self, project_id: str, message: ChatMessage) -> None:
+        timestamp = message.timestamp.isoformat() if message.timestamp else None
+        with self._lock:
+            self._pending.append((project_id, message.role, message.content, timestamp))
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def get_history(self, project_id: str) -> List[ChatMessage]:
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute(
+                "SELECT role, content, timestamp FROM chat_messages WHERE project_id = ? ORDER BY id",
+                (project_id,),
+            ).fetchall()
+        return [
+            ChatMessage(
+                role=role,
+                content=content,
+                timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+            )
+            for role, content, timestamp in rows
+        ]
+
+    def get_messages(
+        self, project_id: str, after: int = 0, limit: int = 50
+    ) -> List[Tuple[int, ChatMessage]]:
+        # The cursor of a message is its row id (range scan on the (project_id, id) index)
+        with self._lock:
+            self.flush()
+            rows = self._connection.execute(
+                "SELECT id, role, content, timestamp FROM chat_messages WHERE project_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (project_id, after, limit),
+            ).fetchall()
+        return [
+            (
+                message_id,
+                ChatMessage(
+                    role=role,
+                    content=content,
+                    timestamp=datetime.fromisoformat(timestamp) if timestamp else None,
+                ),
+            )
+            for message_id, role, content, timestamp in rows
+        ]
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            try:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    "INSERT INTO chat_messages (project_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                    batch,
+                )
+                self._connection.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                logger.error(f"Could not write {len(batch)} chat messages: {e}")
+                self._pending = batch + self._pending
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._connection.close()
+
+
+def create_project_store() -> ProjectStore:
+    """Store selected by PROJECT_STORE"""
+    if PROJECT_STORE == "memory":
+        return MemoryProjectStore(
+            PROJECT_STORE_MAX_BYTES or None,
+            PROJECT_STORE_TTL or None,
+            PROJECT_STORE_SPILL_DIR or None,
+        )
+    if PROJECT_STORE == "sqlite":
+        return SqliteProjectStore(
+            PROJECT_STORE_PATH,
+            PROJECT_STORE_BATCH_SIZE,
+            PROJECT_STORE_FLUSH_INTERVAL,
+            PROJECT_STORE_TTL or None,
+            PROJECT_STORE_MAX_BYTES or None,
+        )
+    raise ValueError(f"Unknown PROJECT_STORE {PROJECT_STORE!r} (memory or sqlite)")
@@ -0,0 +1,135 @@
+import random
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config.settings import WARM_START_MIN_SCORE, SIMILARITY_INDEX_MAX_ENTRIES
+from app.services.generation_cache import normalize_request_text
+
+# Words that say nothing about what the application does
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "with", "for", "to", "of", "in", "on", "my", "simple", "basic",
+    "app", "apps", "application", "applications", "web", "page", "site", "website",
+    "un", "une", "le", "la", "les", "de", "des", "du", "et", "ou", "avec", "pour", "en", "sur", "qui",
+    "appli", "basique",
+}
+# Actions nearly every request asks for: they do not tell two applications apart
+_GENERIC_ACTIONS = {
+    "add", "adding", "create", "delete", "deleting", "deletion", "remove", "removing", "edit", "editing",
+    "update", "view", "manage", "management",
+    "ajouter", "ajout", "créer", "supprimer", "suppression", "modifier", "modification", "afficher", "gérer",
+}
+_PRIME = (1 << 61) - 1
+
+def request_shingles(description: str, features: str = "") -> Set[str]:
+    """Content words of a request plus their character trigrams"""
+    words = [w for w in re.findall(r"\w+", normalize_request_text(f"{description} {features}"))
+             if w not in _STOPWORDS and w not in _GENERIC_ACTIONS and len(w) > 1]
+    shingles: Set[str] = set(words)
+    for word in words:
+        shingles.update(word[i:i + 3] for i in range(len(word) - 2))
+    return shingles
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index of past generation requests.
+
+    Each request is reduced to a set of shingles and a MinHash signature;
+    signatures are split into bands so that similar requests share at least
+    one bucket, and only those candidates are compared. With two rows per
+    band, a pair at similarity 0.4 shares a bucket with probability > 0.9999.
+    Only projects whose evaluation score reached min_score are indexed, the
+    oldest are dropped beyond max_entries.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 64, max_entries: int = 500, min_score: float = 7.0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.min_score = min_score
+        generator = random.Random(4242)
+        self._perms = [(generator.randrange(1, _PRIME), generator.randrange(0, _PRIME)) for _ in range(num_perm)]
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms)
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, key: str, description: str, features: str, project: Dict[str, str], score: float) -> bool:
+        """Index a scored project; returns False when its score is too low"""
+        shingles = request_shingles(description, features)
+        # A request made only of generic words ("create an app") is similar to nothing
+        if score < self.min_score or not project or not shingles:
+            return False
+        signature = self.signature(shingles)
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None:
+                if previous["score"] > score:
+                    return False
+                self._remove(key)
+            self._entries[key] = {
+                "key": key,
+                "description": description,
+                "features": features,
+                "project": dict(project),
+                "score": score,
+                "signature": signature,
+            }
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def query(self, description: str, features: str = "", threshold: float = 0.5) -> Optional[Dict[str, Any]]:
+        """Most similar indexed request above threshold, with its estimated similarity"""
+        shingles = request_shingles(description, features)
+        if not shingles:
+            return None
+        signature = self.signature(shingles)
+        with self._lock:
+            candidates: Set[str] = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            best = None
+            best_similarity = threshold
+            for key in candidates:
+                entry = self._entries[key]
+                similarity = sum(1 for x, y in zip(signature, entry["signature"]) if x == y) / self.num_perm
+                if similarity > best_similarity or (similarity == best_similarity and best is None):
+                    best, best_similarity = entry, similarity
+            if best is None:
+                return None
+            return {
+                "key": best["key"],
+                "description": best["description"],
+                "features": best["features"],
+                "project": dict(best["project"]),
+                "score": best["score"],
+                "similarity": best_similarity,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for band_key in self._band_keys(entry["signature"]):
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+# Global index, fed by the background evaluations
+similarity_index = SimilarityIndex(max_entries=SIMILARITY_INDEX_MAX_ENTRIES, min_score=WARM_START_MIN_SCORE)
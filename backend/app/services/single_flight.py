@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config.settings import IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_RESULTS
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def payload_key(prefix: str, payload: Any) -> str:
+    """Stable key of a JSON-serializable payload"""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{prefix}:{digest}"
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests onto a single in-flight task.
+
+    A task is registered under every key given to do(); a request matching
+    any of them awaits the existing task instead of starting a new one. The
+    task is shielded, so it completes even when every caller has gone away.
+    When an idempotency key is given, the successful result is kept for
+    ttl seconds and replayed to later requests with the same key in the same
+    scope (operation and resource), so a key reused elsewhere never replays it.
+    """
+
+    def __init__(self, ttl: float, max_results: int):
+        self.ttl = ttl
+        self.max_results = max_results
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def do(self, keys: List[str], factory: Callable[[], Awaitable[Any]],
+                 idempotency_key: Optional[str] = None,
+                 is_success: Callable[[Any], bool] = lambda result: True,
+                 scope: Tuple[str, ...] = ()) -> Any:
+        """
+        Run factory() once for all concurrent callers sharing one of the keys;
+        the idempotency key only matches requests of the same scope
+        """
+        scoped_key = None
+        if idempotency_key:
+            scoped_key = payload_key("idempotency", [*scope, idempotency_key])
+            found, result = self._recall(scoped_key)
+            if found:
+                metrics.inc("idempotent_replays")
+                logger.info(f"Résultat rejoué pour la clé d'idempotence {idempotency_key}")
+                return result
+            keys = [scoped_key] + keys
+
+        task = next((self._inflight[key] for key in keys if key in self._inflight), None)
+        if task is not None:
+            metrics.inc("single_flight_joined")
+            logger.info("Requête identique déjà en cours, en attente de son résultat")
+            # The joining caller's own keys lead to the shared task too, and its
+            # idempotency key records the result like the first caller's
+            keys = [key for key in keys if key not in self._inflight]
+        else:
+            task = asyncio.ensure_future(factory())
+        for key in keys:
+            self._inflight[key] = task
+        task.add_done_callback(lambda done: self._complete(done, keys, scoped_key, is_success))
+        return await asyncio.shield(task)
+
+    def _complete(self, task: "asyncio.Task[Any]", keys: List[str], scoped_key: Optional[str],
+                  is_success: Callable[[Any], bool]) -> None:
+        for key in keys:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        if task.cancelled() or task.exception() is not None or not scoped_key:
+            return
+        result = task.result()
+        if is_success(result):
+            self._results[scoped_key] = (time.monotonic() + self.ttl, result)
+            self._results.move_to_end(scoped_key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def _recall(self, scoped_key: str) -> Tuple[bool, Any]:
+        entry = self._results.get(scoped_key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._results[scoped_key]
+            return False, None
+        return True, result
+
+# Global instance shared by generation and chat requests (keys are prefixed, idempotency keys scoped)
+single_flight = SingleFlight(IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_RESULTS)
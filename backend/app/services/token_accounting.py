@@ -0,0 +1,254 @@
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from app.config.settings import (
+    TOKEN_USAGE_SINK,
+    TOKEN_USAGE_PATH,
+    TOKEN_USAGE_BATCH_SIZE,
+    TOKEN_USAGE_FLUSH_INTERVAL,
+    TOKEN_USAGE_RATE_WINDOW,
+)
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Tags of the LLM calls made by the current request (copied into worker threads
+# by the LLM pool, and into the tasks it creates by asyncio)
+_usage_tags: ContextVar[Dict[str, Optional[str]]] = ContextVar("token_usage_tags", default={})
+
+@contextmanager
+def usage_tags(**tags: Optional[str]) -> Iterator[None]:
+    """Tag the LLM calls made inside the block (endpoint, project_id, evaluation_run)"""
+    token = _usage_tags.set({**_usage_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _usage_tags.reset(token)
+
+def current_usage_tags() -> Dict[str, Optional[str]]:
+    return dict(_usage_tags.get())
+
+class JsonlUsageSink:
+    """One JSON record per line"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+class SqliteUsageSink:
+    """token_usage table, indexed by endpoint and project"""
+
+    COLUMNS = ("ts", "endpoint", "project_id", "evaluation_run", "provider", "model",
+               "prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", "cache_write_tokens", "latency")
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS token_usage ("
+                    "ts REAL, endpoint TEXT, project_id TEXT, evaluation_run TEXT, provider TEXT, model TEXT, "
+                    "prompt_tokens INTEGER, completion_tokens INTEGER, total_tokens INTEGER, "
+                    "cached_tokens INTEGER, cache_write_tokens INTEGER, latency REAL)"
+                )
+                # Tables created before the prompt cache counters
+                existing = {row[1] for row in connection.execute("PRAGMA table_info(token_usage)")}
+                for column in ("cached_tokens", "cache_write_tokens"):
+                    if column not in existing:
+                        connection.execute(f"ALTER TABLE token_usage ADD COLUMN {column} INTEGER")
+                connection.execute("CREATE INDEX IF NOT EXISTS token_usage_endpoint ON token_usage (endpoint, ts)")
+                connection.execute("CREATE INDEX IF NOT EXISTS token_usage_project ON token_usage (project_id)")
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        connection = self._connect()
+        try:
+            with connection:
+                connection.executemany(
+                    f"INSERT INTO token_usage ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                    [tuple(record.get(column) for column in self.COLUMNS) for record in records]
+                )
+        finally:
+            connection.close()
+
+def _empty_totals() -> Dict[str, float]:
+    return {"calls": 0, "calls_without_usage": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "total_tokens": 0, "cached_tokens": 0, "cache_write_tokens": 0, "latency_seconds": 0.0}
+
+def _cache_usage(usage: Any) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Prompt tokens read from and written to the provider's prompt cache
+    (OpenAI prompt_tokens_details.cached_tokens, Anthropic-style fields forwarded by the proxy)
+    """
+    if usage is None:
+        return None, None
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return cached, getattr(usage, "cache_creation_input_tokens", None)
+
+class TokenAccountant:
+    """
+    Records the token usage of every LLM call.
+
+    Records are tagged with the current usage_tags(), added to running totals
+    and buffered; a background thread writes them to the sink in batches
+    (every flush_interval seconds, or sooner once batch_size records wait).
+    Rates are computed over the last rate_window seconds.
+    """
+
+    def __init__(self, sink: Optional[Any], batch_size: int = 100, flush_interval: float = 5.0,
+                 rate_window: float = 300.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer: List[Dict[str, Any]] = []
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._by_model: Dict[str, Dict[str, float]] = {}
+        self._recent: Dict[str, Deque[Tuple[float, int]]] = {}
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, provider: str, model: str, usage: Any, latency: float) -> Dict[str, Any]:
+        """Account for one call; usage is the provider's usage object (or None)"""
+        tags = current_usage_tags()
+        cached_tokens, cache_write_tokens = _cache_usage(usage)
+        record = {
+            "ts": time.time(),
+            "endpoint": tags.get("endpoint") or "other",
+            "project_id": tags.get("project_id"),
+            "evaluation_run": tags.get("evaluation_run"),
+            "provider": provider,
+            "model": model,
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+            "cached_tokens": cached_tokens,
+            "cache_write_tokens": cache_write_tokens,
+            "latency": latency,
+        }
+        with self._lock:
+            for totals in (self._totals.setdefault(record["endpoint"], _empty_totals()),
+                           self._by_model.setdefault(model, _empty_totals())):
+                totals["calls"] += 1
+                totals["latency_seconds"] += latency
+                if usage is None:
+                    totals["calls_without_usage"] += 1
+                for field in ("prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", "cache_write_tokens"):
+                    totals[field] += record[field] or 0
+            recent = self._recent.setdefault(record["endpoint"], deque())
+            recent.append((record["ts"], record["total_tokens"] or 0))
+            self._trim(recent, record["ts"])
+            if self.sink is not None:
+                self._buffer.append(record)
+                self._ensure_flusher()
+                if len(self._buffer) >= self.batch_size:
+                    self._wakeup.set()
+        metrics.inc("llm_calls")
+        metrics.inc("llm_tokens", record["total_tokens"] or 0)
+        metrics.inc("llm_cached_tokens", record["cached_tokens"] or 0)
+        return record
+
+    def flush(self) -> int:
+        """Write the buffered records now; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                self.sink.write(batch)
+            except Exception as e:
+                logger.warning(f"Could not write {len(batch)} token usage records: {e}")
+                metrics.inc("token_usage_flush_errors")
+                with self._lock:
+                    # Keep them for the next flush, bounded so a broken sink cannot grow memory forever
+                    self._buffer = (batch + self._buffer)[-10 * self.batch_size:]
+                return 0
+            return len(batch)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            endpoints = {}
+            for endpoint, totals in self._totals.items():
+                recent = self._recent[endpoint]
+                self._trim(recent, now)
+                minutes = self.rate_window / 60
+                endpoints[endpoint] = {
+                    **totals,
+                    "calls_per_minute": len(recent) / minutes,
+                    "tokens_per_minute": sum(tokens for _, tokens in recent) / minutes,
+                    "cached_prompt_ratio": totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0,
+                }
+            overall = _empty_totals()
+            for totals in self._totals.values():
+                for field, value in totals.items():
+                    overall[field] += value
+            return {
+                "totals": overall,
+                "endpoints": endpoints,
+                "models": {model: dict(totals) for model, totals in self._by_model.items()},
+                "rate_window_seconds": self.rate_window,
+                "buffered_records": len(self._buffer),
+            }
+
+    def _trim(self, recent: Deque[Tuple[float, int]], now: float) -> None:
+        while recent and recent[0][0] < now - self.rate_window:
+            recent.popleft()
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.flush()
+
+    def _ensure_flusher(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="token-usage-flush", daemon=True)
+            self._thread.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+def _make_sink() -> Optional[Any]:
+    if TOKEN_USAGE_SINK == "jsonl":
+        return JsonlUsageSink(TOKEN_USAGE_PATH or "token_usage.jsonl")
+    if TOKEN_USAGE_SINK == "sqlite":
+        return SqliteUsageSink(TOKEN_USAGE_PATH or "token_usage.db")
+    if TOKEN_USAGE_SINK:
+        logger.warning(f"Unknown TOKEN_USAGE_SINK {TOKEN_USAGE_SINK!r}, token usage is only kept in memory")
+    return None
+
+# Global accountant, fed by the LLM wrappers of app/core
+token_accounting = TokenAccountant(
+    _make_sink(),
+    batch_size=TOKEN_USAGE_BATCH_SIZE,
+    flush_interval=TOKEN_USAGE_FLUSH_INTERVAL,
+    rate_window=TOKEN_USAGE_RATE_WINDOW
+)
+atexit.register(token_accounting.close)
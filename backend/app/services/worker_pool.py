@@ -0,0 +1,96 @@
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from app.config.settings import LLM_POOL_MAX_WORKERS, LLM_POOL_MAX_QUEUE, LLM_POOL_RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the waiting queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Worker pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class BoundedWorkerPool:
+    """
+    Thread pool with a bounded waiting queue for blocking LLM work.
+
+    At most max_workers jobs run at once and at most max_queue jobs wait for a
+    free worker; any further submission is rejected immediately with
+    PoolSaturatedError instead of piling up behind the running jobs.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retry_after: int, name: str = "llm-worker"):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Execute func(*args, **kwargs) on a worker thread and await its result"""
+        return await self.submit(func, *args, **kwargs)
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> "asyncio.Future[Any]":
+        """
+        Schedule func(*args, **kwargs) on a worker thread and return an awaitable future.
+
+        Must be called from the event loop; raises PoolSaturatedError right away
+        when the pool is full.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise PoolSaturatedError(self.retry_after)
+            self._pending += 1
+
+        # Propagate context variables (request tags, etc.) to the worker thread
+        context = contextvars.copy_context()
+
+        def job() -> Any:
+            with self._lock:
+                self._running += 1
+            try:
+                return context.run(func, *args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+
+        try:
+            future = self._executor.submit(job)
+        except RuntimeError:
+            # Executor already shut down: the job will never release its slot
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        def release_if_cancelled(done: "Future[Any]") -> None:
+            # A job cancelled before it started (pool shutdown, or its caller gave
+            # up while it was queued) never runs, so its slot is released here
+            if done.cancelled():
+                with self._lock:
+                    self._pending -= 1
+
+        future.add_done_callback(release_if_cancelled)
+        return asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+# Global pool shared by project generation and chat modifications
+llm_pool = BoundedWorkerPool(LLM_POOL_MAX_WORKERS, LLM_POOL_MAX_QUEUE, LLM_POOL_RETRY_AFTER)
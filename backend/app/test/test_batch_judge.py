@@ -0,0 +1,91 @@
+import sys
+import os
+import json
+import re
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.evaluation import simple_evaluator
+from app.evaluation.simple_evaluator import SimpleFrontendEvaluator
+from app.evaluation.batch_judge import JUDGE_CRITERIA, estimate_tokens, batch_prompt, parse_batch_response, plan_batches
+from app.services.judge_cache import JudgeCache
+from app.test.test_static_analyzer import project
+
+SINGLE_RESPONSE = '{"code_quality": 5, "requirements_fulfillment": 5, "compliance": 5, "overall_score": 5, "feedback": "single"}'
+
+class BatchJudge:
+    """Scores every project of a batch prompt except those listed in `skip`"""
+    model_name = "judge-model"
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.prompts = []
+
+    def call(self, messages):
+        prompt = messages[0]["content"]
+        self.prompts.append(prompt)
+        ids = re.findall(r"=== PROJECT (\w+) ===", prompt)
+        if not ids:
+            return SINGLE_RESPONSE
+        return "Here you go: " + json.dumps({"evaluations": [
+            {"id": project_id, "code_quality": 8, "requirements_fulfillment": 9, "compliance": 7, "feedback": "batch"}
+            for project_id in ids if project_id not in self.skip
+        ]})
+
+def test_both_judge_prompts_share_the_criteria_and_the_cache_version(monkeypatch):
+    assert JUDGE_CRITERIA in simple_evaluator.JUDGE_PROMPT_TEMPLATE and JUDGE_CRITERIA in batch_prompt([])
+    assert simple_evaluator.judge_prompt_version() == simple_evaluator.JUDGE_PROMPT_VERSION
+    # Editing the batch prompt invalidates the cached verdicts
+    monkeypatch.setattr(simple_evaluator, "BATCH_JUDGE_SECTION", simple_evaluator.BATCH_JUDGE_SECTION + "\n    Be strict.")
+    assert simple_evaluator.judge_prompt_version() != simple_evaluator.JUDGE_PROMPT_VERSION
+
+def test_plan_batches_respects_budget():
+    overhead = estimate_tokens(batch_prompt([]))
+    assert plan_batches([100] * 5, overhead + 250, max_projects=8) == [[0, 1], [2, 3], [4]]
+    assert plan_batches([100] * 5, overhead + 1000, max_projects=2) == [[0, 1], [2, 3], [4]]
+    # An oversized project is judged alone
+    assert plan_batches([50, 5000, 50], overhead + 200, max_projects=8) == [[0], [1], [2]]
+    assert plan_batches([], 1000, max_projects=8) == []
+
+def test_parse_batch_response_validates_entries():
+    response = json.dumps({"evaluations": [
+        {"id": "p1", "code_quality": 8, "requirements_fulfillment": 9, "compliance": 7, "feedback": "ok"},
+        {"id": "p2", "code_quality": 42, "requirements_fulfillment": 9, "compliance": 7},
+        {"id": "p3", "code_quality": "7", "requirements_fulfillment": 6, "compliance": 7},
+        {"id": "p9", "code_quality": 8, "requirements_fulfillment": 9, "compliance": 7},
+    ]})
+    scores = parse_batch_response(response, ["p1", "p2", "p3"])
+    assert sorted(scores) == ["p1", "p3"]
+    assert scores["p3"].code_quality == 7
+    assert parse_batch_response("not json", ["p1"]) == {}
+    assert parse_batch_response('{"scores": []}', ["p1"]) == {}
+
+def test_batch_judging_with_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(simple_evaluator, "judge_cache", JudgeCache(10, str(tmp_path)))
+    evaluator = SimpleFrontendEvaluator()
+    evaluator.llm_judge = BatchJudge(skip={"p2"})
+    analyzed = []
+    analyze_projects = simple_evaluator.analyze_projects
+    monkeypatch.setattr(simple_evaluator, "analyze_projects", lambda projects: analyzed.append(len(projects)) or analyze_projects(projects))
+    broken = project(**{"/index.js": None})
+    items = [
+        ({"description": f"App {i}", "features": ""}, project() if i != 3 else broken)
+        for i in range(4)
+    ] + [({"description": "Empty", "features": ""}, {})]
+
+    evaluations = evaluator._llm_judge_batch(items, token_budget=100000, concurrency=2)
+
+    # One batch call for p1, p2, p3 and one single call for p2, missing from the batch response
+    assert len(evaluator.llm_judge.prompts) == 2
+    assert [e["feedback"] for e in evaluations[:3]] == ["batch", "single", "batch"]
+    assert evaluations[0]["weighted_score"] == 8.25
+    assert evaluations[3]["judge_skipped"]
+    assert evaluations[4]["overall_score"] == 0
+    # The static checks of the batch ran in one call, empty project excluded
+    assert analyzed == [4]
+
+    # Everything judged is now cached
+    again = evaluator._llm_judge_batch(items, token_budget=100000)
+    assert len(evaluator.llm_judge.prompts) == 2
+    assert all(e["judge_cached"] for e in again[:4])
@@ -0,0 +1,124 @@
+"""
+Tests for the chat and project routes: conditional GETs (ETag / If-None-Match),
+version deltas and cursor-paginated messages
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import chat_routes
+from app.models.schemas import ChatMessage
+from app.services.chat_service import ProjectChatService
+from app.services.project_store import MemoryProjectStore
+
+V1 = {"/App.js": "// v1\n", "/index.js": "import App from './App';\n", "/styles.js": "export default {};\n"}
+V2 = {"/App.js": "// v2\n", "/index.js": "import App from './App';\n", "/Button.js": "// button\n"}
+
+@pytest.fixture
+def service(monkeypatch):
+    service = ProjectChatService(MemoryProjectStore())
+    monkeypatch.setattr(chat_routes, "project_chat_service", service)
+    service.store_project("p1", V1)
+    return service
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(chat_routes.router, prefix="/api/chat")
+    return TestClient(app)
+
+def test_matching_etag_answers_304(client):
+    first = client.get("/api/chat/projects/p1")
+    assert first.status_code == 200 and first.json()["project_data"] == V1
+    etag = first.headers["ETag"]
+
+    cached = client.get("/api/chat/projects/p1", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert cached.headers["ETag"] == etag
+    # Weak and multiple validators are compared the same way
+    assert client.get("/api/chat/projects/p1", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+def test_stale_etag_gets_the_new_version(client, service):
+    etag = client.get("/api/chat/projects/p1").headers["ETag"]
+    service.store.update_project("p1", V2)
+
+    response = client.get("/api/chat/projects/p1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["version"] == 2 and response.json()["project_data"] == V2
+
+def test_since_version_returns_only_the_changes(client, service):
+    service.store.update_project("p1", V2)
+
+    body = client.get("/api/chat/projects/p1", params={"since_version": 1}).json()
+    assert body["version"] == 2 and "project_data" not in body
+    assert body["project_delta"] == {
+        "base_version": 1,
+        "version": 2,
+        "added": {"/Button.js": "// button\n"},
+        "changed": {"/App.js": "// v2\n"},
+        "removed": ["/styles.js"],
+    }
+    # An unknown base version falls back to the whole project
+    body = client.get("/api/chat/projects/p1", params={"since_version": 7}).json()
+    assert body["project_data"] == V2 and "project_delta" not in body
+
+def test_history_etag_and_delta(client, service):
+    history = client.get("/api/chat/chat/p1/history")
+    etag = history.headers["ETag"]
+    assert history.json()["current_project"] == V1
+    assert client.get("/api/chat/chat/p1/history", headers={"If-None-Match": etag}).status_code == 304
+
+    # A new message changes the history without a new version
+    service.add_message_to_history("p1", ChatMessage(role="assistant", content="Erreur"))
+    response = client.get("/api/chat/chat/p1/history", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+
+    service.store.update_project("p1", V2)
+    body = client.get("/api/chat/chat/p1/history", params={"since_version": 1}).json()
+    assert body["project_version"] == 2 and body["current_project"] is None
+    assert body["project_delta"]["changed"] == {"/App.js": "// v2\n"}
+    assert [message["content"] for message in body["chat_history"]] == ["Erreur"]
+
+def test_unknown_project_is_404(client):
+    assert client.get("/api/chat/projects/missing").status_code == 404
+    assert client.get("/api/chat/chat/missing/history").status_code == 404
+
+def test_messages_are_paged_by_cursor(client, service):
+    for i in range(5):
+        service.add_message_to_history("p1", ChatMessage(role="user" if i % 2 == 0 else "assistant", content=f"m{i}"))
+
+    first = client.get("/api/chat/chat/p1/messages", params={"limit": 2}).json()
+    assert [(m["id"], m["role"], m["content"]) for m in first["messages"]] == [(1, "user", "m0"), (2, "assistant", "m1")]
+    assert first["next_cursor"] == 2 and first["has_more"]
+    # Messages only, the project files are fetched separately
+    assert "current_project" not in first and "project_data" not in first
+
+    second = client.get("/api/chat/chat/p1/messages", params={"after": first["next_cursor"], "limit": 2}).json()
+    assert [m["content"] for m in second["messages"]] == ["m2", "m3"] and second["has_more"]
+    last = client.get("/api/chat/chat/p1/messages", params={"after": second["next_cursor"], "limit": 2}).json()
+    assert [m["content"] for m in last["messages"]] == ["m4"] and not last["has_more"]
+    assert last["next_cursor"] == 5
+
+def test_page_past_the_end_is_empty(client, service):
+    service.add_message_to_history("p1", ChatMessage(role="user", content="only"))
+    page = client.get("/api/chat/chat/p1/messages", params={"after": 1}).json()
+    assert page["success"] and page["messages"] == [] and not page["has_more"]
+    # No messages: no cursor (excluded from the response)
+    assert "next_cursor" not in page
+    assert client.get("/api/chat/chat/p1/messages", params={"after": 50}).json()["messages"] == []
+
+def test_page_size_is_clamped(client, service):
+    for i in range(chat_routes.MAX_MESSAGES_PAGE + 5):
+        service.add_message_to_history("p1", ChatMessage(role="user", content=f"m{i}"))
+    page = client.get("/api/chat/chat/p1/messages", params={"limit": 10_000}).json()
+    assert len(page["messages"]) == chat_routes.MAX_MESSAGES_PAGE and page["has_more"]
+    assert client.get("/api/chat/chat/p1/messages").json()["messages"][-1]["id"] == 50
+    for invalid in ({"limit": 0}, {"after": -1}):
+        assert client.get("/api/chat/chat/p1/messages", params=invalid).status_code == 422
+    assert client.get("/api/chat/chat/missing/messages").status_code == 404
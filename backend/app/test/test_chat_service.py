@@ -0,0 +1,172 @@
+"""
+Tests for chat modifications: per-project serialization, version checks and
+coalescing of message bursts (crew stubbed)
+"""
+import sys
+import os
+import json
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import chat_routes
+from app.services import chat_service
+from app.services.chat_service import ProjectChatService
+from app.services.project_store import MemoryProjectStore
+
+PROJECT = {"/App.js": "// v1\n", "/index.js": "import App from './App';\n"}
+
+class StubCrew:
+    """Modification crew appending each instruction to App.js, `delay` seconds per call"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.instructions = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, user_message, current_project):
+        with self._lock:
+            self.instructions.append(user_message)
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return json.dumps({**current_project, "/App.js": current_project["/App.js"] + f"// {user_message}\n"})
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(chat_service, "CHAT_PATCH_MODE", False)
+    service = ProjectChatService(MemoryProjectStore())
+    service.debounce_seconds = 0
+    service.crew = StubCrew()
+    service._run_modification_crew = service.crew
+    service.store_project("p1", PROJECT)
+    return service
+
+def send(service, *messages, expected_version=None):
+    async def run():
+        return await asyncio.gather(*(
+            service.process_chat_message("p1", message, expected_version=expected_version) for message in messages
+        ))
+    return asyncio.run(run())
+
+def test_concurrent_edits_to_a_project_are_serialized(service):
+    service.crew.delay = 0.05
+    service.store_project("p2", PROJECT)
+
+    async def run():
+        return await asyncio.gather(
+            *(service.process_chat_message("p1", f"edit {i}") for i in range(3)),
+            service.process_chat_message("p2", "other project"),
+        )
+
+    responses = asyncio.run(run())
+    assert all(response.success for response in responses)
+    assert sorted(response.project_version for response in responses[:3]) == [2, 3, 4]
+    # Each edit was applied on the version produced by the previous one
+    app = service.get_project("p1")["/App.js"]
+    assert all(f"// edit {i}\n" in app for i in range(3))
+    assert service.current_version("p1") == 4
+    # Projects are independent: p2 ran alongside p1, never two edits of p1 at once
+    assert service.crew.peak_active == 2
+    assert service._project_locks == {}
+
+def test_stale_expected_version_conflicts_before_any_llm_call(service):
+    assert send(service, "first", expected_version=1)[0].project_version == 2
+    calls = len(service.crew.instructions)
+
+    (response,) = send(service, "stale", expected_version=1)
+    assert not response.success and response.error == "VERSION_CONFLICT"
+    assert response.project_version == 2
+    assert len(service.crew.instructions) == calls
+    assert service.current_version("p1") == 2
+
+def test_route_returns_409_with_the_current_version(service, monkeypatch):
+    monkeypatch.setattr(chat_routes, "project_chat_service", service)
+    app = FastAPI()
+    app.include_router(chat_routes.router, prefix="/api/chat")
+    client = TestClient(app)
+    send(service, "first")
+
+    response = client.post("/api/chat/chat/p1", json={"message": "stale", "expected_version": 1})
+    assert response.status_code == 409
+    assert response.json()["error"] == "VERSION_CONFLICT" and response.json()["project_version"] == 2
+    assert service.crew.instructions == ["first"]
+
+    response = client.post("/api/chat/chat/p1", json={"message": "fresh", "expected_version": 2})
+    assert response.status_code == 200 and response.json()["project_version"] == 3
+
+def test_burst_of_messages_becomes_one_modification(service):
+    service.debounce_seconds = 0.05
+    responses = send(service, "couleur bleue", "titre plus grand", "ajouter un bouton")
+
+    assert len(service.crew.instructions) == 1
+    instruction = service.crew.instructions[0]
+    assert all(message in instruction for message in ("couleur bleue", "titre plus grand", "ajouter un bouton"))
+    assert instruction.index("couleur") < instruction.index("titre") < instruction.index("ajouter")
+    # Every sender gets the same result, a single new version
+    assert [response.project_version for response in responses] == [2, 2, 2]
+    assert service.current_version("p1") == 2
+
+    history = service.get_chat_history("p1")
+    assert [message.role for message in history] == ["user", "user", "user", "assistant"]
+    assert [message.content for message in history[:3]] == ["couleur bleue", "titre plus grand", "ajouter un bouton"]
+
+def test_messages_with_different_expected_versions_are_not_merged(service):
+    service.debounce_seconds = 0.05
+
+    async def run():
+        return await asyncio.gather(
+            service.process_chat_message("p1", "based on v1", expected_version=1),
+            service.process_chat_message("p1", "no version"),
+            service.process_chat_message("p1", "also v1", expected_version=1),
+        )
+
+    first, unversioned, late = asyncio.run(run())
+    assert service.crew.instructions == ["based on v1", "no version"]
+    assert first.project_version == 2 and unversioned.project_version == 3
+    # Only the latest batch can be joined (joining the first would reorder the messages):
+    # the third message is applied after the second, on a version it did not expect
+    assert late.error == "VERSION_CONFLICT" and late.project_version == 3
+
+def test_without_debounce_each_message_is_applied_alone(service):
+    responses = send(service, "first", "second")
+    assert service.crew.instructions == ["first", "second"]
+    assert [response.project_version for response in responses] == [2, 3]
+    history = service.get_chat_history("p1")
+    assert [message.role for message in history] == ["user", "assistant", "user", "assistant"]
+
+def test_truncated_rewrite_leaves_the_project_unchanged(service):
+    full = json.dumps({**PROJECT, "/App.js": "// v2\n"})
+    service._run_modification_crew = lambda user_message, current_project: full[:full.index('"/index.js"') + 20]
+
+    (response,) = send(service, "tout réécrire")
+    assert not response.success and response.error == "MODIFICATION_ERROR"
+    assert service.current_version("p1") == 1
+    assert service.get_project("p1") == PROJECT
+
+def test_truncated_patch_never_deletes_the_cut_file(service, monkeypatch):
+    monkeypatch.setattr(chat_service, "CHAT_PATCH_MODE", True)
+    patch = "<<<<<<< SEARCH\n// v1\n=======\n// v2\n>>>>>>> REPLACE"
+    outputs = [
+        # The object is never closed: the last entry may have been cut
+        json.dumps({"/App.js": patch, "/index.js": ""})[:-1],
+        json.dumps({"/index.js": "import App from './App';\n// v2\n"}),
+    ]
+    tasks = []
+    service._run_crew = lambda task: tasks.append(task.description) or outputs[len(tasks) - 1]
+
+    (response,) = send(service, "passer en v2")
+    assert response.success and response.project_version == 2
+    # The cut file was asked again in full instead of being deleted
+    assert len(tasks) == 2 and "FICHIERS À RETOURNER EN ENTIER : /index.js" in tasks[1]
+    assert service.get_project("p1") == {"/App.js": "// v2\n", "/index.js": "import App from './App';\n// v2\n"}
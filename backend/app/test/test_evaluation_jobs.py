@@ -0,0 +1,99 @@
+"""
+Tests for background project evaluation jobs
+"""
+import sys
+import os
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import evaluation_routes
+from app.services.evaluation_jobs import EvaluationJobManager
+from app.services.token_accounting import current_usage_tags
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert condition()
+
+def test_job_lifecycle():
+    jobs = EvaluationJobManager(max_workers=1, max_jobs=10)
+    started, release = threading.Event(), threading.Event()
+
+    def evaluate(score):
+        started.set()
+        release.wait(5)
+        return {"overall_score": score, "tags": current_usage_tags()}
+
+    job_id = jobs.submit("p1", evaluate, 8.0)
+    started.wait(5)
+    running = jobs.get_job(job_id)
+    assert running["status"] == "running" and running["completed_at"] is None and running["evaluation"] is None
+
+    release.set()
+    wait_for(lambda: jobs.get_job(job_id)["status"] == "completed")
+    job = jobs.get_job(job_id)
+    assert job["completed_at"] is not None and job["error"] is None
+    assert job["evaluation"]["overall_score"] == 8.0
+    # The evaluation's LLM calls are accounted to the project and the job
+    assert job["evaluation"]["tags"] == {"endpoint": "evaluation", "project_id": "p1", "evaluation_run": job_id}
+
+def test_pending_then_failed():
+    jobs = EvaluationJobManager(max_workers=1, max_jobs=10)
+    release = threading.Event()
+    blocker = jobs.submit("p1", lambda: release.wait(5) and {})
+
+    def broken():
+        raise RuntimeError("judge unavailable")
+
+    job_id = jobs.submit("p2", broken)
+    assert jobs.get_job(job_id)["status"] == "pending"
+    release.set()
+    wait_for(lambda: jobs.get_job(job_id)["status"] == "failed")
+    job = jobs.get_job(job_id)
+    assert job["error"] == "judge unavailable" and job["completed_at"] is not None and job["evaluation"] is None
+    assert jobs.get_job(blocker)["status"] == "completed"
+    assert jobs.get_job("missing") is None
+
+def test_finished_jobs_are_never_seen_half_updated():
+    jobs = EvaluationJobManager(max_workers=4, max_jobs=1000)
+    job_ids = [jobs.submit(f"p{i}", lambda i=i: {"overall_score": i}) for i in range(200)]
+    seen = set()
+    while len(seen) < len(job_ids):
+        for job_id in job_ids:
+            job = jobs.get_job(job_id)
+            if job["status"] == "completed":
+                assert job["completed_at"] is not None and job["evaluation"] is not None
+                seen.add(job_id)
+
+def test_only_finished_jobs_are_dropped():
+    jobs = EvaluationJobManager(max_workers=1, max_jobs=2)
+    release = threading.Event()
+    running = jobs.submit("p1", lambda: release.wait(5) and {})
+    queued = jobs.submit("p2", lambda: {})
+    latest = jobs.submit("p3", lambda: {})
+    # Nothing had finished: the limit is exceeded rather than losing a job
+    assert all(jobs.get_job(job_id) is not None for job_id in (running, queued, latest))
+    release.set()
+    wait_for(lambda: jobs.get_job(latest)["status"] == "completed")
+    jobs.submit("p4", lambda: {})
+    assert jobs.get_job(running) is None and jobs.get_job(queued) is None
+    assert jobs.get_job(latest) is not None
+
+def test_job_route(monkeypatch):
+    jobs = EvaluationJobManager(max_workers=1, max_jobs=10)
+    monkeypatch.setattr(evaluation_routes, "evaluation_jobs", jobs)
+    app = FastAPI()
+    app.include_router(evaluation_routes.router, prefix="/api/evaluation")
+    client = TestClient(app)
+
+    job_id = jobs.submit("p1", lambda: {"overall_score": 7.5})
+    wait_for(lambda: jobs.get_job(job_id)["status"] == "completed")
+    body = client.get(f"/api/evaluation/jobs/{job_id}").json()
+    assert body["success"] and body["status"] == "completed" and body["evaluation"] == {"overall_score": 7.5}
+    assert client.get("/api/evaluation/jobs/missing").status_code == 404
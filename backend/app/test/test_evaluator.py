@@ -190,5 +190,45 @@ root.render(<App />);"""
     print("- Higher scores for realistic implementations ✅")
     print("- Proper JSON format returned ✅")
 
+def test_concurrent_test_cases():
+    """Test cases run concurrently, keep their order and time out individually"""
+    import time
+    evaluator = SimpleFrontendEvaluator()
+    delays = {"slow": 2.0, "a": 0.3, "b": 0.1, "c": 0.2}
+    
+    def generate(description, features=""):
+        time.sleep(delays[description])
+        return {"App.js": description}
+    
+    evaluator._generate_project = generate
+    evaluator._llm_judge_evaluation = lambda test_case, project: {
+        "code_quality": 8, "requirements_fulfillment": 8, "compliance": 8,
+        "overall_score": 8, "weighted_score": 8, "feedback": "ok"
+    }
+    
+    cases = [{"description": d, "features": ""} for d in ["a", "b", "slow", "c"]]
+    started = time.monotonic()
+    results = evaluator._run_test_cases(cases, concurrency=4, case_timeout=1.0)
+    
+    assert time.monotonic() - started < 1.8
+    assert [r["test_case_id"] for r in results] == [0, 1, 2, 3]
+    assert [r["evaluation_score"] for r in results] == [8, 8, 0, 8]
+    assert "timed out" in results[2]["feedback"]
+
+def test_overall_metrics_use_the_weighted_scores():
+    """The aggregate reads the weighted score each test case result records"""
+    evaluator = SimpleFrontendEvaluator()
+    evaluator._generate_project = lambda description, features="": {"App.js": description}
+    evaluator._llm_judge_evaluation = lambda test_case, project: {
+        "code_quality": 9, "requirements_fulfillment": 5, "compliance": 9,
+        "overall_score": 7.67, "weighted_score": 6.5, "feedback": "ok"
+    }
+    
+    results = evaluator._run_test_cases([{"description": "a", "features": ""}], concurrency=1, case_timeout=5)
+    metrics = evaluator._calculate_overall_metrics(results)
+    assert results[0]["weighted_evaluation_score"] == 6.5
+    assert metrics["avg_weighted_score"] == 6.5 and metrics["weighted_success_rate"] == 0
+    assert metrics["avg_overall_score"] == 7.67 and metrics["success_rate"] == 1
+
 if __name__ == "__main__":
     test_evaluator()
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""
+Tests for the generated projects cache
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+from app.evaluation import simple_evaluator
+from app.evaluation.simple_evaluator import SimpleFrontendEvaluator
+from app.models.schemas import ProjectRequest
+from app.services import generator
+from app.services.generation_cache import GenerationCache, project_size
+
+def files(size, name="/App.js"):
+    return {name: "x" * (size - len(name))}
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = GenerationCache(max_bytes=250)
+    cache.put("a", files(100))
+    cache.put("b", files(100))
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", files(100))
+    assert cache.get("b") is None
+    assert cache.get("a") == files(100) and cache.get("c") == files(100)
+    assert cache.stats()["bytes"] == 200
+
+def test_replacing_an_entry_updates_the_size():
+    cache = GenerationCache(max_bytes=1000)
+    cache.put("a", files(300))
+    cache.put("a", files(100))
+    assert cache.stats()["bytes"] == project_size(files(100)) == 100
+    assert cache.stats()["entries"] == 1
+
+def test_oversize_entries_stay_out_of_memory(tmp_path):
+    cache = GenerationCache(max_bytes=100, directory=str(tmp_path))
+    cache.put("small", files(50))
+    cache.put("big", files(500))
+    assert cache.stats()["entries"] == 1
+    # The small entry was not evicted, the big one is still served from disk
+    assert cache.get("small") == files(50)
+    assert cache.get("big") == files(500)
+    assert cache.stats()["entries"] == 1
+
+def test_disk_tier_survives_restart_and_promotes_hits(tmp_path):
+    project = {"/App.js": "export default function App() { return 'é'; }", "/index.js": "root.render(<App />);"}
+    GenerationCache(max_bytes=10_000, directory=str(tmp_path)).put("k", project)
+    reopened = GenerationCache(max_bytes=10_000, directory=str(tmp_path))
+    assert reopened.stats()["entries"] == 0
+    assert reopened.get("k") == project
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get("missing") is None
+
+def test_returned_projects_are_copies():
+    cache = GenerationCache(max_bytes=1000)
+    cache.put("k", {"/App.js": "a"})
+    cache.get("k")["/App.js"] = "changed"
+    assert cache.get("k") == {"/App.js": "a"}
+
+TRUNCATED_OUTPUT = '{"/App.js": "ok", "/index.js": "imp'
+
+def test_generation_does_not_cache_truncated_output(tmp_path, monkeypatch):
+    cache = GenerationCache(max_bytes=10_000, directory=str(tmp_path))
+    monkeypatch.setattr(generator, "generation_cache", cache)
+    monkeypatch.setattr(generator, "run_generation_crew", lambda description, features: TRUNCATED_OUTPUT)
+    monkeypatch.setattr(generator, "_store_and_evaluate", lambda request, project_data, project_id: None)
+
+    request = ProjectRequest(description="Todo list", features="Add tasks", warm_start=False)
+    response = asyncio.run(generator._generate_react_project(request))
+    assert response.success and response.project_data["files"] == {"/App.js": "ok"}
+    assert cache.stats()["entries"] == 0 and not list(tmp_path.rglob("*.json"))
+
+    monkeypatch.setattr(generator, "run_generation_crew", lambda description, features: '{"/App.js": "ok", "/index.js": "x"}')
+    asyncio.run(generator._generate_react_project(request))
+    assert cache.stats()["entries"] == 1
+
+def test_evaluator_does_not_cache_truncated_output(tmp_path, monkeypatch):
+    class TruncatedCrew:
+        def __init__(self, **kwargs):
+            pass
+
+        def kickoff(self):
+            return TRUNCATED_OUTPUT
+
+    cache = GenerationCache(max_bytes=10_000, directory=str(tmp_path))
+    monkeypatch.setattr(simple_evaluator, "generation_cache", cache)
+    monkeypatch.setattr(simple_evaluator, "Crew", TruncatedCrew)
+
+    assert SimpleFrontendEvaluator()._generate_project("Todo list", "Add tasks") == {"/App.js": "ok"}
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,83 @@
+"""
+Tests for the streamed /generate-project/stream endpoint (Server-Sent Events, LLM stubbed)
+"""
+import sys
+import os
+import json
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import routes
+from app.services import generator
+from app.services.generation_cache import GenerationCache
+
+PROJECT = {"/App.js": "export default function App() { return null; }", "/index.js": "root.render(<App />);"}
+
+def events(response):
+    """(event, data) pairs of an SSE response body"""
+    parsed = []
+    for block in response.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        parsed.append((lines["event"], json.loads(lines["data"])))
+    return parsed
+
+@pytest.fixture
+def stream(monkeypatch):
+    cache = GenerationCache(max_bytes=100_000)
+    output = {"chunks": []}
+    stored = []
+    monkeypatch.setattr(generator, "generation_cache", cache)
+    monkeypatch.setattr(generator.frontend_generator_agent.llm, "stream", lambda messages: iter(output["chunks"]))
+    monkeypatch.setattr(generator, "_store_and_evaluate",
+                        lambda request, project_data, project_id: stored.append(project_data) or {"status": "pending"})
+    app = FastAPI()
+    app.include_router(routes.router)
+    client = TestClient(app)
+
+    def post(chunks, **request):
+        output["chunks"] = chunks
+        return client.post("/generate-project/stream", json={"description": "Todo list", **request})
+
+    post.cache = cache
+    post.stored = stored
+    return post
+
+def chunked(text, size=7):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_files_are_streamed_then_done(stream):
+    response = stream(chunked("Voici le projet :\n" + json.dumps(PROJECT)))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    sequence = events(response)
+    assert [event for event, _ in sequence] == ["start", "file", "file", "done"]
+    assert sequence[0][1] == {"description": "Todo list"}
+    assert {data["path"]: data["code"] for event, data in sequence if event == "file"} == PROJECT
+    done = sequence[-1][1]
+    assert done["files_count"] == 2 and not done["cached"] and done["evaluation"] == {"status": "pending"}
+    assert done["time_to_first_file"] <= done["total_time"]
+    assert stream.stored == [PROJECT]
+
+def test_cached_project_is_replayed_with_the_same_events(stream):
+    stream(chunked(json.dumps(PROJECT)))
+    sequence = events(stream([]))
+    assert [event for event, _ in sequence] == ["start", "file", "file", "done"]
+    assert sequence[-1][1]["cached"]
+    assert {data["path"]: data["code"] for event, data in sequence if event == "file"} == PROJECT
+
+def test_truncated_stream_keeps_complete_files_but_is_not_cached(stream):
+    text = json.dumps(PROJECT)
+    sequence = events(stream(chunked(text[:text.index('"/index.js"') + 15])))
+    assert [event for event, _ in sequence] == ["start", "file", "done"]
+    assert stream.stored == [{"/App.js": PROJECT["/App.js"]}]
+    assert stream.cache.stats()["entries"] == 0
+
+def test_output_without_project_ends_with_an_error(stream):
+    sequence = events(stream(["Désolé, je ne peux pas générer ce projet."]))
+    assert [event for event, _ in sequence] == ["start", "error"]
+    assert stream.stored == []
@@ -0,0 +1,75 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.evaluation import simple_evaluator
+from app.evaluation.simple_evaluator import SimpleFrontendEvaluator
+from app.services.judge_cache import JudgeCache
+from app.test.test_static_analyzer import project
+
+TEST_CASE = {"description": "Todo list", "features": "Add and delete tasks"}
+JUDGE_RESPONSE = '{"code_quality": 8, "requirements_fulfillment": 9, "compliance": 7, "overall_score": 8, "feedback": "ok"}'
+
+class CountingJudge:
+    model_name = "judge-model"
+
+    def __init__(self, response=JUDGE_RESPONSE):
+        self.response = response
+        self.calls = 0
+
+    def call(self, messages):
+        self.calls += 1
+        return self.response
+
+def test_key_ignores_formatting_only():
+    files = project()
+    reformatted = {path.lstrip("/"): code.replace("\n", "  \r\n") for path, code in reversed(list(files.items()))}
+    key = JudgeCache.make_key(TEST_CASE, files, "m", "v1")
+    assert JudgeCache.make_key({"description": " todo LIST ", "features": "add and delete tasks"}, reformatted, "m", "v1") == key
+    assert JudgeCache.make_key(TEST_CASE, {**files, "/App.js": files["/App.js"] + "// x"}, "m", "v1") != key
+    assert JudgeCache.make_key(TEST_CASE, files, "other-model", "v1") != key
+    assert JudgeCache.make_key(TEST_CASE, files, "m", "v2") != key
+
+def test_persistent_entries(tmp_path):
+    JudgeCache(10, str(tmp_path)).put("k", {"overall_score": 8.0})
+    reopened = JudgeCache(10, str(tmp_path))
+    assert reopened.get("k") == {"overall_score": 8.0}
+    assert reopened.get("missing") is None
+
+def test_memory_tier_is_bounded_by_entries(tmp_path):
+    cache = JudgeCache(2, str(tmp_path))
+    for key in ("a", "b", "c"):
+        cache.put(key, {"overall_score": 8.0, "key": key})
+    assert cache.stats()["entries"] == 2
+    # "a" left memory but is still on disk, and comes back as an independent copy
+    evaluation = cache.get("a")
+    assert evaluation == {"overall_score": 8.0, "key": "a"}
+    evaluation["overall_score"] = 0
+    assert cache.get("a")["overall_score"] == 8.0
+
+def test_evaluator_reuses_judgements(tmp_path, monkeypatch):
+    monkeypatch.setattr(simple_evaluator, "judge_cache", JudgeCache(10, str(tmp_path)))
+    evaluator = SimpleFrontendEvaluator()
+    evaluator.llm_judge = CountingJudge()
+
+    first = evaluator._llm_judge_evaluation(TEST_CASE, project())
+    second = evaluator._llm_judge_evaluation(TEST_CASE, project())
+    assert evaluator.llm_judge.calls == 1
+    assert not first["judge_cached"] and second["judge_cached"]
+    assert second["weighted_score"] == first["weighted_score"]
+
+    # Bypass: the judge is called again
+    evaluator.use_judge_cache = False
+    assert not evaluator._llm_judge_evaluation(TEST_CASE, project())["judge_cached"]
+    assert evaluator.llm_judge.calls == 2
+
+def test_failed_judgements_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(simple_evaluator, "judge_cache", JudgeCache(10, str(tmp_path)))
+    evaluator = SimpleFrontendEvaluator()
+    evaluator.llm_judge = CountingJudge(response="no json here")
+
+    evaluator._llm_judge_evaluation(TEST_CASE, project())
+    evaluator._llm_judge_evaluation(TEST_CASE, project())
+    assert evaluator.llm_judge.calls == 2
@@ -0,0 +1,63 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.evaluation.judge_packer import pack_project, priority_order, skeleton
+from app.services.project_index import ProjectIndex
+from app.test.test_static_analyzer import APP, HEADER, INDEX
+
+def component(name, imports=()):
+    lines = [f"import {other} from './{other}';" for other in imports]
+    body = "\n".join(f"      <Text style={{styles.line}}>{name} line {i}</Text>" for i in range(40))
+    return "\n".join(lines) + f"""
+export default function {name}({{ onPress }}) {{
+  return (
+    <View style={{styles.container}}>
+{body}
+    </View>
+  );
+}}
+const styles = StyleSheet.create({{ container: {{ padding: 8 }}, line: {{ fontSize: 12 }} }});
+"""
+
+def sample_project():
+    return {
+        "/components/Rare.js": component("Rare"),
+        "/components/Shared.js": component("Shared"),
+        "/components/Page.js": component("Page", ["Shared"]),
+        "/components/Other.js": component("Other", ["Shared"]),
+        "/App.js": APP,
+        "/index.js": INDEX,
+        "/components/Header.js": HEADER,
+    }
+
+def test_priority_order():
+    project = sample_project()
+    order = priority_order(project, ProjectIndex(project))
+    assert order[:2] == ["/App.js", "/index.js"]
+    assert order[2] == "/components/Shared.js"  # imported by two files
+    assert order.index("/components/Header.js") < order.index("/components/Rare.js")
+
+def test_budget_and_levels():
+    project = sample_project()
+    full = pack_project(project, 100000)
+    assert len(full.full_files) == len(project) and not full.skeleton_files
+
+    packed = pack_project(project, 1500)
+    assert packed.tokens <= 1500
+    assert "/App.js" in packed.full_files and "/index.js" in packed.full_files
+    assert packed.skeleton_files and not packed.omitted_files
+    assert all(f"--- {path} ---" in packed.content for path in project)
+
+    tiny = pack_project(project, 50)
+    assert tiny.omitted_files
+
+def test_skeleton_keeps_structure():
+    outline = skeleton(APP, ["container"])
+    assert "export default function App() {" in outline
+    assert "const [tasks, setTasks] = useState([]);" in outline
+    assert "<TouchableOpacity>" in outline and "<Text>Ajouter" in outline
+    assert "onPress" not in outline and "<div>" not in outline
+    assert outline.endswith("styles: container")
@@ -0,0 +1,141 @@
+"""
+Tests for the shared LLM clients and the per-provider concurrency limits
+"""
+import sys
+import os
+import asyncio
+import threading
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from concurrent.futures import ThreadPoolExecutor
+from app.core import llm_clients
+from app.core.llm_clients import ConcurrencyLimiter, get_provider, openai_compatible_provider
+from app.core.ClaudeLLM import ClaudeLLM
+from app.core.OpenaiLLM import OpenaiLLM
+from app.test.test_evaluation_jobs import wait_for
+from app.test.test_llm_router import MESSAGES, servers  # noqa: F401 (fixture)
+
+def test_limit_holds_for_mixed_call_and_acall(servers, monkeypatch):
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY_LIMITED", "2")
+    stub = servers("ok", delay=0.1)
+    llm = stub.llm("limited")
+    assert llm.provider.limiter.limit == 2
+
+    async def run():
+        # Three blocking calls from worker threads and three coroutines share the two slots
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            threaded = [loop.run_in_executor(executor, llm.call, MESSAGES) for _ in range(3)]
+            return await asyncio.gather(*threaded, *(llm.acall(MESSAGES) for _ in range(3)))
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert stub.requests == 6 and stub.peak_active == 2
+    assert llm.provider.limiter.stats() == {"limit": 2, "active": 0, "waiting": 0}
+
+def test_released_slot_goes_to_the_first_waiter():
+    limiter = ConcurrencyLimiter(1, "test_fifo")
+    limiter.acquire()
+    order = []
+
+    def waiter(name):
+        with limiter:
+            order.append(name)
+
+    threads = []
+    for name in ("first", "second"):
+        threads.append(threading.Thread(target=waiter, args=(name,)))
+        threads[-1].start()
+        wait_for(lambda: limiter.stats()["waiting"] == len(threads))
+    limiter.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["first", "second"]
+    assert limiter.stats() == {"limit": 1, "active": 0, "waiting": 0}
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = ConcurrencyLimiter(1, "test_cancel")
+
+    async def cancel_while_waiting():
+        await limiter.aacquire()
+        task = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["waiting"] == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert limiter.stats() == {"limit": 1, "active": 1, "waiting": 0}
+        limiter.release()
+
+    async def cancel_during_hand_over():
+        await limiter.aacquire()
+        task = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        # The slot is handed over, then the waiter is cancelled before it is woken
+        limiter.release()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    async def cancel_after_wake_up():
+        await limiter.aacquire()
+        task = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0)
+        # The waiter's future has its result, but the task is cancelled before resuming
+        limiter.release()
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    for scenario in (cancel_while_waiting, cancel_during_hand_over, cancel_after_wake_up):
+        asyncio.run(scenario())
+        assert limiter.stats() == {"limit": 1, "active": 0, "waiting": 0}, scenario.__name__
+
+    # The slot is still usable by both kinds of callers
+    with limiter:
+        pass
+    asyncio.run(limiter.aacquire())
+    limiter.release()
+    assert limiter.stats()["active"] == 0
+
+def test_sync_waiter_gets_a_slot_released_by_a_coroutine():
+    limiter = ConcurrencyLimiter(1, "test_mixed")
+    acquired = threading.Event()
+
+    async def run():
+        await limiter.aacquire()
+        thread = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+        thread.start()
+        await asyncio.get_running_loop().run_in_executor(None, wait_for, lambda: limiter.stats()["waiting"] == 1)
+        limiter.release()
+        thread.join()
+
+    asyncio.run(run())
+    assert acquired.is_set()
+    assert limiter.stats() == {"limit": 1, "active": 1, "waiting": 0}
+    limiter.release()
+
+def test_clients_are_shared_per_provider(monkeypatch):
+    # Explicit fake keys: the module-level providers read API_KEY from the environment at import
+    for name in ("openai", "claude"):
+        monkeypatch.setitem(llm_clients.PROVIDERS, name,
+                            openai_compatible_provider(name, "test-key", "http://127.0.0.1:9/v1"))
+    openai_llm, other_openai_llm, claude_llm = OpenaiLLM(), OpenaiLLM(), ClaudeLLM()
+    assert openai_llm.provider is other_openai_llm.provider is get_provider("openai")
+    assert claude_llm.provider is get_provider("claude") and claude_llm.provider is not openai_llm.provider
+    assert openai_llm.client is other_openai_llm.client
+    assert openai_llm.client is not claude_llm.client
+
+    # One synchronous client for every thread
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        clients = list(executor.map(lambda _: get_provider("openai").client, range(8)))
+    assert all(client is openai_llm.client for client in clients)
+
+    # Asynchronous clients are bound to their event loop
+    async def async_clients():
+        provider = get_provider("openai")
+        return provider.async_client, provider.async_client
+
+    first, again = asyncio.run(async_clients())
+    other_loop, _ = asyncio.run(async_clients())
+    assert first is again and first is not other_loop
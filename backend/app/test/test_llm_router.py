@@ -0,0 +1,126 @@
+"""
+Tests for the latency-aware LLM router, against local OpenAI-compatible stub servers
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from app.core.llm_clients import openai_compatible_provider
+from app.core.OpenAICompatibleLLM import OpenAICompatibleLLM
+from app.core.RouterLLM import RouterLLM
+from app.services.token_accounting import token_accounting
+
+MESSAGES = [{"role": "user", "content": "Bonjour"}]
+
+class StubServer:
+    """Minimal /chat/completions endpoint answering `text` after `delay` seconds"""
+
+    def __init__(self, text: str, delay: float = 0.0, status: int = 200):
+        self.text = text
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.peak_active = max(stub.peak_active, stub.active)
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.active -= 1
+                if stub.status != 200:
+                    payload = {"error": {"message": "stub failure"}}
+                else:
+                    payload = {
+                        "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": stub.text}}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    }
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def llm(self, name: str) -> OpenAICompatibleLLM:
+        url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        provider = openai_compatible_provider(name, "test-key", url)
+        provider.client.max_retries = 0
+        return OpenAICompatibleLLM(provider=provider, model_name=f"stub/{name}")
+
+@pytest.fixture
+def servers(monkeypatch):
+    monkeypatch.setattr(token_accounting, "sink", None)  # Keep the test calls out of token_usage.jsonl
+    created = []
+
+    def make(*args, **kwargs):
+        server = StubServer(*args, **kwargs)
+        created.append(server)
+        return server
+
+    yield make
+    for server in created:
+        server.server.shutdown()
+
+def test_routes_to_the_faster_provider(servers):
+    slow, fast = servers("slow", delay=0.2), servers("fast")
+    router = RouterLLM([slow.llm("slow"), fast.llm("fast")], name="test_latency")
+    # Each provider is probed once, then the faster one is preferred
+    results = [router.call(MESSAGES) for _ in range(5)]
+    assert results[:2] == ["slow", "fast"]
+    assert results[2:] == ["fast"] * 3
+    assert slow.requests == 1
+
+def test_falls_over_when_a_provider_fails(servers):
+    broken, healthy = servers("broken", status=500), servers("healthy")
+    router = RouterLLM([broken.llm("broken"), healthy.llm("healthy")], name="test_failover", max_failures=1)
+    assert router.call(MESSAGES) == "healthy"
+    assert router.stats()[0]["cooling_down"]
+    assert router.ranked()[0] == 1
+
+def test_hedged_call_returns_the_first_answer(servers):
+    slow, fast = servers("slow", delay=1.0), servers("fast")
+    router = RouterLLM([slow.llm("slow"), fast.llm("fast")], name="test_hedge", hedge=True,
+                       hedge_default_delay=0.1)
+    started = time.perf_counter()
+    assert router.call(MESSAGES) == "fast"
+    assert time.perf_counter() - started < 0.8
+
+def test_hedged_acall_returns_the_first_answer(servers):
+    slow, fast = servers("slow", delay=1.0), servers("fast")
+    router = RouterLLM([slow.llm("slow"), fast.llm("fast")], name="test_ahedge", hedge=True,
+                       hedge_default_delay=0.1)
+
+    async def run():
+        started = time.perf_counter()
+        result = await router.acall(MESSAGES)
+        return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(run())
+    assert result == "fast"
+    assert elapsed < 0.8
@@ -0,0 +1,66 @@
+"""
+Tests for the project index used to filter the chat context
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.services.project_index import ProjectIndex
+
+def component(name: str, label: str, imports: str = "") -> str:
+    return f"""import React from 'react';
+import {{ View, Text, StyleSheet }} from 'react-native-web';
+{imports}
+export default function {name}() {{
+  return <View style={{styles.container}}><Text style={{styles.title}}>{label}</Text></View>;
+}}
+const styles = StyleSheet.create({{
+  container: {{ padding: 16, backgroundColor: '#ffffff' }},
+  title: {{ fontSize: 20, color: '#222222' }},
+}});
+"""
+
+PROJECT = {
+    "/index.js": "import App from './App';\nroot.render(<App />);",
+    "/App.js": component("App", "Todo", "import Header from './components/Header';\nimport TaskList from './components/TaskList';"),
+    "/components/Header.js": component("Header", "Mes tâches"),
+    "/components/TaskList.js": component("TaskList", "Liste", "import TaskItem from './TaskItem';"),
+    "/components/TaskItem.js": component("TaskItem", "Supprimer"),
+    "/components/Footer.js": component("Footer", "Contact"),
+}
+
+def test_index_extracts_graph_exports_and_styles():
+    index = ProjectIndex(PROJECT)
+    task_list = index.files["/components/TaskList.js"]
+    assert task_list.imports == ["/components/TaskItem.js"]
+    assert task_list.exports == ["TaskList"]
+    assert task_list.style_keys == ["container", "title"]
+    assert index.importers["/components/TaskList.js"] == {"/App.js"}
+    assert "Supprimer" in index.files["/components/TaskItem.js"].strings
+
+def test_select_adds_direct_importers_and_importees():
+    selection = ProjectIndex(PROJECT).select("Mets le bouton supprimer en rouge")
+    assert selection.matched == ["/components/TaskItem.js"]
+    assert set(selection.files) == {"/App.js", "/components/TaskList.js", "/components/TaskItem.js"}
+    assert set(selection.others) == {"/index.js", "/components/Header.js", "/components/Footer.js"}
+
+def test_app_is_always_selected_whatever_the_path_style():
+    bare = {path.lstrip("/"): code for path, code in PROJECT.items()}
+    for project, app in ((PROJECT, "/App.js"), (bare, "App.js")):
+        selection = ProjectIndex(project).select("Change le texte contact du footer")
+        assert selection.matched == [app.replace("App", "components/Footer")]
+        assert app in selection.files
+    # The forced paths can be given either way too
+    assert "App.js" in ProjectIndex(bare).select("Change le texte contact du footer", always=("App.js",)).files
+
+def test_message_touching_every_file_keeps_whole_project():
+    selection = ProjectIndex(PROJECT).select("Ajoute un mode sombre")
+    assert not selection.filtered
+    assert selection.files == list(PROJECT)
+
+def test_manifest_summarizes_files():
+    manifest = ProjectIndex(PROJECT).manifest(["/components/Footer.js"])
+    assert manifest.startswith("/components/Footer.js : ")
+    assert "exporte Footer" in manifest and "styles container, title" in manifest
@@ -0,0 +1,85 @@
+"""
+Tests for the incremental project JSON parser
+"""
+import sys
+import os
+import json
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from app.services.project_parser import IncrementalProjectParser, extract_project_json, parse_project_output
+
+PROJECT = {
+    "/App.js": "import React from 'react';\nconst title = \"Todo\";\nexport default function App() { return null; }",
+    "/components/Item.js": "export const Item = () => { return '{'; };",
+    "/index.js": "root.render(<App />);",
+}
+
+def test_extract_plain_json():
+    assert extract_project_json(json.dumps(PROJECT)) == PROJECT
+
+def test_extract_ignores_fences_and_surrounding_text():
+    output = "Voici le projet {demandé} :\n```json\n" + json.dumps(PROJECT, indent=2) + "\n```\nBonne journée {:)}"
+    assert extract_project_json(output) == PROJECT
+
+def test_feed_yields_files_as_soon_as_complete():
+    text = json.dumps(PROJECT)
+    parser = IncrementalProjectParser()
+    emitted = []
+    for i in range(0, len(text), 5):
+        emitted.extend(path for path, _ in parser.feed(text[i:i + 5]))
+    emitted.extend(path for path, _ in parser.finish())
+    assert emitted == list(PROJECT)
+    assert parser.files == PROJECT
+    assert parser.complete
+
+def test_first_file_available_before_end_of_output():
+    text = json.dumps(PROJECT)
+    second_key = text.index('"/components/Item.js": ')
+    parser = IncrementalProjectParser()
+    completed = parser.feed(text[:second_key + len('"/components/Item.js": "exp')])
+    assert completed == [("/App.js", PROJECT["/App.js"])]
+
+def test_repairs_invalid_escapes_and_raw_newlines():
+    output = '{"/App.js": "const s = \'l\\\'app\';\nconst t = 1;"}'
+    assert extract_project_json(output) == {"/App.js": "const s = 'l'app';\nconst t = 1;"}
+
+def test_repairs_unescaped_quotes():
+    output = '{"/App.js": "<Text style="big">Hi</Text>", "/index.js": "x"}'
+    assert extract_project_json(output) == {"/App.js": '<Text style="big">Hi</Text>', "/index.js": "x"}
+
+def test_repairs_unescaped_quotes_across_chunks():
+    output = '{"/App.js": "a = "b", c", "/index.js": "x"}'
+    parser = IncrementalProjectParser()
+    for char in output:
+        parser.feed(char)
+    parser.finish()
+    assert parser.files == {"/App.js": 'a = "b", c', "/index.js": "x"}
+
+def test_truncated_output_keeps_complete_files():
+    text = json.dumps(PROJECT)
+    truncated = text[:text.index('"/index.js"') + 20]
+    parser = IncrementalProjectParser()
+    parser.feed(truncated)
+    parser.finish()
+    assert parser.files == {k: PROJECT[k] for k in ["/App.js", "/components/Item.js"]}
+    assert parser.truncated == ["/index.js"]
+    assert parser.incomplete
+
+def test_parse_project_output_reports_truncation():
+    assert parse_project_output(json.dumps(PROJECT)) == (PROJECT, False)
+    assert parse_project_output('{"/App.js": "ok", "/index.js": "imp') == ({"/App.js": "ok"}, True)
+    # Cut between two entries: no file is unfinished, but more may have followed
+    assert parse_project_output('{"/App.js": "ok", "/ind') == ({"/App.js": "ok"}, True)
+
+def test_strict_mode_rejects_defects():
+    with pytest.raises(ValueError):
+        extract_project_json('{"/App.js": "a"', repair=False)
+    with pytest.raises(ValueError):
+        extract_project_json('{"/App.js": "it\\\'s"}', repair=False)
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_project_json("Désolé, je ne peux pas générer ce projet.")
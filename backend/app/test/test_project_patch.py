@@ -0,0 +1,65 @@
+"""
+Tests for the application of chat patches (search/replace blocks)
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from app.services.project_patch import PatchError, apply_hunks, apply_project_patch, parse_search_replace
+
+APP = """import React from 'react';
+const styles = StyleSheet.create({
+  container: {
+    backgroundColor: '#ffffff',
+  },
+  title: {
+    color: '#000000',
+  },
+});
+"""
+
+def block(search: str, replace: str) -> str:
+    return f"<<<<<<< SEARCH\n{search}\n=======\n{replace}\n>>>>>>> REPLACE"
+
+def test_parse_several_blocks():
+    value = block("a", "b") + "\n" + block("c\nd", "")
+    assert parse_search_replace(value) == [("a", "b"), ("c\nd", "")]
+
+def test_parse_rejects_text_outside_blocks():
+    with pytest.raises(PatchError):
+        parse_search_replace(block("a", "b") + "\nconst x = 1;")
+
+def test_apply_exact_hunk():
+    patched = apply_hunks(APP, [("    backgroundColor: '#ffffff',", "    backgroundColor: '#1e3a8a',")])
+    assert "'#1e3a8a'" in patched and "'#ffffff'" not in patched
+
+def test_apply_hunk_with_indentation_drift():
+    patched = apply_hunks(APP, [("title: {\n color: '#000000',", "  title: {\n    color: '#ff0000',")])
+    assert "    color: '#ff0000'," in patched
+    assert patched.count("title") == 1
+
+def test_ambiguous_or_missing_hunk_fails():
+    with pytest.raises(PatchError):
+        apply_hunks(APP, [("  },", "  }")])
+    with pytest.raises(PatchError):
+        apply_hunks(APP, [("backgroundColor: 'red'", "x")])
+
+def test_project_patch_keeps_other_files_and_reports_failures():
+    project = {"/App.js": APP, "/index.js": "root.render(<App />);", "/components/Old.js": "old"}
+    changes = {
+        "/App.js": block("color: '#000000',", "color: '#333333',"),
+        "/index.js": block("does not exist", "x"),
+        "/components/Old.js": "",
+        "/components/New.js": "export const New = () => null;",
+    }
+    result = apply_project_patch(project, changes)
+    assert result.patched == ["/App.js"]
+    assert result.replaced == ["/components/New.js"]
+    assert result.deleted == ["/components/Old.js"]
+    assert list(result.failed) == ["/index.js"]
+    assert result.project["/index.js"] == project["/index.js"]
+    assert "#333333" in result.project["/App.js"]
+    assert project["/components/Old.js"] == "old"
@@ -0,0 +1,157 @@
+"""
+Tests for the project and chat history stores
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import pytest
+from app.models.schemas import ChatMessage
+from app.services.project_store import (
+    MemoryProjectStore,
+    ProjectNotFoundError,
+    SqliteProjectStore,
+    VersionConflictError,
+    VersionNotFoundError,
+)
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryProjectStore()
+    else:
+        store = SqliteProjectStore(str(tmp_path / "projects.db"), batch_size=3, flush_interval=60)
+        yield store
+        store.close()
+
+def test_versions_increment_and_check_expected_version(store):
+    assert store.save_project("p1", {"/App.js": "v1"}) == 1
+    assert store.update_project("p1", {"/App.js": "v2"}) == 2
+    assert store.update_project("p1", {"/App.js": "v3"}, expected_version=2) == 3
+    with pytest.raises(VersionConflictError) as conflict:
+        store.update_project("p1", {"/App.js": "stale"}, expected_version=2)
+    assert conflict.value.current_version == 3
+    assert store.get_project("p1") == ({"/App.js": "v3"}, 3)
+    with pytest.raises(ProjectNotFoundError):
+        store.update_project("missing", {})
+    assert store.get_project("missing") is None and store.get_version("missing") is None
+
+def test_history_is_ordered_per_project(store):
+    store.save_project("p1", {})
+    for i in range(5):
+        store.append_message("p1" if i % 2 == 0 else "p2", ChatMessage(role="user", content=f"m{i}"))
+    assert [m.content for m in store.get_history("p1")] == ["m0", "m2", "m4"]
+    assert [m.content for m in store.get_history("p2")] == ["m1", "m3"]
+    assert store.get_history("other") == []
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "projects.db")
+    store = SqliteProjectStore(path, flush_interval=60)
+    store.save_project("p1", {"/App.js": "v1"})
+    store.update_project("p1", {"/App.js": "é"})
+    store.append_message("p1", ChatMessage(role="assistant", content="ok"))
+    store.close()
+    reopened = SqliteProjectStore(path)
+    assert reopened.get_project("p1") == ({"/App.js": "é"}, 2)
+    assert [m.content for m in reopened.get_history("p1")] == ["ok"]
+    reopened.close()
+
+def test_versions_are_kept_and_revert_adds_a_version(store):
+    store.save_project("p1", {"/index.js": "root", "/App.js": "v1"})
+    store.update_project("p1", {"/index.js": "root", "/App.js": "v2", "/New.js": "new"})
+    assert store.get_project("p1", 1) == ({"/index.js": "root", "/App.js": "v1"}, 1)
+    assert store.get_project("p1", 3) is None
+    assert store.revert_project("p1", 1) == 3
+    assert store.get_project("p1") == ({"/index.js": "root", "/App.js": "v1"}, 3)
+    assert [(info.version, info.files) for info in store.list_versions("p1")] == [(1, 2), (2, 3), (3, 2)]
+    with pytest.raises(VersionNotFoundError):
+        store.revert_project("p1", 7)
+
+def test_sqlite_blobs_are_shared_between_versions_and_projects(tmp_path):
+    store = SqliteProjectStore(str(tmp_path / "projects.db"))
+    store.save_project("p1", {"/index.js": "root", "/App.js": "v1"})
+    store.save_project("p2", {"/index.js": "root", "/App.js": "v1"})
+    store.update_project("p1", {"/index.js": "root", "/App.js": "v2"})
+    store.revert_project("p1", 1)
+    assert store._connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 3
+    store.close()
+
+def test_sqlite_hot_cache_is_bounded_and_sees_other_workers(tmp_path):
+    path = str(tmp_path / "projects.db")
+    store = SqliteProjectStore(path, max_bytes=12_000)
+    other_worker = SqliteProjectStore(path)
+    for i in range(4):
+        store.save_project(f"p{i}", {"/App.js": f"// {i}\n" + "x" * 5_000})
+        assert store.get_project(f"p{i}")[0]["/App.js"].startswith(f"// {i}")
+    stats = store.stats()
+    assert stats["resident_bytes"] <= 12_000 and stats["cached_blobs"] == 2
+    assert stats["evictions_per_minute"] == 2 and stats["projects"] == 4
+
+    # Cached blobs are served without reading the database
+    store._connection.execute("DELETE FROM blobs WHERE content LIKE '// 3%'")
+    assert store.get_project("p3")[0]["/App.js"].startswith("// 3")
+    # A version written by another worker is read, never a stale cached file
+    other_worker.update_project("p3", {"/App.js": "v2"})
+    assert store.get_project("p3") == ({"/App.js": "v2"}, 2)
+    other_worker.close()
+    store.close()
+
+def test_memory_budget_freezes_least_recently_used_projects(tmp_path):
+    for spill_dir in (None, str(tmp_path / "spill")):
+        store = MemoryProjectStore(max_bytes=12_000, spill_dir=spill_dir)
+        for i in range(4):
+            store.save_project(f"p{i}", {"/App.js": f"// {i}\n" + "x" * 5_000})
+            store.append_message(f"p{i}", ChatMessage(role="user", content=f"m{i}"))
+        stats = store.stats()
+        assert stats["resident_bytes"] <= 12_000
+        assert stats["projects"] == 4 and stats["hot_projects"] == 2
+        files, version = store.get_project("p0")
+        assert files["/App.js"].startswith("// 0") and version == 1
+        assert [m.content for m in store.get_history("p0")] == ["m0"]
+        assert store.update_project("p0", {"/App.js": "small"}) == 2
+        assert store.get_project("p0", 1)[0] == files
+
+def test_unreadable_spilled_project_is_dropped(tmp_path):
+    spill_dir = tmp_path / "spill"
+    store = MemoryProjectStore(max_bytes=6_000, spill_dir=str(spill_dir))
+    for i in range(2):
+        store.save_project(f"p{i}", {"/App.js": f"// {i}\n" + "x" * 5_000})
+    for path in spill_dir.iterdir():
+        path.unlink()
+    assert store.get_version("p0") is None
+    assert store.get_project("p0") is None and store.get_version("p1") == 1
+
+def test_memory_store_expires_idle_projects(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.project_store.time.monotonic", lambda: now[0])
+    store = MemoryProjectStore(ttl=60)
+    store.save_project("old", {"/App.js": "a"})
+    now[0] += 50
+    store.save_project("recent", {"/App.js": "b"})
+    now[0] += 20
+    assert store.get_project("old") is None
+    assert store.get_project("recent") == ({"/App.js": "b"}, 1)
+    assert store.stats()["resident_bytes"] == len("b") + len("/App.js") + MemoryProjectStore.ENTRY_OVERHEAD
+
+def test_delta_between_versions(store):
+    store.save_project("p1", {"/index.js": "root", "/App.js": "v1", "/Old.js": "old"})
+    store.update_project("p1", {"/index.js": "root", "/App.js": "v2", "/New.js": "new"})
+    delta = store.get_delta("p1", 1)
+    assert (delta.base_version, delta.version) == (1, 2)
+    assert delta.added == {"/New.js": "new"}
+    assert delta.changed == {"/App.js": "v2"}
+    assert delta.removed == ["/Old.js"]
+    assert store.get_delta("p1", 5) is None
+
+def test_messages_are_read_in_pages(store):
+    store.save_project("p1", {})
+    for i in range(5):
+        store.append_message("p1", ChatMessage(role="user", content=f"m{i}"))
+        store.append_message("p2", ChatMessage(role="user", content="other"))
+    first = store.get_messages("p1", limit=2)
+    assert [m.content for _, m in first] == ["m0", "m1"]
+    rest = store.get_messages("p1", after=first[-1][0], limit=10)
+    assert [m.content for _, m in rest] == ["m2", "m3", "m4"]
+    assert store.get_messages("p1", after=rest[-1][0]) == []
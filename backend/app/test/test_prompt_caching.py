@@ -0,0 +1,28 @@
+"""
+Tests for the prompt cache breakpoints of the LLM requests
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.core.prompt_caching import CACHE_BREAKPOINT, apply_cache_breakpoints
+
+MESSAGES = [
+    {"role": "system", "content": "Agent"},
+    {"role": "user", "content": f"Consignes{CACHE_BREAKPOINT}Projet{CACHE_BREAKPOINT}Demande"},
+]
+
+def test_breakpoints_become_cache_control_blocks():
+    system, user = apply_cache_breakpoints(MESSAGES, enabled=True)
+    assert system == MESSAGES[0]
+    assert user["content"] == [
+        {"type": "text", "text": "Consignes", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "Projet", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "Demande"},
+    ]
+
+def test_breakpoints_are_removed_when_caching_is_disabled():
+    _, user = apply_cache_breakpoints(MESSAGES, enabled=False)
+    assert user["content"] == "Consignes\nProjet\nDemande"
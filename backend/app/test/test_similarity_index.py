@@ -0,0 +1,73 @@
+"""
+Tests for the warm-start similarity index
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+from app.config.settings import WARM_START_THRESHOLD
+from app.models.schemas import ProjectRequest
+from app.services import generator
+from app.services.generation_cache import GenerationCache
+from app.services.similarity_index import SimilarityIndex
+
+PROJECT = {"/App.js": "export default function App() { return null; }", "/index.js": "x"}
+
+def index_of(*descriptions, score=9.0):
+    index = SimilarityIndex(min_score=7.0)
+    for description in descriptions:
+        index.add(description, description, "", PROJECT, score)
+    return index
+
+def test_near_duplicate_requests_match():
+    pairs = [
+        ("todo list app", "todo app with delete"),
+        ("Todo list application", "todo app with delete"),
+        ("Todo list application", "Todo List App"),
+        ("Application de liste de tâches", "liste de tâches avec suppression"),
+    ]
+    for indexed, request in pairs:
+        match = index_of(indexed).query(request, "", WARM_START_THRESHOLD)
+        assert match is not None and match["description"] == indexed, (indexed, request)
+        assert match["project"] == PROJECT
+
+def test_different_applications_do_not_match():
+    index = index_of("todo list app", "weather dashboard with forecast")
+    assert index.query("recipe book with photos", "", WARM_START_THRESHOLD) is None
+    assert index.query("shopping list app", "", WARM_START_THRESHOLD) is None
+    assert index_of("expense tracker").query("budget tracker", "", WARM_START_THRESHOLD) is None
+    assert index.query("weather forecast dashboard", "", WARM_START_THRESHOLD)["description"] == "weather dashboard with forecast"
+
+def test_generic_requests_are_similar_to_nothing():
+    index = index_of("Create an app")
+    assert len(index) == 0
+    assert index.query("Create a simple app", "", WARM_START_THRESHOLD) is None
+    index = index_of("todo list app")
+    assert index.query("Create a simple app", "", 0.0) is None
+
+def test_low_scores_are_not_indexed_and_entries_are_bounded():
+    index = SimilarityIndex(max_entries=2, min_score=7.0)
+    assert not index.add("low", "todo list app", "", PROJECT, 5.0)
+    for key in ("todo list app", "weather dashboard", "recipe book"):
+        index.add(key, key, "", PROJECT, 8.0)
+    assert len(index) == 2
+    assert index.query("todo list app", "", WARM_START_THRESHOLD) is None
+
+def test_bypassing_caches_skips_warm_start(tmp_path, monkeypatch):
+    monkeypatch.setattr(generator, "similarity_index", index_of("todo list app"))
+    monkeypatch.setattr(generator, "generation_cache", GenerationCache(max_bytes=10_000, directory=str(tmp_path)))
+    monkeypatch.setattr(generator, "run_generation_crew", lambda description, features: '{"/App.js": "fresh", "/index.js": "x"}')
+    monkeypatch.setattr(generator, "run_warm_start_crew", lambda description, features, base: ({**base["project"], "/App.js": "adapted"}, False))
+    monkeypatch.setattr(generator, "_store_and_evaluate", lambda request, project_data, project_id: None)
+
+    fresh = asyncio.run(generator._generate_react_project(ProjectRequest(description="todo app with delete", use_cache=False)))
+    assert fresh.project_data["warm_start"] is None and fresh.project_data["files"]["/App.js"] == "fresh"
+
+    # The fresh generation was cached: start again from an empty cache
+    monkeypatch.setattr(generator, "generation_cache", GenerationCache(max_bytes=10_000))
+    warm = asyncio.run(generator._generate_react_project(ProjectRequest(description="todo app with delete")))
+    assert warm.project_data["warm_start"]["base_description"] == "todo list app"
+    assert warm.project_data["files"]["/App.js"] == "adapted"
@@ -0,0 +1,112 @@
+"""
+Tests for request coalescing and idempotent replays
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+from app.services.single_flight import SingleFlight
+
+def counting_factory(calls, result, delay=0.0):
+    async def factory():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+    return lambda: factory()
+
+def test_concurrent_identical_requests_share_one_task():
+    flight = SingleFlight(ttl=60, max_results=10)
+    calls = []
+
+    async def run():
+        return await asyncio.gather(*(flight.do(["k"], counting_factory(calls, "r", 0.05)) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["r"] * 5
+    assert calls == ["r"]
+
+def test_idempotency_key_replays_successful_result():
+    flight = SingleFlight(ttl=60, max_results=10)
+    calls = []
+
+    async def run():
+        first = await flight.do(["a"], counting_factory(calls, "first"), "key-1", scope=("generate",))
+        retry = await flight.do(["b"], counting_factory(calls, "second"), "key-1", scope=("generate",))
+        return first, retry
+
+    assert asyncio.run(run()) == ("first", "first")
+    assert calls == ["first"]
+
+def test_failed_results_are_not_replayed():
+    flight = SingleFlight(ttl=60, max_results=10)
+    calls = []
+
+    async def run():
+        await flight.do(["a"], counting_factory(calls, "failed"), "key-1", is_success=lambda r: r != "failed")
+        return await flight.do(["a"], counting_factory(calls, "ok"), "key-1", is_success=lambda r: r != "failed")
+
+    assert asyncio.run(run()) == "ok"
+    assert calls == ["failed", "ok"]
+
+def test_replayed_results_expire(monkeypatch):
+    flight = SingleFlight(ttl=10, max_results=10)
+    calls = []
+    now = [1000.0]
+    monkeypatch.setattr("app.services.single_flight.time.monotonic", lambda: now[0])
+
+    async def request(result):
+        return await flight.do(["a"], counting_factory(calls, result), "key-1")
+
+    assert asyncio.run(request("first")) == "first"
+    now[0] += 9
+    assert asyncio.run(request("second")) == "first"
+    now[0] += 2
+    assert asyncio.run(request("third")) == "third"
+    assert calls == ["first", "third"]
+
+def test_idempotency_key_is_scoped_by_operation_and_resource():
+    flight = SingleFlight(ttl=60, max_results=10)
+    calls = []
+
+    async def run():
+        generated = await flight.do(["g"], counting_factory(calls, "project"), "shared", scope=("generate",))
+        chat_a = await flight.do(["c1"], counting_factory(calls, "edit A"), "shared", scope=("chat", "A"))
+        chat_b = await flight.do(["c2"], counting_factory(calls, "edit B"), "shared", scope=("chat", "B"))
+        replay_a = await flight.do(["c3"], counting_factory(calls, "edit A again"), "shared", scope=("chat", "A"))
+        return generated, chat_a, chat_b, replay_a
+
+    assert asyncio.run(run()) == ("project", "edit A", "edit B", "edit A")
+    assert calls == ["project", "edit A", "edit B"]
+
+def test_joined_request_records_its_own_idempotency_key():
+    flight = SingleFlight(ttl=60, max_results=10)
+    calls = []
+
+    async def run():
+        # Two clients, each with its own idempotency key, send the same request
+        first, joined = await asyncio.gather(
+            flight.do(["same-request"], counting_factory(calls, "first", 0.05), "key-A", scope=("generate",)),
+            flight.do(["same-request"], counting_factory(calls, "second", 0.05), "key-B", scope=("generate",)),
+        )
+        # Both retries are replayed, with a different content key
+        retry_a = await flight.do(["other"], counting_factory(calls, "third"), "key-A", scope=("generate",))
+        retry_b = await flight.do(["other"], counting_factory(calls, "fourth"), "key-B", scope=("generate",))
+        return first, joined, retry_a, retry_b
+
+    assert asyncio.run(run()) == ("first",) * 4
+    assert calls == ["first"]
+    assert flight._inflight == {}
+
+def test_results_are_bounded():
+    flight = SingleFlight(ttl=60, max_results=2)
+    calls = []
+
+    async def run():
+        for key in ("k1", "k2", "k3", "k1"):
+            await flight.do([key], counting_factory(calls, key), key)
+
+    asyncio.run(run())
+    # k1 was evicted by k3 and runs again
+    assert calls == ["k1", "k2", "k3", "k1"]
@@ -0,0 +1,117 @@
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+from app.evaluation.static_analyzer import analyze_project, analyze_projects
+
+INDEX = """import React from 'react';
+import { createRoot } from 'react-dom/client';
+import App from './App';
+
+const container = document.getElementById('root');
+const root = createRoot(container);
+root.render(<App />);"""
+
+APP = """import React, { useState } from 'react';
+import { View, Text, TouchableOpacity, StyleSheet } from 'react-native-web';
+import Header from './components/Header';
+
+// <div> in a comment is fine
+const EMAIL = /^[^@]+@[^@]+\\.[a-z]{2,}$/i;
+
+export default function App() {
+  const [tasks, setTasks] = useState([]);
+  const ratio = tasks.length / 2;
+  const label = `Tâches : ${tasks.map(t => `${t.name}`).join(', ')}`;
+  return (
+    <View style={styles.container}>
+      <Header title="Aujourd'hui" />
+      <Text>C'est l'heure {ratio < 1 ? <Text>peu</Text> : null}</Text>
+      {tasks.length > 0 && <><Text>{label}</Text></>}
+      <TouchableOpacity onPress={() => setTasks([...tasks, { name: 'x' }])}>
+        <Text>Ajouter</Text>
+      </TouchableOpacity>
+    </View>
+  );
+}
+
+const styles = StyleSheet.create({ container: { flex: 1, padding: 16 } });
+"""
+
+HEADER = """import React from 'react';
+import { View, Text } from 'react-native-web';
+
+export default function Header({ title }) {
+  return <View><Text>{title}</Text></View>;
+}
+"""
+
+def project(**overrides):
+    files = {"/index.js": INDEX, "/App.js": APP, "/components/Header.js": HEADER}
+    files.update(overrides)
+    return {path: code for path, code in files.items() if code is not None}
+
+def rules(report):
+    return sorted({v.rule for v in report.violations})
+
+def test_compliant_project_passes():
+    report = analyze_project(project())
+    assert report.violations == []
+    assert report.passed and report.compliance_score == 10
+
+def test_hard_failures():
+    assert rules(analyze_project(project(**{"/index.js": None}))) == ["missing_index"]
+
+    forbidden = APP.replace("import Header", "import Icon from 'react-native-vector-icons/Feather';\nimport Header")
+    assert rules(analyze_project(project(**{"/App.js": forbidden}))) == ["forbidden_import"]
+
+    unresolved = APP.replace("./components/Header", "./components/Menu")
+    assert rules(analyze_project(project(**{"/App.js": unresolved}))) == ["unresolved_import"]
+
+    report = analyze_project({})
+    assert not report.passed and rules(report) == ["empty_project"]
+
+def test_syntax_errors():
+    cases = {
+        "const a = (1 + 2;\n": "never closed",
+        "const s = 'abc;\n": "unterminated string",
+        "function f() {\n  return [1, 2);\n}\n": "does not close",
+        "const t = `a ${b;\n": "never closed",
+        "const u = `abc;\n": "unterminated template",
+        APP.replace("</View>\n  );", "</Viw>\n  );"): "</Viw> closes <View>",
+    }
+    for code, message in cases.items():
+        report = analyze_project(project(**{"/App.js": code}))
+        violations = [v for v in report.violations if v.rule == "syntax"]
+        assert len(violations) == 1 and message in violations[0].message, code
+        assert not report.passed
+
+def test_division_is_not_a_regex():
+    valid = [
+        "const x = config.default / 2;\n",
+        "const y = i++ / 2;\n",
+        "const z = n-- / 2 + arr[0] / 3;\n",
+        "const w = promise.catch / 2 + obj?.return / 4;\n",
+        "let k = ++i / 2;\n",
+        "const r = a + /b+/.source.length / 2;\n",
+        "if (ok) x = -/c/g.lastIndex;\n",
+    ]
+    for code in valid:
+        report = analyze_project(project(**{"/App.js": APP + code}))
+        assert [v for v in report.violations if v.rule == "syntax"] == [], code
+
+def test_warnings_lower_compliance():
+    html = HEADER.replace("<View><Text>", "<div><span>").replace("</Text></View>", "</span></div>")
+    html = html.replace("'react-native-web'", "'react-native'")
+    report = analyze_project(project(**{"/components/Header.js": html}))
+    assert report.passed
+    assert rules(report) == ["html_element", "react_native_import"]
+    assert [v.line for v in report.violations if v.rule == "html_element"] == [5, 5]
+    assert report.compliance_score == 8
+
+def test_batch_keeps_order():
+    projects = [project(), project(**{"/index.js": None})] * 20
+    reports = analyze_projects(projects, max_workers=2)
+    assert [report.passed for report in reports] == [True, False] * 20
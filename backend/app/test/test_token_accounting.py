@@ -0,0 +1,175 @@
+"""
+Tests for the buffered, tagged token accounting
+"""
+import sys
+import os
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from app.services.token_accounting import (
+    JsonlUsageSink,
+    SqliteUsageSink,
+    TokenAccountant,
+    current_usage_tags,
+    usage_tags,
+)
+
+def usage(prompt=100, completion=20, cached=None):
+    details = SimpleNamespace(cached_tokens=cached) if cached is not None else None
+    return SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion,
+                           total_tokens=prompt + completion, prompt_tokens_details=details)
+
+class FlakySink:
+    """Fails the first `failures` writes, then keeps the records"""
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.written = []
+
+    def write(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.written.extend(records)
+
+def test_records_are_buffered_until_flush():
+    sink = FlakySink(failures=0)
+    accountant = TokenAccountant(sink, batch_size=100, flush_interval=60)
+    accountant.record("openai", "gpt", usage(), 0.5)
+    accountant.record("openai", "gpt", usage(), 0.5)
+    assert sink.written == [] and accountant.snapshot()["buffered_records"] == 2
+    assert accountant.flush() == 2
+    assert len(sink.written) == 2 and accountant.snapshot()["buffered_records"] == 0
+    assert accountant.flush() == 0
+
+def test_full_batch_wakes_the_flusher():
+    sink = FlakySink(failures=0)
+    accountant = TokenAccountant(sink, batch_size=3, flush_interval=60)
+    for _ in range(3):
+        accountant.record("openai", "gpt", usage(), 0.1)
+    deadline = time.monotonic() + 5
+    while len(sink.written) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(sink.written) == 3
+
+def test_records_survive_a_failed_write():
+    sink = FlakySink(failures=1)
+    accountant = TokenAccountant(sink, batch_size=100, flush_interval=60)
+    with usage_tags(endpoint="chat"):
+        accountant.record("openai", "gpt", usage(), 0.1)
+    assert accountant.flush() == 0
+    assert accountant.snapshot()["buffered_records"] == 1
+    accountant.record("openai", "gpt", usage(), 0.1)
+    assert accountant.flush() == 2
+    # Order is kept: the record of the failed write comes first
+    assert [record["endpoint"] for record in sink.written] == ["chat", "other"]
+
+def test_failed_writes_keep_a_bounded_buffer():
+    sink = FlakySink(failures=100)
+    accountant = TokenAccountant(sink, batch_size=2, flush_interval=60)
+    for _ in range(50):
+        with accountant._lock:
+            accountant._buffer.append({"endpoint": "other"})
+        accountant.flush()
+    assert accountant.snapshot()["buffered_records"] == 20
+
+def test_totals_and_rates():
+    accountant = TokenAccountant(None, rate_window=120)
+    with usage_tags(endpoint="generate-project"):
+        accountant.record("openai", "gpt", usage(100, 20, cached=40), 1.0)
+        accountant.record("openai", "gpt", None, 2.0)
+    with usage_tags(endpoint="chat"):
+        accountant.record("anthropic", "claude", usage(50, 10), 0.5)
+
+    snapshot = accountant.snapshot()
+    generate = snapshot["endpoints"]["generate-project"]
+    assert generate["calls"] == 2 and generate["calls_without_usage"] == 1
+    assert generate["total_tokens"] == 120 and generate["cached_prompt_ratio"] == 0.4
+    # 2 calls and 120 tokens over a 2 minute window
+    assert generate["calls_per_minute"] == 1 and generate["tokens_per_minute"] == 60
+    assert snapshot["totals"]["total_tokens"] == 180 and snapshot["totals"]["calls"] == 3
+    assert snapshot["models"]["claude"]["prompt_tokens"] == 50
+
+def test_rates_forget_calls_outside_the_window(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.services.token_accounting.time.time", lambda: now[0])
+    accountant = TokenAccountant(None, rate_window=60)
+    accountant.record("openai", "gpt", usage(), 0.1)
+    now[0] += 30
+    accountant.record("openai", "gpt", usage(), 0.1)
+    assert accountant.snapshot()["endpoints"]["other"]["calls_per_minute"] == 2
+    now[0] += 45
+    endpoint = accountant.snapshot()["endpoints"]["other"]
+    assert endpoint["calls_per_minute"] == 1 and endpoint["calls"] == 2
+
+def test_tags_nest_and_follow_threads_and_tasks():
+    accountant = TokenAccountant(None)
+    with usage_tags(endpoint="evaluation", evaluation_run="run-1"):
+        with usage_tags(project_id="p1"):
+            inner = accountant.record("openai", "gpt", usage(), 0.1)
+            # Worker threads get a copy of the context, as in the LLM pool
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                threaded = executor.submit(contextvars.copy_context().run, accountant.record,
+                                           "openai", "gpt", usage(), 0.1).result()
+
+            async def record_in_task():
+                return accountant.record("openai", "gpt", usage(), 0.1)
+
+            async def in_task():
+                return await asyncio.create_task(record_in_task())
+            tasked = asyncio.run(in_task())
+        outer = accountant.record("openai", "gpt", usage(), 0.1)
+        assert current_usage_tags() == {"endpoint": "evaluation", "evaluation_run": "run-1"}
+    assert current_usage_tags() == {}
+
+    for record in (inner, threaded, tasked):
+        assert (record["endpoint"], record["evaluation_run"], record["project_id"]) == ("evaluation", "run-1", "p1")
+    assert (outer["endpoint"], outer["project_id"]) == ("evaluation", None)
+
+def test_plain_threads_do_not_inherit_tags():
+    records = []
+    with usage_tags(endpoint="chat"):
+        thread = threading.Thread(target=lambda: records.append(current_usage_tags()))
+        thread.start()
+        thread.join()
+    assert records == [{}]
+
+def test_jsonl_sink(tmp_path):
+    accountant = TokenAccountant(JsonlUsageSink(str(tmp_path / "usage" / "tokens.jsonl")), flush_interval=60)
+    with usage_tags(endpoint="chat", project_id="p1"):
+        accountant.record("openai", "gpt", usage(cached=10), 0.2)
+    accountant.close()
+    lines = (tmp_path / "usage" / "tokens.jsonl").read_text(encoding="utf-8").splitlines()
+    record = json.loads(lines[0])
+    assert len(lines) == 1
+    assert (record["endpoint"], record["project_id"], record["total_tokens"], record["cached_tokens"]) == ("chat", "p1", 120, 10)
+
+def test_sqlite_sink_adds_missing_columns(tmp_path):
+    path = tmp_path / "tokens.db"
+    # Table created before the prompt cache counters
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE token_usage (ts REAL, endpoint TEXT, project_id TEXT, evaluation_run TEXT, "
+                       "provider TEXT, model TEXT, prompt_tokens INTEGER, completion_tokens INTEGER, "
+                       "total_tokens INTEGER, latency REAL)")
+    connection.commit()
+    connection.close()
+
+    accountant = TokenAccountant(SqliteUsageSink(str(path)), flush_interval=60)
+    with usage_tags(endpoint="generate-project"):
+        accountant.record("openai", "gpt", usage(cached=30), 0.3)
+        accountant.record("openai", "gpt", usage(), 0.3)
+    assert accountant.flush() == 2
+
+    connection = sqlite3.connect(path)
+    rows = connection.execute("SELECT endpoint, total_tokens, cached_tokens FROM token_usage ORDER BY rowid").fetchall()
+    connection.close()
+    assert rows == [("generate-project", 120, 30), ("generate-project", 120, None)]
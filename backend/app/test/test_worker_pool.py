@@ -0,0 +1,117 @@
+"""
+Tests for the bounded LLM worker pool and the 429 responses of saturated endpoints
+"""
+import sys
+import os
+import threading
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(backend_dir)
+
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.api import routes
+from app.services import generator
+from app.services.generation_cache import GenerationCache
+from app.services.token_accounting import current_usage_tags, usage_tags
+from app.services.worker_pool import BoundedWorkerPool, PoolSaturatedError
+
+def test_full_pool_rejects_right_away():
+    pool = BoundedWorkerPool(max_workers=1, max_queue=1, retry_after=7, name="test-pool")
+    release = threading.Event()
+
+    async def run():
+        running = pool.submit(release.wait, 5)
+        queued = pool.submit(lambda: "queued")
+        with pytest.raises(PoolSaturatedError) as saturated:
+            pool.submit(lambda: "rejected")
+        assert saturated.value.retry_after == 7
+        assert pool.stats() == {"max_workers": 1, "max_queue": 1, "running": 1, "queued": 1}
+        release.set()
+        results = await asyncio.gather(running, queued)
+        # Finished jobs give their slots back
+        return results, await pool.run(lambda: "after")
+
+    assert asyncio.run(run()) == ([True, "queued"], "after")
+    assert pool.stats()["running"] == 0 and pool.stats()["queued"] == 0
+    pool.shutdown()
+
+def test_jobs_see_the_request_context():
+    pool = BoundedWorkerPool(max_workers=2, max_queue=0, retry_after=1, name="test-pool")
+
+    async def run():
+        with usage_tags(endpoint="chat", project_id="p1"):
+            return await pool.run(current_usage_tags)
+
+    assert asyncio.run(run()) == {"endpoint": "chat", "project_id": "p1"}
+    pool.shutdown()
+
+def test_failing_job_releases_its_slot():
+    pool = BoundedWorkerPool(max_workers=1, max_queue=0, retry_after=1, name="test-pool")
+
+    def broken():
+        raise ValueError("boom")
+
+    async def run():
+        with pytest.raises(ValueError):
+            await pool.run(broken)
+        return await pool.run(lambda: "ok")
+
+    assert asyncio.run(run()) == "ok"
+    pool.shutdown()
+
+def test_cancelled_queued_jobs_release_their_slots():
+    pool = BoundedWorkerPool(max_workers=1, max_queue=2, retry_after=1, name="test-pool")
+    release = threading.Event()
+
+    async def run():
+        running = pool.submit(release.wait, 5)
+        # The caller gives up on a queued job
+        abandoned = pool.submit(lambda: "abandoned")
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        assert pool.stats()["queued"] == 0
+        queued = pool.submit(lambda: "queued")
+        # Shutdown cancels the jobs that have not started yet
+        pool.shutdown()
+        assert pool.stats() == {"max_workers": 1, "max_queue": 2, "running": 1, "queued": 0}
+        release.set()
+        await running
+        assert queued.cancelled()
+
+    asyncio.run(run())
+    assert pool.stats()["running"] == 0 and pool.stats()["queued"] == 0
+
+def test_saturated_generation_endpoints_answer_429(monkeypatch):
+    pool = BoundedWorkerPool(max_workers=1, max_queue=0, retry_after=7, name="test-pool")
+    started, release = threading.Event(), threading.Event()
+
+    def blocking_crew(description, features):
+        started.set()
+        release.wait(5)
+        return '{"/App.js": "ok", "/index.js": "x"}'
+
+    monkeypatch.setattr(generator, "llm_pool", pool)
+    monkeypatch.setattr(generator, "generation_cache", GenerationCache(max_bytes=10_000))
+    monkeypatch.setattr(generator, "run_generation_crew", blocking_crew)
+    monkeypatch.setattr(generator, "_store_and_evaluate", lambda request, project_data, project_id: None)
+    app = FastAPI()
+    app.include_router(routes.router)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/generate-project", json={"description": "Todo list"}))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            rejected = await client.post("/generate-project", json={"description": "Weather app"})
+            rejected_stream = await client.post("/generate-project/stream", json={"description": "Recipe book"})
+            release.set()
+            return await first, rejected, rejected_stream
+
+    first, rejected, rejected_stream = asyncio.run(run())
+    assert first.status_code == 200 and first.json()["success"]
+    for response in (rejected, rejected_stream):
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+    pool.shutdown()
@@ -0,0 +1,143 @@
+"""
+Before/after measurement of the relevance-filtered chat context.
+
+For every turn of recorded chat sessions, builds the patch-mode prompt with
+the whole project (before) and with the files selected by the project index
+plus a manifest of the others (after), and reports the input tokens of both.
+With --live, both prompts are also sent to the chat agent's LLM and the
+latency of each call is reported (this costs real tokens).
+
+Usage (from backend/):
+    python benchmarks/bench_chat_context.py [--sessions DIR] [--live]
+
+A session is a JSON file {"project": {path: code}, "messages": ["...", ...]},
+e.g. a stored project and the chat history sent to it. When the directory is
+empty, a synthetic session is used instead.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.agents.chat_modification_agent import chat_modification_agent, create_patch_task
+from app.services.chat_service import ProjectChatService
+from app.services.project_store import MemoryProjectStore
+
+COMPONENT = """import React, {{ useState }} from 'react';
+import {{ View, Text, TouchableOpacity, StyleSheet }} from 'react-native-web';
+{imports}
+export default function {name}() {{
+  const [open, setOpen] = useState(false);
+  return (
+    <View style={{styles.container}}>
+      <Text style={{styles.title}}>{label}</Text>
+      <TouchableOpacity style={{styles.button}} onPress={{() => setOpen(!open)}}>
+        <Text style={{styles.buttonText}}>{action}</Text>
+      </TouchableOpacity>
+    </View>
+  );
+}}
+
+const styles = StyleSheet.create({{
+  container: {{ padding: 16, backgroundColor: '#ffffff', borderRadius: 8 }},
+  title: {{ fontSize: 20, fontWeight: 'bold', color: '#222222' }},
+  button: {{ backgroundColor: '#FF7900', padding: 10, borderRadius: 6 }},
+  buttonText: {{ color: 'white', fontSize: 16 }},
+}});
+"""
+
+SCREENS = [
+    ("Header", "Mes tâches", "Menu"), ("Sidebar", "Navigation", "Fermer"), ("TaskList", "Liste des tâches", "Trier"),
+    ("TaskItem", "Tâche", "Supprimer"), ("TaskForm", "Nouvelle tâche", "Ajouter"), ("SearchBar", "Recherche", "Chercher"),
+    ("Calendar", "Calendrier", "Aujourd'hui"), ("Profile", "Profil utilisateur", "Modifier"),
+    ("Settings", "Paramètres", "Enregistrer"), ("Statistics", "Statistiques", "Exporter"),
+    ("Notifications", "Notifications", "Tout lire"), ("Footer", "© 2025", "Contact"),
+]
+
+def synthetic_session():
+    project = {"/index.js": "import React from 'react';\nimport { createRoot } from 'react-dom/client';\nimport App from './App';\n"}
+    app_imports = "\n".join(f"import {name} from './components/{name}';" for name, _, _ in SCREENS)
+    project["/App.js"] = COMPONENT.format(imports=app_imports, name="App", label="Todo", action="Menu")
+    for name, label, action in SCREENS:
+        imports = "import TaskItem from './TaskItem';" if name == "TaskList" else ""
+        project[f"/components/{name}.js"] = COMPONENT.format(imports=imports, name=name, label=label, action=action)
+    messages = [
+        "Change la couleur du bouton supprimer en rouge",
+        "Agrandis le titre de l'en-tête",
+        "Ajoute une bordure arrondie à la barre de recherche",
+        "Mets le calendrier en bleu",
+        "Ajoute un mode sombre",
+        "Traduis le pied de page en anglais",
+    ]
+    return {"synthetic": {"project": project, "messages": messages}}
+
+def load_sessions(directory: Path):
+    if directory.is_dir():
+        sessions = {path.name: json.loads(path.read_text(encoding="utf-8")) for path in sorted(directory.glob("*.json"))}
+        if sessions:
+            return sessions, "recorded"
+    return synthetic_session(), "synthetic"
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except Exception:
+        return lambda text: len(text) // 4, "chars / 4"
+
+def live_latency(prompt: str) -> float:
+    start = time.perf_counter()
+    chat_modification_agent.llm.call([{"role": "user", "content": prompt}])
+    return time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sessions", default=os.path.join(os.path.dirname(__file__), "chat_sessions"))
+    arg_parser.add_argument("--live", action="store_true", help="also send both prompts to the LLM and time them")
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    sessions, source = load_sessions(Path(args.sessions))
+    count_tokens, tokenizer = token_counter()
+    service = ProjectChatService(MemoryProjectStore())
+    print(f"{len(sessions)} sessions ({source}), tokens counted with {tokenizer}")
+    header = f"{'session':<16}{'turn':>5}{'files':>8}{'before':>9}{'after':>9}{'saved':>8}"
+    print(header + (f"{'before s':>10}{'after s':>10}" if args.live else ""))
+
+    totals = {"before": 0, "after": 0, "before_s": 0.0, "after_s": 0.0, "turns": 0}
+    for name, session in sessions.items():
+        project = session["project"]
+        service.store_project(name, project)
+        for turn, message in enumerate(session["messages"], 1):
+            before = create_patch_task(message, project).description
+            context, manifest = service.select_context(name, 1, message, project)
+            after = create_patch_task(message, context, manifest).description
+            before_tokens, after_tokens = count_tokens(before), count_tokens(after)
+            totals["before"] += before_tokens
+            totals["after"] += after_tokens
+            totals["turns"] += 1
+            line = (f"{name[:15]:<16}{turn:>5}{f'{len(context)}/{len(project)}':>8}"
+                    f"{before_tokens:>9}{after_tokens:>9}{1 - after_tokens / before_tokens:>8.0%}")
+            if args.live:
+                before_s, after_s = live_latency(before), live_latency(after)
+                totals["before_s"] += before_s
+                totals["after_s"] += after_s
+                line += f"{before_s:>10.1f}{after_s:>10.1f}"
+            print(line)
+
+    turns = max(1, totals["turns"])
+    summary = (f"\nMean input tokens per turn: before {totals['before'] / turns:.0f}, "
+               f"after {totals['after'] / turns:.0f} ({1 - totals['after'] / max(1, totals['before']):.0%} saved)")
+    if args.live:
+        summary += f"\nMean latency per turn: before {totals['before_s'] / turns:.1f}s, after {totals['after_s'] / turns:.1f}s"
+    print(summary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Judge context comparison: legacy truncation vs token-budgeted packing vs full project.
+
+For every project of the corpus, builds the judge's project content three ways:
+the legacy one (first 5 files in dict order, each cut to 1000 characters), the
+packed one (judge_packer.pack_project within --budget tokens) and the whole
+project, and reports their input tokens and how many files each shows whole.
+With --live, the judge scores the project with each context (this costs real
+tokens) and the report gives how far legacy and packed scores are from the
+full-context scores.
+
+Usage (from backend/):
+    python benchmarks/bench_judge_packing.py [--projects DIR] [--budget TOKENS] [--live]
+
+A project is a JSON file {"test_case": {"description": ..., "features": ...},
+"project": {path: code}}, e.g. a generated project and its request. When the
+directory is empty, synthetic projects are used instead.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.config.settings import JUDGE_CONTEXT_TOKENS
+from app.evaluation.judge_packer import pack_project
+from app.evaluation.simple_evaluator import SimpleFrontendEvaluator, JUDGE_PROMPT_TEMPLATE
+from app.evaluation.static_analyzer import analyze_project
+
+SCREEN = """import React, {{ useState }} from 'react';
+import {{ View, Text, TouchableOpacity, StyleSheet }} from 'react-native-web';
+{imports}
+export default function {name}({{ onNavigate }}) {{
+  const [items, setItems] = useState([]);
+  const [selected, setSelected] = useState(null);
+
+  const addItem = () => setItems([...items, {{ id: Date.now(), label: '{label} ' + (items.length + 1) }}]);
+  const removeItem = (id) => setItems(items.filter(item => item.id !== id));
+
+  return (
+    <View style={{styles.container}}>
+      <Text style={{styles.title}}>{label}</Text>
+      {{items.map(item => (
+        <TouchableOpacity key={{item.id}} style={{styles.row}} onPress={{() => setSelected(item.id)}}>
+          <Text style={{selected === item.id ? styles.selected : styles.label}}>{{item.label}}</Text>
+          <TouchableOpacity style={{styles.remove}} onPress={{() => removeItem(item.id)}}>
+            <Text style={{styles.removeText}}>Supprimer</Text>
+          </TouchableOpacity>
+        </TouchableOpacity>
+      ))}}
+      <TouchableOpacity style={{styles.button}} onPress={{addItem}}>
+        <Text style={{styles.buttonText}}>{action}</Text>
+      </TouchableOpacity>
+    </View>
+  );
+}}
+
+const styles = StyleSheet.create({{
+  container: {{ padding: 16, backgroundColor: '#ffffff', borderRadius: 8 }},
+  title: {{ fontSize: 20, fontWeight: 'bold', color: '#222222' }},
+  row: {{ flexDirection: 'row', justifyContent: 'space-between', paddingVertical: 8 }},
+  label: {{ fontSize: 16, color: '#333333' }},
+  selected: {{ fontSize: 16, color: '#FF7900', fontWeight: 'bold' }},
+  remove: {{ paddingHorizontal: 8 }},
+  removeText: {{ color: '#cc0000' }},
+  button: {{ backgroundColor: '#FF7900', padding: 10, borderRadius: 6 }},
+  buttonText: {{ color: 'white', fontSize: 16 }},
+}});
+"""
+
+INDEX = """import React from 'react';
+import { createRoot } from 'react-dom/client';
+import App from './App';
+
+const container = document.getElementById('root');
+const root = createRoot(container);
+root.render(<App />);"""
+
+SCREENS = [
+    ("TaskList", "Liste des tâches", "Ajouter"), ("TaskItem", "Tâche", "Modifier"), ("Calendar", "Calendrier", "Planifier"),
+    ("Profile", "Profil", "Enregistrer"), ("Settings", "Paramètres", "Appliquer"), ("Statistics", "Statistiques", "Exporter"),
+    ("Sidebar", "Menu", "Fermer"), ("Footer", "Contact", "Écrire"),
+]
+
+def synthetic_projects():
+    projects = {}
+    for size in (3, 6, 9):
+        screens = SCREENS[:size - 1]
+        # Components first: the dict order the legacy truncation relies on leaves App.js out
+        project = {}
+        for name, label, action in screens:
+            imports = "import Footer from './Footer';" if name != "Footer" else ""
+            project[f"/components/{name}.js"] = SCREEN.format(imports=imports, name=name, label=label, action=action)
+        app_imports = "\n".join(f"import {name} from './components/{name}';" for name, _, _ in screens)
+        project["/App.js"] = SCREEN.format(imports=app_imports, name="App", label="Mes tâches", action="Nouvelle tâche")
+        project["/index.js"] = INDEX
+        test_case = {"description": "Todo list application with calendar", "features": "Add, delete, plan tasks"}
+        projects[f"synthetic-{size}"] = {"test_case": test_case, "project": project}
+    return projects
+
+def load_projects(directory: Path):
+    if directory.is_dir():
+        projects = {path.name: json.loads(path.read_text(encoding="utf-8")) for path in sorted(directory.glob("*.json"))}
+        if projects:
+            return projects, "recorded"
+    return synthetic_projects(), "synthetic"
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)), "tiktoken cl100k_base"
+    except Exception:
+        return lambda text: len(text) // 4, "chars / 4"
+
+def legacy_content(project):
+    """Project content as built before packing (first 5 files, 1000 characters each)"""
+    content = ""
+    for count, (path, code) in enumerate(project.items()):
+        if count < 5:
+            content += f"\n--- {path} ---\n{code[:1000]}...\n"
+        else:
+            content += f"\n--- {path} --- (truncated)\n"
+    return content
+
+def live_score(evaluator, test_case, project, content):
+    """Weighted judge score of a project shown with the given content"""
+    prompt = JUDGE_PROMPT_TEMPLATE.format(
+        description=test_case["description"],
+        features=test_case.get("features", "None specified"),
+        files_count=len(project),
+        project_content=content
+    )
+    response = str(evaluator.llm_judge.call([{"role": "user", "content": prompt}]))
+    evaluation = json.loads(response[response.find("{"):response.rfind("}") + 1])
+    return evaluator._score_evaluation(evaluation, analyze_project(project))["weighted_score"]
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--projects", default=os.path.join(os.path.dirname(__file__), "judge_projects"))
+    arg_parser.add_argument("--budget", type=int, default=JUDGE_CONTEXT_TOKENS, help="packing budget (estimated tokens)")
+    arg_parser.add_argument("--live", action="store_true", help="also score every context with the judge")
+    args = arg_parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    projects, source = load_projects(Path(args.projects))
+    count_tokens, tokenizer = token_counter()
+    evaluator = SimpleFrontendEvaluator(use_judge_cache=False) if args.live else None
+    print(f"{len(projects)} projects ({source}), packing budget {args.budget}, tokens counted with {tokenizer}")
+    header = f"{'project':<20}{'files':>6}{'legacy':>8}{'packed':>8}{'full':>8}{'whole l/p':>11}{'App.js l/p':>12}"
+    print(header + (f"{'legacy':>8}{'packed':>8}{'full':>7}" if args.live else ""))
+
+    totals = {"legacy": 0, "packed": 0, "full": 0, "legacy_error": 0.0, "packed_error": 0.0, "scored": 0}
+    for name, entry in projects.items():
+        test_case, project = entry["test_case"], entry["project"]
+        packed = pack_project(project, args.budget)
+        full = pack_project(project, 10 ** 9)
+        legacy = legacy_content(project)
+        tokens = {"legacy": count_tokens(legacy), "packed": count_tokens(packed.content), "full": count_tokens(full.content)}
+        for key, value in tokens.items():
+            totals[key] += value
+        legacy_whole = sum(1 for code in list(project.values())[:5] if len(code) <= 1000)
+        legacy_app = "yes" if any(path.lstrip("/") == "App.js" for path in list(project)[:5]) else "no"
+        packed_app = "yes" if any(path.lstrip("/") == "App.js" for path in packed.full_files) else "no"
+        line = (f"{name[:19]:<20}{len(project):>6}{tokens['legacy']:>8}{tokens['packed']:>8}{tokens['full']:>8}"
+                f"{f'{legacy_whole}/{len(packed.full_files)}':>11}{f'{legacy_app}/{packed_app}':>12}")
+        if args.live:
+            scores = {key: live_score(evaluator, test_case, project, content)
+                      for key, content in (("legacy", legacy), ("packed", packed.content), ("full", full.content))}
+            totals["legacy_error"] += abs(scores["legacy"] - scores["full"])
+            totals["packed_error"] += abs(scores["packed"] - scores["full"])
+            totals["scored"] += 1
+            line += f"{scores['legacy']:>8.2f}{scores['packed']:>8.2f}{scores['full']:>7.2f}"
+        print(line)
+
+    count = max(1, len(projects))
+    print(f"\nMean project tokens: legacy {totals['legacy'] / count:.0f}, packed {totals['packed'] / count:.0f}, "
+          f"full {totals['full'] / count:.0f}")
+    if args.live:
+        scored = max(1, totals["scored"])
+        print(f"Mean absolute distance to the full-context weighted score: "
+              f"legacy {totals['legacy_error'] / scored:.2f}, packed {totals['packed_error'] / scored:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Micro-benchmark of the project JSON extraction.
+
+Compares the legacy find("{")/rfind("}") + json.loads extraction with
+extract_project_json (whole output) and IncrementalProjectParser (streamed
+in chunks), and reports how many outputs each one recovers.
+
+Usage (from backend/):
+    python benchmarks/bench_project_parser.py [--corpus DIR] [--repeat N] [--chunk SIZE]
+
+The corpus is a directory of raw LLM outputs (*.txt), e.g. saved crew results.
+When it is empty, a synthetic corpus with the usual defects is used instead.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(backend_dir)
+
+from app.services.project_parser import IncrementalProjectParser, extract_project_json
+
+COMPONENT = """import React, {{ useState }} from 'react';
+import {{ View, Text, TouchableOpacity, StyleSheet }} from 'react-native-web';
+
+export default function {name}({{ onPress }}) {{
+  const [count, setCount] = useState(0);
+  return (
+    <View style={{styles.container}}>
+      <Text style={{styles.title}}>{name} "{{count}}"</Text>
+      <TouchableOpacity style={{styles.button}} onPress={{() => setCount(count + 1)}}>
+        <Text style={{styles.label}}>Ajouter</Text>
+      </TouchableOpacity>
+    </View>
+  );
+}}
+
+const styles = StyleSheet.create({{
+  container: {{ flex: 1, padding: 16, backgroundColor: '#f5f5f5' }},
+  title: {{ fontSize: 24, fontWeight: 'bold', marginBottom: 12 }},
+  button: {{ backgroundColor: '#FF7900', padding: 10, borderRadius: 6 }},
+  label: {{ color: 'white', fontSize: 16 }},
+}});
+"""
+
+def synthetic_corpus():
+    """Outputs of ~10 to ~400 KB, clean and with the defects seen in production"""
+    corpus = {}
+    for files in (4, 40, 160):
+        project = {"/index.js": "import App from './App';"}
+        for i in range(files):
+            project[f"/components/Component{i}.js"] = COMPONENT.format(name=f"Component{i}")
+        clean = json.dumps(project, indent=2, ensure_ascii=False)
+        corpus[f"clean_{files}"] = clean
+        corpus[f"fenced_{files}"] = f"Final Answer: voici le projet\n```json\n{clean}\n```\nN'hésitez pas {{à demander}}."
+        corpus[f"escapes_{files}"] = clean.replace("'react'", "\\'react\\'")
+        corpus[f"truncated_{files}"] = clean[: int(len(clean) * 0.9)]
+    return corpus
+
+def load_corpus(directory: Path):
+    if directory.is_dir():
+        corpus = {path.name: path.read_text(encoding="utf-8") for path in sorted(directory.glob("*.txt"))}
+        if corpus:
+            return corpus, "corpus"
+    return synthetic_corpus(), "synthetic"
+
+def legacy_extract(output_str: str):
+    output_str = output_str.strip()
+    first_brace = output_str.find("{")
+    last_brace = output_str.rfind("}")
+    if first_brace == -1 or last_brace == -1:
+        raise ValueError("Aucun JSON détecté dans la sortie")
+    return json.loads(output_str[first_brace:last_brace + 1])
+
+def streamed_extract(output_str: str, chunk: int):
+    parser = IncrementalProjectParser()
+    for i in range(0, len(output_str), chunk):
+        parser.feed(output_str[i:i + chunk])
+    parser.finish()
+    if not parser.files:
+        raise ValueError("Aucun fichier")
+    return parser.files
+
+def timed(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = func()
+        except ValueError:
+            result = None
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", default=os.path.join(os.path.dirname(__file__), "corpus"))
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--chunk", type=int, default=64, help="stream chunk size in characters")
+    args = arg_parser.parse_args()
+    # Repairs are logged as warnings, keep the table readable
+    logging.disable(logging.WARNING)
+
+    corpus, source = load_corpus(Path(args.corpus))
+    print(f"{len(corpus)} outputs ({source})")
+    print(f"{'output':<28}{'KB':>8}{'legacy ms':>12}{'files':>7}{'extract ms':>12}{'files':>7}{'stream ms':>12}{'files':>7}")
+
+    recovered = {"legacy": 0, "extract": 0, "stream": 0}
+    for name, output in corpus.items():
+        legacy_time, legacy = timed(lambda: legacy_extract(output), args.repeat)
+        extract_time, extracted = timed(lambda: extract_project_json(output), args.repeat)
+        stream_time, streamed = timed(lambda: streamed_extract(output, args.chunk), args.repeat)
+        for key, result in (("legacy", legacy), ("extract", extracted), ("stream", streamed)):
+            recovered[key] += 1 if result else 0
+        print(
+            f"{name[:27]:<28}{len(output) / 1024:>8.1f}"
+            f"{legacy_time * 1000:>12.2f}{len(legacy) if legacy else 0:>7}"
+            f"{extract_time * 1000:>12.2f}{len(extracted) if extracted else 0:>7}"
+            f"{stream_time * 1000:>12.2f}{len(streamed) if streamed else 0:>7}"
+        )
+
+    print(f"\nRecovered outputs: legacy {recovered['legacy']}/{len(corpus)}, "
+          f"extract {recovered['extract']}/{len(corpus)}, stream {recovered['stream']}/{len(corpus)}")
+
+if __name__ == "__main__":
+    main()